@@ -0,0 +1,178 @@
+#!/usr/bin/python3
+#
+# File:    aggregation.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Windowed aggregation of the node telemetry (tumbling and sliding windows)
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import logging
+
+# pane statistics
+COUNT = 0
+SUM   = 1
+MIN   = 2
+MAX   = 3
+
+class _FieldWindow():
+
+    __slots__ = ("Panes", "Last")
+
+    def __init__(self, panes):
+        self.Panes = [[0, 0.0, None, None] for _ in range(panes)]  # oldest to newest pane
+        self.Last = None
+
+class WindowAggregator():
+
+    WINDOW_DEF     = 60.0                       # window length in seconds
+    FIELDS_DEF     = ["Temperature", "CbM"]     # aggregated fields
+    KEY_FIELDS_DEF = ["UID", "Epoch", "Address", "Parent"]  # fields of every update, an update with only these fields is not sent
+
+    _Logger = logging.getLogger(__name__)
+
+    #
+    # Constructor.
+    # The window is split in panes of Hop seconds: with Hop equal to Window (default) the windows are tumbling,
+    # with a shorter Hop a sliding window over the last Window seconds is emitted every Hop seconds.
+    # @param config (optional) {"Window":, "Hop":, "Fields":, "KeyFields":}
+    #
+    def __init__(self, config = None):
+        config = config if not config is None else {}
+        self._Window = config.get("Window", self.WINDOW_DEF)
+        self._Hop = config.get("Hop", self._Window)
+        if self._Hop <= 0 or self._Hop > self._Window:
+            raise Exception("Invalid aggregation hop " + str(self._Hop))
+
+        self._Panes = max(1, int(round(self._Window / self._Hop)))
+        self._Fields = list(config.get("Fields", self.FIELDS_DEF))
+        self._KeyFields = list(config.get("KeyFields", self.KEY_FIELDS_DEF))
+
+        self._Nodes = {}                        # uid -> [epoch of the last sample, {field: _FieldWindow}]
+
+        # metrics
+        self._Stats = {
+            "Samples": 0,
+            "Aggregates": 0
+        }
+
+    @property
+    def Hop(self):
+        return self._Hop
+
+    @property
+    def Fields(self):
+        return self._Fields
+
+    @property
+    def stats(self):
+        stats = dict(self._Stats)
+        stats["Nodes"] = len(self._Nodes)
+        return stats
+
+    #
+    # Move the aggregated fields of a node update in the current pane.
+    # Return the update without the aggregated fields, None if only the key fields are left.
+    # @param uid
+    # @param node_update
+    # @param samples (optional) fields carrying a sample, the other aggregated fields are removed without
+    #        a sample (i.e. the default values of a new node), by default all the fields of the update
+    #
+    def add(self, uid, node_update, samples = None):
+        state = None
+        for field in self._Fields:
+            if not field in node_update:
+                continue
+
+            value = node_update.pop(field)
+            if not samples is None and not field in samples:
+                continue
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                continue
+
+            if state is None:
+                state = self._Nodes.get(uid)
+                if state is None:
+                    state = [-1, {}]
+                    self._Nodes[uid] = state
+                state[0] = node_update.get("Epoch", -1)
+
+            window = state[1].get(field)
+            if window is None:
+                window = _FieldWindow(self._Panes)
+                state[1][field] = window
+
+            pane = window.Panes[-1]
+            pane[COUNT] += 1
+            pane[SUM] += value
+            if pane[MIN] is None or value < pane[MIN]: pane[MIN] = value
+            if pane[MAX] is None or value > pane[MAX]: pane[MAX] = value
+            window.Last = value
+            self._Stats["Samples"] += 1
+
+        for field in node_update:
+            if not field in self._KeyFields:
+                return node_update
+        return None
+
+    #
+    # Close the current pane and return the aggregates of the windows with samples,
+    # list of (uid, {"UID":, "Epoch":, Field: mean, FieldMin:, FieldMax:, FieldLast:, FieldCount:}).
+    #
+    def flush(self):
+        aggregates = []
+        idle = []
+        for uid in self._Nodes:
+            epoch, windows = self._Nodes[uid]
+            aggregate = {}
+            for field in windows:
+                window = windows[field]
+                count = 0
+                total = 0.0
+                low = None
+                high = None
+                for pane in window.Panes:
+                    if pane[COUNT] == 0:
+                        continue
+                    count += pane[COUNT]
+                    total += pane[SUM]
+                    if low is None or pane[MIN] < low: low = pane[MIN]
+                    if high is None or pane[MAX] > high: high = pane[MAX]
+
+                # slide the window: the oldest pane is reused as the new current pane
+                oldest = window.Panes.pop(0)
+                oldest[COUNT] = 0
+                oldest[SUM] = 0.0
+                oldest[MIN] = None
+                oldest[MAX] = None
+                window.Panes.append(oldest)
+
+                if count > 0:
+                    aggregate[field] = round(total / count, 3)
+                    aggregate[field + "Min"] = low
+                    aggregate[field + "Max"] = high
+                    aggregate[field + "Last"] = window.Last
+                    aggregate[field + "Count"] = count
+
+            if len(aggregate) > 0:
+                aggregate["UID"] = uid
+                aggregate["Epoch"] = epoch
+                aggregates.append((uid, aggregate))
+            else:
+                idle.append(uid)
+
+        # the nodes without samples in the whole window are removed
+        for uid in idle:
+            del self._Nodes[uid]
+
+        self._Stats["Aggregates"] += len(aggregates)
+        return aggregates
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+#
+# File:    batch_sender.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Batching of the node messages sent through the identity translation
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import asyncio
+import logging
+
+# application modules
+import inference
+
+class BatchSender():
+
+    MODE_ARRAY = "Array"                        # array with all the updates in arrival order
+    MODE_MERGE = "Merge"                        # conflation (opt-in): one object, the latest value of every field wins
+
+    MAX_MESSAGES_DEF = 10
+    MAX_BYTES_DEF    = 16384
+    MAX_DELAY_DEF    = 1.0
+
+    _Logger = logging.getLogger(__name__)
+
+    #
+    # Constructor.
+    # @param inference object used to send the messages (node_send_message)
+    # @param config (optional) {"MaxMessages":, "MaxBytes":, "MaxDelay":, "Mode":}
+    #
+    def __init__(self, inference, config = None):
+        config = config if not config is None else {}
+        self._Inference = inference
+        self._MaxMessages = config.get("MaxMessages", self.MAX_MESSAGES_DEF)
+        self._MaxBytes = config.get("MaxBytes", self.MAX_BYTES_DEF)
+        self._MaxDelay = config.get("MaxDelay", self.MAX_DELAY_DEF)
+        self._Mode = config.get("Mode", self.MODE_ARRAY)
+        self._Batches = {}                      # (device_physical_id, output_channel) -> pending batch
+
+        # metrics
+        self._Stats = {
+            "Batches": 0,
+            "Messages": 0,
+            "Errors": 0,
+            "FlushReason": {"MaxMessages": 0, "MaxBytes": 0, "MaxDelay": 0, "Shutdown": 0},
+            "LastBatchSize": 0,
+            "MaxBatchSize": 0,
+            "LastFlushLatency": 0.0,
+            "MaxFlushLatency": 0.0
+        }
+        self._TotalFlushLatency = 0.0
+
+    @property
+    def pending(self):
+        return sum(len(self._Batches[key]["Messages"]) for key in self._Batches)
+
+    @property
+    def stats(self):
+        stats = dict(self._Stats)
+        stats["Pending"] = self.pending
+        stats["AvgBatchSize"] = round(stats["Messages"] / stats["Batches"], 2) if stats["Batches"] > 0 else 0.0
+        stats["AvgFlushLatency"] = round(self._TotalFlushLatency / stats["Batches"], 6) if stats["Batches"] > 0 else 0.0
+        return stats
+
+    #
+    # Queue a node message, the batch is sent when one of the limits is reached.
+    # @param device_physical_id
+    # @param message dictionary with the node update
+    # @param output_channel
+    #
+    async def node_send_message(self, device_physical_id, message, output_channel):
+        loop = asyncio.get_event_loop()
+        key = (device_physical_id, output_channel)
+        # the message is encoded once, the array payload is made of the encoded messages
+        encoded = inference.encode_payload(message)
+        size = len(encoded) + 1
+
+        batch = self._Batches.get(key)
+        while not batch is None and batch["Bytes"] + size > self._MaxBytes:
+            await self._flush(key, "MaxBytes")
+            # another message can have started a new batch during the send
+            batch = self._Batches.get(key)
+
+        if batch is None:
+            batch = {
+                "Messages": [],
+                "Bytes": 0,
+                "Start": loop.time(),
+                "Timer": loop.call_later(self._MaxDelay, self._on_timer, key)
+            }
+            self._Batches[key] = batch
+
+        if self._Mode == self.MODE_ARRAY:
+            batch["Messages"].append(encoded)
+        else:
+            # the message can be the node itself, keep a copy of the current values
+            batch["Messages"].append(dict(message))
+        batch["Bytes"] += size
+
+        if len(batch["Messages"]) >= self._MaxMessages:
+            await self._flush(key, "MaxMessages")
+
+    #
+    # Send all the pending batches.
+    #
+    async def flush_all(self):
+        for key in list(self._Batches):
+            await self._flush(key, "Shutdown")
+
+    #
+    # Max delay expired for a batch.
+    # @param key
+    #
+    def _on_timer(self, key):
+        asyncio.ensure_future(self._flush(key, "MaxDelay"))
+
+    #
+    # Send a batch.
+    # @param key
+    # @param reason
+    #
+    async def _flush(self, key, reason):
+        batch = self._Batches.pop(key, None)
+        if batch is None or len(batch["Messages"]) == 0:
+            return
+
+        batch["Timer"].cancel()
+        messages = batch["Messages"]
+        if self._Mode == self.MODE_ARRAY:
+            payload = b"[" + b",".join(messages) + b"]"
+        else:
+            payload = {}
+            for message in messages:
+                payload.update(message)
+
+        device_physical_id, output_channel = key
+        try:
+            await self._Inference.node_send_message(device_physical_id, payload, output_channel)
+        except Exception as ex:
+            self._Stats["Errors"] += 1
+            self._Logger.error("batch send error: %s", ex)
+
+        latency = asyncio.get_event_loop().time() - batch["Start"]
+        self._Stats["Batches"] += 1
+        self._Stats["Messages"] += len(messages)
+        self._Stats["FlushReason"][reason] += 1
+        self._Stats["LastBatchSize"] = len(messages)
+        self._Stats["MaxBatchSize"] = max(self._Stats["MaxBatchSize"], len(messages))
+        self._Stats["LastFlushLatency"] = round(latency, 6)
+        self._Stats["MaxFlushLatency"] = max(self._Stats["MaxFlushLatency"], round(latency, 6))
+        self._TotalFlushLatency += latency
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+#
+# File:    capture.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Serial captures: text framing of the serial log and binary format with timestamps
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+# Text capture:   >>chunk<< >>chunk<< ...  (serial_<tag>.log, chunks decoded in utf-8, no time)
+# Binary capture: MAGIC, then for each chunk a RECORD (unix time, length) and the raw bytes (serial_<tag>.cap)
+#
+
+import struct
+import time
+
+FORMAT_TEXT   = "Text"
+FORMAT_BINARY = "Binary"
+
+MAGIC  = b"IGWSCAP1"
+RECORD = struct.Struct("<dI")
+
+TEXT_OPEN      = b">>"
+TEXT_CLOSE     = b"<< "
+TEXT_SEPARATOR = TEXT_CLOSE + TEXT_OPEN
+
+#
+# Frame a chunk in the text format.
+# @param text chunk decoded in utf-8
+#
+def text_record(text):
+    return ">>" + text + "<< "
+
+#
+# Frame a chunk in the binary format.
+# @param data raw bytes
+# @param timestamp (optional) unix time, now if not given
+#
+def binary_record(data, timestamp = None):
+    return RECORD.pack(time.time() if timestamp is None else timestamp, len(data)) + data
+
+#
+# Parse a capture, list of (unix time or None, chunk bytes) in capture order.
+# The format is detected from the content.
+# @param data content of the capture file
+#
+def parse(data):
+    if data.startswith(MAGIC):
+        return parse_binary(data)
+    return parse_text(data)
+
+#
+# Parse a binary capture, a truncated last record (i.e. power loss) is ignored.
+# @param data
+#
+def parse_binary(data):
+    chunks = []
+    offset = len(MAGIC)
+    while offset + RECORD.size <= len(data):
+        timestamp, length = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if offset + length > len(data):
+            break
+        chunks.append((timestamp, data[offset:offset + length]))
+        offset += length
+    return chunks
+
+#
+# Parse a text capture, the chunk boundaries are the separators between two frames.
+# @param data
+#
+def parse_text(data):
+    start = data.find(TEXT_OPEN)
+    if start == -1:
+        return []
+    data = data[start + len(TEXT_OPEN):]
+    if data.endswith(TEXT_CLOSE):
+        data = data[:-len(TEXT_CLOSE)]
+    return [(None, chunk) for chunk in data.split(TEXT_SEPARATOR)]
+
+#
+# Read a capture file.
+# @param filename
+#
+def read(filename):
+    with open(filename, "rb") as f:
+        return parse(f.read())
+
+#
+# Lines of a list of chunks (reassembled), the empty lines are skipped.
+# @param chunks list of (unix time or None, chunk bytes)
+#
+def lines(chunks):
+    stream = b"".join(chunk for _, chunk in chunks)
+    return [line.strip() for line in stream.split(b"\n") if line.strip() != b""]
@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+#
+# File:    config_watcher.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Polling of the configuration files, the changed files are loaded and notified
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+# A file is changed when its signature (modification time, size, inode) is changed, the inode catches
+# the files replaced with os.replace. The new content is parsed and passed to the callback, which
+# validates and applies it: an exception rejects the content and the running configuration is kept.
+# A file not valid (i.e. saved while it was being written) is loaded again at its next change.
+#
+
+import json
+import logging
+import os
+
+class ConfigWatcher():
+
+    INTERVAL_DEF = 5.0                          # seconds between two checks of the files
+
+    _Logger = logging.getLogger(__name__)
+
+    #
+    # Constructor, the current signatures of the files are the loaded configuration.
+    # @param files name -> filename of the watched files
+    # @param on_change function(name, content) applying a new content, it returns false if nothing is changed
+    # @param config (optional) {"Interval":}
+    #
+    def __init__(self, files, on_change, config = None):
+        config = config if not config is None else {}
+        self._Files = dict(files)
+        self._OnChange = on_change
+        self._Interval = config.get("Interval", self.INTERVAL_DEF)
+        self._Signatures = {name: self.signature(self._Files[name]) for name in self._Files}
+
+        # metrics
+        self._Stats = {
+            "Checks": 0,
+            "Changes": 0,
+            "Applied": 0,
+            "Ignored": 0,
+            "Rejected": 0
+        }
+
+    @property
+    def Interval(self):
+        return self._Interval
+
+    @property
+    def stats(self):
+        return dict(self._Stats)
+
+    #
+    # Signature of a file, None if it is missing.
+    # @param filename
+    #
+    @staticmethod
+    def signature(filename):
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    #
+    # Check the files and notify the changed ones, return the number of files applied.
+    #
+    def poll(self):
+        self._Stats["Checks"] += 1
+        applied = 0
+        for name in self._Files:
+            filename = self._Files[name]
+            signature = self.signature(filename)
+            if signature is None or signature == self._Signatures[name]:
+                continue
+
+            self._Signatures[name] = signature
+            self._Stats["Changes"] += 1
+            try:
+                with open(filename) as f:
+                    content = json.load(f)
+                if self._OnChange(name, content):
+                    self._Stats["Applied"] += 1
+                    applied += 1
+                    self._Logger.warning("Configuration %s reloaded", name)
+                else:
+                    self._Stats["Ignored"] += 1
+            except Exception as ex:
+                self._Stats["Rejected"] += 1
+                self._Logger.error("Configuration %s rejected, the running configuration is kept: %s", name, ex)
+        return applied
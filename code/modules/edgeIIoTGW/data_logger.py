@@ -13,9 +13,20 @@
 # the License. You may obtain a copy of the License at:
 # http://www.st.com/SLA0094
 
+from collections import OrderedDict
+import copy
+import io
 import json
 import logging
 import os
+import threading
+import time
+
+# application modules
+import capture
+import journal
+import metrics
+import node_record
 
 class DataLogger():
 
@@ -28,9 +39,35 @@ class DataLogger():
     OUPUT_LOG_APP_DEF        = "app.log"
     OUPUT_LOG_RAW_DEF        = "complete.log"
     OUPUT_LOG_SERIAL_DEF     = "serial_" + TAG + ".log"
+    OUPUT_LOG_CAPTURE_DEF    = "serial_" + TAG + ".cap"
+    OUPUT_LOG_STATS_DEF      = "stats.log"
+    OUPUT_LOG_JOURNAL_DEF    = "journal_" + TAG + ".ndjson"
+    OUPUT_LOG_STATE_DEF      = "state.log"
+    OUPUT_LOG_METRICS_DEF    = "metrics.log"
 
     OUPUT_NET_DEL_FIELDS_DEF = ["Name", "Id", "Type", "UID", "Status", "Addr", "Parent", "RSSI"]
 
+    NETWORK_FORMAT_FIELDS   = "Fields"          # network log: NetDeliveryFields of every node
+    NETWORK_FORMAT_TOPOLOGY = "Topology"        # network log: adjacency snapshot of the topology graph
+
+    WRITE_BEHIND_DEF = {
+        "Enable"    : False,                    # snapshots written by a dedicated thread
+        "QueueSize" : 256                       # max number of files waiting to be written
+    }
+
+    SERIAL_LOG_DEF = {
+        "Enable"        : True,                 # log (or capture) of the data received from the serial ports
+        "FlushInterval" : 2.0,                  # max time in seconds before the serial data is flushed on the file
+        "FlushBytes"    : 16384,                # max bytes buffered for a serial port
+        "MaxHandles"    : 8,                    # max number of serial log files kept open (LRU)
+        "Format"        : capture.FORMAT_TEXT   # Text (>>chunk<< in LogSerial) or Binary (raw chunks with time in LogCapture)
+    }
+
+    JOURNAL_DEF = {
+        "Enable"    : False,                    # append-only NDJSON journal of the node updates and network events
+        "Partition" : journal.PARTITION_HOUR    # time partition of the journal files (Hour or Day)
+    }
+
     _Config = {
         "Path"       : OUTPUT_PATH_DEF,
         "Prefix"     : OUPUT_PREFIX_DEF,
@@ -39,32 +76,104 @@ class DataLogger():
             "LogNetwork" : OUPUT_LOG_NETWORK_DEF,
             "LogApp"     : OUPUT_LOG_APP_DEF,
             "LogRaw"     : OUPUT_LOG_RAW_DEF,
-            "LogSerial"  : OUPUT_LOG_SERIAL_DEF
+            "LogSerial"  : OUPUT_LOG_SERIAL_DEF,
+            "LogCapture" : OUPUT_LOG_CAPTURE_DEF,
+            "LogStats"   : OUPUT_LOG_STATS_DEF,
+            "LogJournal" : OUPUT_LOG_JOURNAL_DEF,
+            "LogState"   : OUPUT_LOG_STATE_DEF,
+            "LogMetrics" : OUPUT_LOG_METRICS_DEF
         },
-        "NetDeliveryFields" : OUPUT_NET_DEL_FIELDS_DEF
+        "NetDeliveryFields" : OUPUT_NET_DEL_FIELDS_DEF,
+        "NetworkFormat" : NETWORK_FORMAT_FIELDS,
+        "WriteBehind" : WRITE_BEHIND_DEF,
+        "SerialLog" : SERIAL_LOG_DEF,
+        "Journal" : JOURNAL_DEF
         }
     
     _Enable = True
 
+    _Writer = None                              # write-behind thread
+    _Journal = None                             # journal writer
+    _Pending = None                             # filename -> text waiting to be written, a new snapshot replaces the pending one
+
     #
     # Constructor.
     # @param config  
     # @param enable (optional)  
+    # @param pipeline_metrics (optional) latency histograms of the writes
     #
-    def __init__(self, config, enable = True):
+    def __init__(self, config, enable = True, pipeline_metrics = None):
         self._Enable = enable
+        self._Metrics = pipeline_metrics if not pipeline_metrics is None else metrics.Metrics()
+        self._Config = copy.deepcopy(self._Config)
+        self._Lock = threading.Condition()
+        self._InFlight = None                   # filename written by the writer thread
+        self._Stopping = False
+        self._Digests = {}                      # filename -> hash of the last content written
+        self._SerialHandles = OrderedDict()     # filename -> [file, bytes not flushed, time of the last flush]
 
-        if config is None:
-            # using default configuration
-            return
-        
-        # copy available config
-        for key in self._Config:
-            if key != "Filenames" and key in config: self._Config[key] = config[key]
+        # metrics
+        self._Unchanged = 0
+        self._Stats = {
+            "Writes": 0,
+            "Errors": 0,
+            "Coalesced": 0,
+            "Overflows": 0,
+            "MaxQueueDepth": 0,
+            "LastWriteLatency": 0.0,
+            "MaxWriteLatency": 0.0
+        }
+        self._TotalWriteLatency = 0.0
+
+        if not config is None:
+            # copy available config
+            for key in self._Config:
+                if key != "Filenames" and key in config: self._Config[key] = config[key]
 
-        if "Filenames" in config:
-            for key in self._Config["Filenames"]:
-                if key in config["Filenames"]: self._Config["Filenames"][key] = config["Filenames"][key]
+            if "Filenames" in config:
+                for key in self._Config["Filenames"]:
+                    if key in config["Filenames"]: self._Config["Filenames"][key] = config["Filenames"][key]
+
+        # projection of the nodes on the network log fields
+        self._NetProjection = node_record.projection(self.NetDeliveryFields)
+
+        if self._Enable and self._Config["Journal"].get("Enable", False):
+            try:
+                self._Journal = journal.JournalWriter(self.Path, self._get_filename("LogJournal"),
+                                                      self._Config["Journal"].get("Partition", self.JOURNAL_DEF["Partition"]))
+            except Exception as ex:
+                logging.getLogger(__name__).error("journal: " + str(ex))
+
+        if self._Enable and self._Config["WriteBehind"].get("Enable", False):
+            self._Pending = OrderedDict()
+            self._Writer = threading.Thread(target=self._writer_loop, name="DataLoggerWriter", daemon=True)
+            self._Writer.start()
+
+    #
+    # Check a configuration without applying it, an exception is raised if it is not valid.
+    # @param config
+    # @param enable (optional)
+    #
+    @classmethod
+    def validate(cls, config, enable = True):
+        if not isinstance(config, dict):
+            raise ValueError("DataLogger: Config object expected")
+        for key in ("Path", "Prefix"):
+            if key in config and not isinstance(config[key], str):
+                raise ValueError("DataLogger: " + key + " string expected")
+        for key in config.get("Filenames", {}).values():
+            if not isinstance(key, str):
+                raise ValueError("DataLogger: Filenames strings expected")
+        if not isinstance(config.get("NetDeliveryFields", []), list):
+            raise ValueError("DataLogger: NetDeliveryFields list expected")
+        if not config.get("NetworkFormat", cls.NETWORK_FORMAT_FIELDS) in (cls.NETWORK_FORMAT_FIELDS, cls.NETWORK_FORMAT_TOPOLOGY):
+            raise ValueError("DataLogger: NetworkFormat unknown")
+        for key in ("WriteBehind", "SerialLog", "Journal"):
+            if not isinstance(config.get(key, {}), dict):
+                raise ValueError("DataLogger: " + key + " object expected")
+        path = config.get("Path", cls.OUTPUT_PATH_DEF)
+        if enable and not os.path.isdir(path):
+            raise ValueError("DataLogger: Path '" + path + "' not found")
 
     @property
     def Path(self):
@@ -77,6 +186,43 @@ class DataLogger():
     @property
     def NetDeliveryFields(self):
         return self._Config["NetDeliveryFields"]   
+
+    @property
+    def NetworkFormat(self):
+        return self._Config["NetworkFormat"]
+
+    @property
+    def SerialLogEnabled(self):
+        return self._Enable and self._Config["SerialLog"].get("Enable", self.SERIAL_LOG_DEF["Enable"])
+
+    @property
+    def SerialFlushInterval(self):
+        return self._Config["SerialLog"].get("FlushInterval", self.SERIAL_LOG_DEF["FlushInterval"])
+
+    @property
+    def SerialFlushBytes(self):
+        return self._Config["SerialLog"].get("FlushBytes", self.SERIAL_LOG_DEF["FlushBytes"])
+
+    @property
+    def SerialMaxHandles(self):
+        return self._Config["SerialLog"].get("MaxHandles", self.SERIAL_LOG_DEF["MaxHandles"])
+
+    @property
+    def SerialFormat(self):
+        return self._Config["SerialLog"].get("Format", self.SERIAL_LOG_DEF["Format"])
+
+    @property
+    def QueueDepth(self):
+        return len(self._Pending) if not self._Pending is None else 0
+
+    @property
+    def WriteStats(self):
+        with self._Lock:
+            stats = dict(self._Stats)
+            stats["QueueDepth"] = self.QueueDepth
+        stats["AvgWriteLatency"] = round(self._TotalWriteLatency / stats["Writes"], 6) if stats["Writes"] > 0 else 0.0
+        stats["Unchanged"] = self._Unchanged
+        return stats
     #
     # get tge filename list according to the key.
     # @param key
@@ -91,18 +237,51 @@ class DataLogger():
     # data output 
     # @param filename
     # @param obj  
+    # @param indent (optional) None for a compact output
     #
-    def _data_output(self, filename, obj):
+    def _data_output(self, filename, obj, indent = 2):
         if not self._Enable:
             return False
         
+        start = self._Metrics.start()
+        try:
+            # the object is serialized now, the caller can modify it after the call
+            if indent is None:
+                text = json.dumps(obj, separators=(",", ":"))
+            else:
+                text = json.dumps(obj, indent=indent)
+            self._Metrics.stop("DataLogger.Serialize", start)
+        except Exception as ex:
+            logging.getLogger(__name__).error("data output:" + str(ex))
+            return False
+
+        # skip the file if the content is not changed
+        digest = hash(text)
+        with self._Lock:
+            if self._Digests.get(filename) == digest:
+                self._Unchanged += 1
+                return True
+            self._Digests[filename] = digest
+
+        if not self._Writer is None and self._enqueue(filename, text):
+            return True
+
+        return self._write_file(filename, text)
+
+    #
+    # write a snapshot on a file
+    # @param filename
+    # @param text
+    #
+    def _write_file(self, filename, text):
         f = None
         ret = False
+        start = time.monotonic()
         try:
             f = open(self.Path + filename, "w")
-            logging.getLogger(__name__).info("File: '" + os.path.abspath(f.name) + "'")
+            logging.getLogger(__name__).debug("File: '%s'", f.name)
 
-            f.write(json.dumps(obj, indent=2))
+            f.write(text)
             
             # adding empty lines
             f.write("\n\n\n")
@@ -119,26 +298,123 @@ class DataLogger():
         except:
             pass
 
+        latency = time.monotonic() - start
+        with self._Lock:
+            self._Metrics.observe("DataLogger.Write", latency)
+            if ret:
+                self._Stats["Writes"] += 1
+                self._Stats["LastWriteLatency"] = round(latency, 6)
+                self._Stats["MaxWriteLatency"] = max(self._Stats["MaxWriteLatency"], round(latency, 6))
+                self._TotalWriteLatency += latency
+            else:
+                self._Stats["Errors"] += 1
+                # write again the file at the next request
+                self._Digests.pop(filename, None)
+
         return ret
 
+    #
+    # queue a snapshot for the writer thread, a pending snapshot of the same file is replaced
+    # @param filename
+    # @param text
+    #
+    def _enqueue(self, filename, text):
+        with self._Lock:
+            if self._Stopping:
+                return False
+
+            if filename in self._Pending:
+                self._Pending[filename] = text
+                self._Stats["Coalesced"] += 1
+                return True
+
+            # a file being written by the thread is always queued, a write of the caller could land before the older one
+            if len(self._Pending) >= self._Config["WriteBehind"].get("QueueSize", self.WRITE_BEHIND_DEF["QueueSize"]) and \
+               filename != self._InFlight:
+                # queue full, the caller writes the file
+                self._Stats["Overflows"] += 1
+                return False
+
+            self._Pending[filename] = text
+            self._Stats["MaxQueueDepth"] = max(self._Stats["MaxQueueDepth"], len(self._Pending))
+            self._Lock.notify_all()
+            return True
+
+    #
+    # writer thread
+    #
+    def _writer_loop(self):
+        while True:
+            with self._Lock:
+                while len(self._Pending) == 0 and not self._Stopping:
+                    self._Lock.wait()
+                if len(self._Pending) == 0:
+                    return
+                filename, text = self._Pending.popitem(last=False)
+                self._InFlight = filename
+
+            self._write_file(filename, text)
+
+            with self._Lock:
+                self._InFlight = None
+                self._Lock.notify_all()
+
+    #
+    # wait for the pending snapshots to be written
+    # @param timeout (optional) in seconds
+    #
+    def flush(self, timeout = None):
+        if self._Writer is None:
+            return True
+
+        with self._Lock:
+            return self._Lock.wait_for(lambda: len(self._Pending) == 0 and self._InFlight is None, timeout)
+
+    #
+    # flush and close the serial log files, write the pending snapshots and stop the writer thread
+    # @param timeout (optional) in seconds
+    #
+    def close(self, timeout = None):
+        while len(self._SerialHandles) > 0:
+            filename, handle = self._SerialHandles.popitem(last=False)
+            self._close_serial_handle(handle)
+
+        if not self._Journal is None:
+            try:
+                self._Journal.close()
+            except Exception as ex:
+                logging.getLogger(__name__).error("journal close: " + str(ex))
+
+        if self._Writer is None:
+            return
+
+        with self._Lock:
+            self._Stopping = True
+            self._Lock.notify_all()
+        self._Writer.join(timeout)
+        self._Writer = None
+
     #
     # generate all logs 
     # @param nodes
     # @param app  
+    # @param topology (optional) topology.TopologyGraph of the nodes
     #
-    def generate_all(self, nodes, app):
+    def generate_all(self, nodes, app, topology = None):
         if not self._Enable:
             return False
         
         self.raw(nodes)
         self.all_nodes(nodes)
-        self.network(nodes)
+        self.network(nodes, topology)
         self.app(app)
 
     #
     # delete all logs 
     #
     def delete_all(self):
+        with self._Lock:
+            self._Digests.clear()
         for filename in os.listdir(self.Path):
             if ".log" in str(filename):
                 file_path = os.path.join(self.Path, filename)
@@ -156,8 +432,8 @@ class DataLogger():
         if not self._Enable:
             return False
         
-        logging.getLogger(__name__).info("raw")
-        return self._data_output(self._get_filename("LogRaw"), nodes)
+        logging.getLogger(__name__).debug("raw")
+        return self._data_output(self._get_filename("LogRaw"), node_record.nodes_to_dict(nodes))
     
     #
     # generate node log
@@ -175,13 +451,13 @@ class DataLogger():
         try:
             #create the file name replacing the id for the placeholder TAG
             filename = self._get_filename("LogNode")
-            filename = filename.replace(self.TAG, str(node["Id"]))
+            filename = filename.replace(self.TAG, str(node.Id))
         except Exception as ex:
             logging.getLogger(__name__).error("output node: " + str(ex))
             return False
         
-        logging.getLogger(__name__).info("output node", node["Name"], node["Id"])
-        return self._data_output(filename, node)
+        logging.getLogger(__name__).debug("output node %s %s", node.Name, node.Id)
+        return self._data_output(filename, node.to_dict())
 
     #
     # generate all nodes log
@@ -191,34 +467,31 @@ class DataLogger():
         if not self._Enable:
             return False
         
-        logging.getLogger(__name__).info("output all nodes")
+        logging.getLogger(__name__).debug("output all nodes")
         for uid in nodes:
             self.node(nodes[uid])
 
     #
     # generate network log
     # @param nodes
+    # @param topology (optional) topology graph, used with the Topology network format
     #
-    def network(self, nodes):
+    def network(self, nodes, topology = None):
         if not self._Enable:
             return False
         
-        network = []
         try:
-            #create a filtered network object starting from the configuration
-            for uid in nodes:
-                node = nodes[uid]
-                p = dict()
-                for field in self.NetDeliveryFields:
-                    #check if a field is available in a node
-                    if field in node:
-                        p[field] = node[field]
-                network.append(p)
+            if self.NetworkFormat == self.NETWORK_FORMAT_TOPOLOGY and not topology is None:
+                network = topology.snapshot()
+            else:
+                #create a filtered network object starting from the configuration
+                project = self._NetProjection
+                network = [project(nodes[uid]) for uid in nodes]
         except Exception as ex:
             logging.getLogger(__name__).error("output network: " + str(ex))
             return False
 
-        logging.getLogger(__name__).info("network")
+        logging.getLogger(__name__).debug("network")
         return self._data_output(self._get_filename("LogNetwork"), network)
 
     #
@@ -229,11 +502,91 @@ class DataLogger():
         if not self._Enable:
             return False
         
-        logging.getLogger(__name__).info("app")
+        logging.getLogger(__name__).debug("app")
         return self._data_output(self._get_filename("LogApp"), app)
 
     #
-    # append the serial stream to the corresponding file
+    # generate statistics log
+    # @param stats
+    #
+    def stats(self, stats):
+        if not self._Enable:
+            return False
+        
+        logging.getLogger(__name__).debug("stats")
+        return self._data_output(self._get_filename("LogStats"), stats)
+
+    #
+    # generate metrics log
+    # @param snapshot
+    #
+    def metrics(self, snapshot):
+        if not self._Enable:
+            return False
+        
+        return self._data_output(self._get_filename("LogMetrics"), snapshot, None)
+
+    #
+    # generate the compact snapshot of the current state of the nodes (journal mode)
+    # @param nodes
+    #
+    def state(self, nodes):
+        if not self._Enable or self._Journal is None:
+            return False
+        
+        return self._data_output(self._get_filename("LogState"), node_record.nodes_to_dict(nodes), None)
+
+    #
+    # append a node update to the journal
+    # @param uid
+    # @param data
+    # @param epoch (optional)
+    #
+    def node_event(self, uid, data, epoch = -1):
+        return self._journal_append(journal.KIND_NODE, uid, data, epoch)
+
+    #
+    # append a network event to the journal
+    # @param data
+    # @param epoch (optional)
+    #
+    def network_event(self, data, epoch = -1):
+        return self._journal_append(journal.KIND_NETWORK, None, data, epoch)
+
+    #
+    # append a record to the journal
+    # @param kind
+    # @param uid
+    # @param data
+    # @param epoch
+    #
+    def _journal_append(self, kind, uid, data, epoch):
+        if not self._Enable or self._Journal is None:
+            return False
+
+        start = self._Metrics.start()
+        try:
+            self._Journal.append(kind, uid, data, epoch)
+            self._Metrics.stop("DataLogger.Journal", start)
+            return True
+        except Exception as ex:
+            logging.getLogger(__name__).error("journal: " + str(ex))
+            return False
+
+    #
+    # flush the buffered serial data and journal records
+    #
+    def flush_buffers(self):
+        self.flush_serial()
+        if not self._Journal is None:
+            try:
+                self._Journal.flush()
+            except Exception as ex:
+                logging.getLogger(__name__).error("journal flush: " + str(ex))
+
+    #
+    # append the serial stream to the corresponding file, the data is buffered and flushed
+    # when the byte threshold or the flush interval is reached
     # @param device_port
     # @param text
     #
@@ -242,16 +595,97 @@ class DataLogger():
             return False
         
         #in different way, this function append data from the serial for each port in a different file
-        f = None
+        return self._serial_append(self._get_filename("LogSerial").replace(self.TAG, device_port), text.encode("utf-8"))
+
+    #
+    # append a chunk received from a serial port to the binary capture of the port
+    # @param device_port
+    # @param data raw bytes
+    #
+    def serial_capture(self, device_port, data):
+        if not self._Enable:
+            return False
+
+        return self._serial_append(self._get_filename("LogCapture").replace(self.TAG, device_port), capture.binary_record(data), capture.MAGIC)
+
+    #
+    # append data to a serial log file, the data is buffered and flushed
+    # when the byte threshold or the flush interval is reached
+    # @param filename
+    # @param data
+    # @param header (optional) bytes written at the beginning of a new file
+    #
+    def _serial_append(self, filename, data, header = None):
+        start = self._Metrics.start()
         try:
-            print("log serial")
-            filename = self._get_filename("LogSerial")
-            filename = filename.replace(self.TAG, device_port)
-            f = open(self.Path + filename,"a")
-            f.write(text)
-            f.close()
+            handle = self._get_serial_handle(filename, header)
+
+            handle[0].write(data)
+            handle[1] += len(data)
+
+            now = time.monotonic()
+            if handle[1] >= self.SerialFlushBytes or now - handle[2] >= self.SerialFlushInterval:
+                self._flush_serial_handle(handle, now)
+            self._Metrics.stop("DataLogger.Serial", start)
             return True
         except Exception as ex:
-            print("log_serial EX:", str(ex))
-            if not f is None: f.close()
+            logging.getLogger(__name__).error("log serial: " + str(ex))
+            handle = self._SerialHandles.pop(filename, None)
+            if not handle is None: self._close_serial_handle(handle)
             return False
+
+    #
+    # flush the buffered serial data of all the ports
+    #
+    def flush_serial(self):
+        now = time.monotonic()
+        for filename in self._SerialHandles:
+            handle = self._SerialHandles[filename]
+            if handle[1] > 0:
+                try:
+                    self._flush_serial_handle(handle, now)
+                except Exception as ex:
+                    logging.getLogger(__name__).error("log serial flush: " + str(ex))
+
+    #
+    # get the open file of a serial log, the least recently used file is closed over the max handles
+    # @param filename
+    # @param header (optional) bytes written at the beginning of a new file
+    #
+    def _get_serial_handle(self, filename, header = None):
+        handle = self._SerialHandles.get(filename)
+        if not handle is None:
+            self._SerialHandles.move_to_end(filename)
+            return handle
+
+        f = open(self.Path + filename, "ab", buffering=max(self.SerialFlushBytes, io.DEFAULT_BUFFER_SIZE))
+        if not header is None and f.tell() == 0:
+            f.write(header)
+        handle = [f, 0, time.monotonic()]
+        self._SerialHandles[filename] = handle
+
+        while len(self._SerialHandles) > self.SerialMaxHandles:
+            _, old_handle = self._SerialHandles.popitem(last=False)
+            self._close_serial_handle(old_handle)
+
+        return handle
+
+    #
+    # flush a serial log file
+    # @param handle
+    # @param now
+    #
+    def _flush_serial_handle(self, handle, now):
+        handle[0].flush()
+        handle[1] = 0
+        handle[2] = now
+
+    #
+    # close a serial log file
+    # @param handle
+    #
+    def _close_serial_handle(self, handle):
+        try:
+            handle[0].close()
+        except Exception as ex:
+            logging.getLogger(__name__).error("log serial close: " + str(ex))
@@ -0,0 +1,130 @@
+#!/usr/bin/python3
+#
+# File:    decoder.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Packet decoder with a dispatch table of the packet types
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import json
+import logging
+
+# application modules
+import hotlog
+
+# faster json backend when installed, the standard library is used otherwise
+# (json_dumps is None without orjson, the other backends don't return compact utf-8 bytes)
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+    JSON_BACKEND = "orjson"
+except ImportError:
+    json_dumps = None
+    try:
+        import ujson
+        json_loads = ujson.loads
+        JSON_BACKEND = "ujson"
+    except ImportError:
+        json_loads = json.loads
+        JSON_BACKEND = "json"
+
+OPEN_BRACE  = ord("{")
+CLOSE_BRACE = ord("}")
+
+class PacketDecoder():
+
+    _Logger = logging.getLogger(__name__)
+
+    #
+    # Constructor.
+    # @param log_config (optional) rate limits of the error messages (Logging section of the configuration)
+    #
+    def __init__(self, log_config = None):
+        self._Handlers = {}                     # packet key -> coroutine function(payload, epoch)
+        self._HotLog = hotlog.RateLimitedLogger(self._Logger, log_config)
+
+        # metrics
+        self._Stats = {
+            "Lines": 0,
+            "Rejected": 0,
+            "Errors": 0,
+            "Unknown": 0
+        }
+
+    @property
+    def stats(self):
+        stats = dict(self._Stats)
+        stats["Backend"] = JSON_BACKEND
+        return stats
+
+    #
+    # Set the rate limits of the error messages.
+    # @param log_config Logging section of the configuration
+    #
+    def configure_log(self, log_config):
+        self._HotLog.configure(log_config)
+
+    #
+    # Register the handler of a packet type.
+    # @param key top level key of the packet (i.e. DevSts)
+    # @param handler coroutine function(payload, epoch)
+    #
+    def register(self, key, handler):
+        self._Handlers[key] = handler
+
+    #
+    # Remove the handler of a packet type.
+    # @param key
+    #
+    def unregister(self, key):
+        self._Handlers.pop(key, None)
+
+    #
+    # Decode a line and call the handler of each packet type found, return false if the line is discarded.
+    # @param line bytes (or str) with a complete json object
+    #
+    async def decode(self, line):
+        self._Stats["Lines"] += 1
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+
+        # cheap check before the parsing, the line must be a json object
+        line = line.strip()
+        if len(line) < 2 or line[0] != OPEN_BRACE or line[-1] != CLOSE_BRACE:
+            self._Stats["Rejected"] += 1
+            return False
+
+        try:
+            json_obj = json_loads(line)
+        except ValueError as ex:
+            self._Stats["Errors"] += 1
+            self._HotLog.error("DecodeError", "Data decode json error: %s", ex)
+            return False
+
+        # retrieve the epoch
+        epoch = 0
+        try:
+            if "Epoch" in json_obj:
+                epoch = int(json_obj["Epoch"])
+        except:
+            epoch = -1
+
+        handled = False
+        for key in json_obj:
+            handler = self._Handlers.get(key)
+            if not handler is None:
+                handled = True
+                await handler(json_obj[key], epoch)
+
+        if not handled:
+            self._Stats["Unknown"] += 1
+        return handled
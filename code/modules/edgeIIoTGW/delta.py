@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+#
+# File:    delta.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Change-only reporting of the node updates with per-field deadbands
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import logging
+import time
+
+# application modules
+import node_record
+
+class DeltaFilter():
+
+    HEARTBEAT_DEF  = 900.0                      # max time in seconds between two full states of a node
+    KEY_FIELDS_DEF = ["UID", "Epoch"]           # fields added to every delta, not used to detect a change
+    DEADBANDS_DEF  = {                          # changes within the deadband are not reported ("Field.SubField" for the nested fields)
+        "Temperature"   : 0.2,
+        "RSSI"          : 3,
+        "Battery.Level" : 1
+    }
+    FULL_STATE_FIELDS_DEF = ["UID", "Epoch", "Address", "Parent", "Type", "State", "RSSI", "Temperature", "CbM", "Battery"]
+
+    _Logger = logging.getLogger(__name__)
+
+    #
+    # Constructor.
+    # @param config (optional) {"Heartbeat":, "KeyFields":, "Deadbands":, "FullStateFields":}
+    # @param owned_fields (optional) fields reported by another stage (i.e. the aggregator), removed from the full state
+    #
+    def __init__(self, config = None, owned_fields = None):
+        config = config if not config is None else {}
+        owned_fields = owned_fields if not owned_fields is None else []
+        self._Heartbeat = config.get("Heartbeat", self.HEARTBEAT_DEF)
+        self._KeyFields = list(config.get("KeyFields", self.KEY_FIELDS_DEF))
+        self._Deadbands = dict(config.get("Deadbands", self.DEADBANDS_DEF))
+        self._FullState = node_record.projection([field for field in config.get("FullStateFields", self.FULL_STATE_FIELDS_DEF)
+                                                  if not field in owned_fields])
+
+        self._Reported = {}                     # uid -> [monotonic time of the last full state, {field: last reported value}]
+
+        # metrics
+        self._Stats = {
+            "Updates": 0,
+            "Deltas": 0,
+            "Suppressed": 0,
+            "FullStates": 0,
+            "FieldsReported": 0,
+            "FieldsSuppressed": 0
+        }
+
+    @property
+    def stats(self):
+        stats = dict(self._Stats)
+        stats["Nodes"] = len(self._Reported)
+        return stats
+
+    #
+    # Filter a node update keeping only the changed fields, the full state of the node is returned
+    # at the first update and when the heartbeat interval is expired.
+    # Return None if nothing has to be reported.
+    # @param node
+    # @param node_update dictionary with the fields updated by a packet
+    #
+    def filter(self, node, node_update):
+        self._Stats["Updates"] += 1
+        now = time.monotonic()
+
+        reported = self._Reported.get(node.UID)
+        if reported is None or now - reported[0] >= self._Heartbeat:
+            return self.full_state(node, now)
+
+        last_values = reported[1]
+        delta = {}
+        for field in node_update:
+            if field in self._KeyFields:
+                continue
+
+            value = node_update[field]
+            if self._changed(field, last_values.get(field), value):
+                delta[field] = value
+                last_values[field] = value
+            else:
+                self._Stats["FieldsSuppressed"] += 1
+
+        if len(delta) == 0:
+            self._Stats["Suppressed"] += 1
+            return None
+
+        self._Stats["Deltas"] += 1
+        self._Stats["FieldsReported"] += len(delta)
+        for field in self._KeyFields:
+            if field in node_update:
+                delta[field] = node_update[field]
+        return delta
+
+    #
+    # Full state of a node, the reported values are reset to the current ones.
+    # @param node
+    # @param now (optional) monotonic time
+    #
+    def full_state(self, node, now = None):
+        state = self._FullState(node)
+        self._Reported[node.UID] = [now if not now is None else time.monotonic(), dict(state)]
+        self._Stats["FullStates"] += 1
+        self._Stats["FieldsReported"] += len(state)
+        return state
+
+    #
+    # Forget the reported values of a node, its next update is a full state.
+    # @param uid
+    #
+    def forget(self, uid):
+        self._Reported.pop(uid, None)
+
+    #
+    # Check if a value is changed from the reported one beyond the deadband of the field.
+    # @param field
+    # @param last
+    # @param value
+    #
+    def _changed(self, field, last, value):
+        if isinstance(value, dict):
+            if not isinstance(last, dict):
+                return True
+            for key in value:
+                if self._changed(field + "." + key, last.get(key), value[key]):
+                    return True
+            return False
+
+        deadband = self._Deadbands.get(field)
+        if deadband is None or last is None:
+            return value != last
+
+        try:
+            # rounded to ignore the error of the float subtraction (i.e. 25.2 - 25.0)
+            return round(abs(value - last), 9) > deadband
+        except TypeError:
+            return value != last
@@ -15,6 +15,9 @@
 #
 
 # common modules
+from collections import deque
+import asyncio
+import copy
 import json
 import logging
 import os
@@ -26,6 +29,24 @@ from os.path import exists
 # application modules
 import inference
 import data_logger
+import scheduler
+import serial_stream
+import node_config
+import batch_sender
+import provisioning
+import node_registry
+import decoder
+import node_record
+import delta
+import aggregation
+import capture
+import metrics
+import hotlog
+import ingress
+import spool
+import topology
+import network_diff
+import config_watcher
 
 # azure modules
 from azure.iot.device.aio import IoTHubModuleClient
@@ -38,7 +59,11 @@ APP_MODULE_VER  = "1.0.0"
 
 CHANNEL_IOTHUB  = "iothub_output"               # out channel to the cloud
 CHANNEL_IDNTRX  = "identitytranslation_output"  # out channel through the identity translation module
-MAX_RETRY       = 3                             # number of retry for
+MAX_RETRY       = 3                             # number of retry for the provisioning
+MAX_PENDING_DEF = 32                            # max number of updates buffered for a node during its provisioning
+METRICS_INTERVAL_DEF = 60                       # seconds between two metrics log
+SPOOL_DRAIN_INTERVAL_DEF = 1.0                  # seconds between two replays of the spooled messages
+NODE_STATE_DEPARTED = -2                        # state of a node missing in the last ZbNet packet (-1 is the state not reported yet)
 SERIAL_GENERIC  = "generic"                     # key dictionary for not specified input serial stream
 
 CONFIG_APP_FILE = "config_app.json"
@@ -47,8 +72,21 @@ CONFIG_NET_FILE = "config_net.json"
 CONFIG_FOLDER = "/app/config/"
 CONFIG_TEMPLATE_FOLDER = "/app/template_config/"
 
+# periodic tasks default configuration (interval and jitter in seconds)
+SCHEDULER_TASKS_DEF = {
+    "Run"        : {"Interval": 10, "Jitter": 0},   # app and raw snapshots
+    "Stats"      : {"Interval": 60, "Jitter": 1},   # statistics flush
+    "StaleNodes" : {"Interval": 60, "Jitter": 1, "Timeout": 600},  # sweep of the nodes not seen for Timeout seconds
+    "State"      : {"Interval": 60, "Jitter": 1}    # compact state snapshot (journal mode)
+}
+
 class GWApp():
     _Nodes = {}                                 # list of nodes connected to the gateway
+    _NodesByAddress = {}                        # secondary index, normalized ZigBee address -> uid
+    _Topology = None                            # graph of the parent/children relationships of the nodes
+    _NetworkDiff = None                         # optional fingerprints of the ZbNet entries, the unchanged ones are skipped
+    _NodeRegistry = None                        # persistent registry of the nodes (warm restart)
+    _NextNodeId = 0                             # id of the next new node
 
     _CoordinatorInfo = {
         "Firmware": {
@@ -62,15 +100,46 @@ class GWApp():
             }
     }
 
-    _DataSerialStreams = {SERIAL_GENERIC: ""}   # dictionary for serial stream, the first one is the default stream accumulator
+    _DataSerialStreams = {}                     # dictionary of the serial stream reassemblers, one for each serial port
     _Inference = None                           # inference object to manage the identity translation
+    _BatchSender = None                         # optional batching of the messages sent through the identity translation
+    _Spool = None                               # optional disk spool of the messages not sent (cloud not reachable)
+    _DeltaFilter = None                         # optional change-only reporting of the node updates
+    _Aggregator = None                          # optional windowed aggregation of the node telemetry
+    _Provisioning = None                        # background provisioning queue
+    _PendingUpdates = {}                        # uid -> updates received during the provisioning of the node
     _DataLogger = None                          # data logger
+    _NodeConfigs = None                         # compiled registry of the nodes configuration
+    _Scheduler = None                           # periodic tasks scheduler
+    _Decoder = None                             # packet decoder, dispatch table of the packet types
+    _Metrics = None                             # counters and latency histograms of the ingest pipeline
+    _HotLog = None                              # rate limited logger of the per packet messages
+    _Ingress = None                             # optional bounded queues of the received lines, one worker for each serial port
+    _ConfigWatcher = None                       # optional polling of the configuration files (hot reload)
+    _Methods = {}                               # direct method name -> handler(payload)
+    _NodesLastSeen = {}                         # uid -> monotonic time of the last received packet
+    _StaleNodes = []                            # uid of the nodes not seen within the stale timeout
+    _DirtyNodes = set()                         # uid of the nodes changed and not yet logged
+    _SnapshotDirty = True                       # nodes changed after the last complete snapshot
 
     _Client = None                              # azure client, in case of None we are in local mode (no cloud connection)
 
     _Config = {
         "SerialPort": {},                       # serial port configuration (i.e. device, baudrate, ...)
         "DataLogger": {},                       # data logger configuration
+        "Scheduler": {},                        # periodic tasks configuration
+        "SerialStream": {},                     # serial stream reassembler configuration (i.e. max line length)
+        "Batching": {},                         # batching of the cloud messages (opt-in)
+        "Spool": {},                            # store-and-forward of the cloud messages not sent (caps, drain rate)
+        "Provisioning": {},                     # provisioning queue configuration (i.e. concurrency, backoff)
+        "NodeRegistry": {},                     # persistent node registry configuration
+        "DeltaReporting": {},                   # change-only reporting of the node updates (deadbands, heartbeat)
+        "Aggregation": {},                      # windowed aggregation of the node telemetry (window, hop, fields)
+        "Metrics": {},                          # counters and latency histograms of the ingest pipeline
+        "Logging": {},                          # log levels and rate limits of the per packet messages
+        "Ingress": {},                          # bounded queues of the received lines (depth, overflow policy)
+        "NetworkDiff": {},                      # skip of the ZbNet entries unchanged since the last packet, departures
+        "ConfigWatcher": {},                    # hot reload of the configuration files (polling interval)
         "Net": {
             "DefaultProvisioning": {},          # default provisioning information
             "EdgeGateway": {},                  # edge gateway
@@ -86,17 +155,78 @@ class GWApp():
     # @param client  
     #
     def __init__(self, client):
-        self._Logger.setLevel(logging.DEBUG)
         self._Logger.info("GW started")
+
+        # the mutable state is owned by the instance, the class attributes are the initial values
+        self._Nodes = {}
+        self._NodesByAddress = {}
+        self._Topology = topology.TopologyGraph()
+        self._CoordinatorInfo = copy.deepcopy(self._CoordinatorInfo)
+        self._DataSerialStreams = {}
+        self._PendingUpdates = {}
+        self._NodesLastSeen = {}
+        self._StaleNodes = []
+        self._DirtyNodes = set()
+        self._Config = copy.deepcopy(self._Config)
+
         self.check_conf()
         self.load_conf()
 
+        # the levels come from the configuration, the per packet messages are rate limited
+        try:
+            hotlog.configure(self._Config["Logging"])
+        except Exception as ex:
+            self._Logger.error("Logging configuration failed: %s", ex)
+        self._HotLog = hotlog.RateLimitedLogger(self._Logger, self._Config["Logging"])
+
+        # the saved nodes are restored in the node list at their first packet
+        if self._Config["NodeRegistry"].get("Enable", False):
+            self._NodeRegistry = node_registry.NodeRegistry(self._Config["NodeRegistry"])
+            self._NodeRegistry.load()
+            self._NextNodeId = self._NodeRegistry.next_id
+
+        self._Metrics = metrics.Metrics(self._Config["Metrics"].get("Enable", False))
+        self._Methods = {
+            "get_metrics": self.method_get_metrics
+        }
+
         self._Client = client
         self._serial_devices = []
         if not client is None:
-            self._Inference = inference.Inference(client)
-        self._DataLogger = data_logger.DataLogger(self._Config["DataLogger"]["Config"], self._Config["DataLogger"]["Enable"])
-        self._DataLogger.generate_all(self._Nodes, self.app)
+            if self._Config["Spool"].get("Enable", False):
+                self._Spool = spool.MessageSpool(self._Config["Spool"])
+                if not self._Spool.open():
+                    self._Spool = None
+            self._Inference = inference.Inference(client, self._Spool)
+            if self._Config["Batching"].get("Enable", False):
+                self._BatchSender = batch_sender.BatchSender(self._Inference, self._Config["Batching"])
+            if self._Config["Aggregation"].get("Enable", False):
+                self._Aggregator = aggregation.WindowAggregator(self._Config["Aggregation"])
+            # the aggregated fields are reported only by the aggregator, also in the full states
+            if self._Config["DeltaReporting"].get("Enable", False):
+                self._DeltaFilter = delta.DeltaFilter(self._Config["DeltaReporting"],
+                                                      self._Aggregator.Fields if not self._Aggregator is None else None)
+            self._Provisioning = provisioning.ProvisioningQueue(self.provision_node, MAX_RETRY, self._Config["Provisioning"], self.provisioning_done)
+        self._DataLogger = data_logger.DataLogger(self._Config["DataLogger"]["Config"], self._Config["DataLogger"]["Enable"], self._Metrics)
+        self._DataLogger.generate_all(self._Nodes, self.app, self._Topology)
+        self._Scheduler = scheduler.Scheduler()
+
+        self._Decoder = decoder.PacketDecoder(self._Config["Logging"])
+        if self._Config["NetworkDiff"].get("Enable", False):
+            self._NetworkDiff = network_diff.NetworkDiff(self._Config["NetworkDiff"])
+        self._Decoder.register("DevSts", self.manage_node_packet)
+        self._Decoder.register("ZbNet", self.manage_network_packet)
+        self._Decoder.register("DevFw", self.manage_sys_fw_packet)
+        self._Decoder.register("DevRtc", self.manage_sys_rtc_packet)
+
+        # the message handler only reassembles the lines, the decoding runs in the worker of the serial port
+        if self._Config["Ingress"].get("Enable", False):
+            self._Ingress = ingress.Ingress(self.process_line, self._Config["Ingress"], self._Metrics)
+
+        # the changes of the configuration files are applied without restart
+        if self._Config["ConfigWatcher"].get("Enable", False):
+            files = {CONFIG_APP_FILE: CONFIG_FOLDER + CONFIG_APP_FILE, CONFIG_NET_FILE: CONFIG_FOLDER + CONFIG_NET_FILE}
+            self._ConfigWatcher = config_watcher.ConfigWatcher(files, self.reload_conf, self._Config["ConfigWatcher"])
 
     @property
     def client(self):
@@ -110,54 +240,87 @@ class GWApp():
     def app(self):
         _app = {
             "CoordinatorInfo": self._CoordinatorInfo,
-            "DeviceNumber": len(self._Nodes)
+            "DeviceNumber": len(self._Nodes),
+            "StaleDeviceNumber": len(self._StaleNodes)
         }
         return _app
 
+    @property
+    def stats(self):
+        _stats = {
+            "Scheduler": self._Scheduler.stats,
+            "Decoder": self._Decoder.stats,
+            "DataLogger": self._DataLogger.WriteStats,
+            "Egress": self._Inference.stats if not self._Inference is None else None,
+            "Spool": self._Spool.stats if not self._Spool is None else None,
+            "Batching": self._BatchSender.stats if not self._BatchSender is None else None,
+            "DeltaReporting": self._DeltaFilter.stats if not self._DeltaFilter is None else None,
+            "Aggregation": self._Aggregator.stats if not self._Aggregator is None else None,
+            "Provisioning": self._Provisioning.stats if not self._Provisioning is None else None,
+            "NodeRegistry": self._NodeRegistry.stats if not self._NodeRegistry is None else None,
+            "Logging": self._HotLog.stats,
+            "Topology": self._Topology.stats,
+            "NetworkDiff": self._NetworkDiff.stats if not self._NetworkDiff is None else None,
+            "Ingress": self._Ingress.stats if not self._Ingress is None else None,
+            "ConfigWatcher": self._ConfigWatcher.stats if not self._ConfigWatcher is None else None,
+            "SerialStreams": {port: {"Lines": self._DataSerialStreams[port].lines,
+                                     "DroppedLines": self._DataSerialStreams[port].dropped_lines,
+                                     "Pending": self._DataSerialStreams[port].pending} for port in self._DataSerialStreams}
+        }
+        return _stats
+
+    @property
+    def metrics(self):
+        decoder_stats = self._Decoder.stats
+        counters = {
+            "Lines": decoder_stats["Lines"],
+            "Packets": decoder_stats["Lines"] - decoder_stats["Rejected"] - decoder_stats["Errors"] - decoder_stats["Unknown"],
+            "DecodeErrors": decoder_stats["Rejected"] + decoder_stats["Errors"],
+            "LinesDropped": sum(self._DataSerialStreams[port].dropped_lines for port in self._DataSerialStreams),
+            "DataLoggerErrors": self._DataLogger.WriteStats["Errors"]
+        }
+        if not self._Provisioning is None:
+            counters["ProvisioningFailures"] = self._Provisioning.stats["Failed"]
+        if not self._Ingress is None:
+            counters["IngressDropped"] = self._Ingress.total("Dropped")
+            counters["IngressConflated"] = self._Ingress.total("Conflated")
+        if not self._Inference is None:
+            counters["Messages"] = self._Inference.stats["Messages"]
+            counters["SendErrors"] = self._Inference.stats["Errors"]
+        if not self._Spool is None:
+            counters["Spooled"] = self._Spool.stats["Spooled"]
+            counters["SpoolPending"] = self._Spool.count
+        return self._Metrics.snapshot(counters)
+
     #
-    # get the node configuration with the uid.
-    # @param uid  
+    # get the node configuration, it is cached on the node once resolved.
+    # @param node  
     #
-    def get_node_config(self, uid):
-        config = None
-        if uid == "":
-            return None
+    def get_node_config(self, node):
+        if not node.Config is None or node.UID == "":
+            return node.Config
         
         try:
-            #search the current uid into the config nodes
-            if config is None and uid in self._Config["Net"]["Nodes"]:
-                config = self._Config["Net"]["Nodes"][uid]
-                    
-            #find the first free config node
-            #AR 13/12
-            if config is None:
-                for uid_temp in self._Config["Net"]["Nodes"]:
-                    if config == None and uid_temp.find("NODE") != -1:
-                        #associate the configuration to the uid and remove the old
-                        self._Logger.info("Config update uid:" + uid + " temp_uid:" + uid_temp)
-                        self._Config["Net"]["Nodes"][uid] = self._Config["Net"]["Nodes"][uid_temp]
-                        self._Config["Net"]["Nodes"].pop(uid_temp)
-                        config = self._Config["Net"]["Nodes"][uid]
-
+            #search the current uid into the config nodes or associate the first free config node (persisted on the file)
+            node.Config = self._NodeConfigs.assign(node.UID)
         except:
-            pass
-        return config
+            node.Config = None
+        return node.Config
     #
     # Update and/or generate the name in a node trying to retrieve information in the configuration.
     # @param node  
     #
     def _update_field_name(self, node):
-        if node is None or not "UID" in node:
+        if node is None:
             return
         
-        uid = node["UID"] 
         try:
             #retrieve the name from the configuration
-            config = self.get_node_config(uid)
-            node["Name"] = config["Name"]
+            config = self.get_node_config(node)
+            node.Name = config["Name"]
         except:
             #if the node is not present in the configuration generate a standard name
-            node["Name"] = "Node" + node["UID"][-2:]
+            node.Name = "Node" + node.UID[-2:]
 
     #
     # Check if the template files exists and in case copy on the binded folder app_config->iiotedgegw_config
@@ -166,8 +329,7 @@ class GWApp():
         try:
             f_cnf = CONFIG_FOLDER + CONFIG_APP_FILE
             f_tmp = CONFIG_TEMPLATE_FOLDER + CONFIG_APP_FILE
-            print("App configuration file ... " + f_cnf + " " + f_tmp)
-            self._Logger.info("App configuration file ... " + f_cnf + " " + f_tmp)
+            self._Logger.info("App configuration file ... %s %s", f_cnf, f_tmp)
             file_exists = exists(f_cnf)
 
             #if not exist copy the config file
@@ -181,8 +343,7 @@ class GWApp():
         try:
             f_cnf = CONFIG_FOLDER + CONFIG_NET_FILE
             f_tmp = CONFIG_TEMPLATE_FOLDER + CONFIG_NET_FILE
-            print("Net configuration file ... " + f_cnf + " " + f_tmp)
-            self._Logger.info("Net configuration file ... " + f_cnf + " " + f_tmp)
+            self._Logger.info("Net configuration file ... %s %s", f_cnf, f_tmp)
             file_exists = exists(f_cnf)
 
             #if not exist copy the config file
@@ -203,6 +364,19 @@ class GWApp():
                 json_conf_app_datafile = json.load(json_conf_app_file)
                 if "DataLogger" in json_conf_app_datafile: self._Config["DataLogger"] = json_conf_app_datafile["DataLogger"]
                 if "SerialPort" in json_conf_app_datafile: self._Config["SerialPort"] = json_conf_app_datafile["SerialPort"]
+                if "Scheduler" in json_conf_app_datafile: self._Config["Scheduler"] = json_conf_app_datafile["Scheduler"]
+                if "SerialStream" in json_conf_app_datafile: self._Config["SerialStream"] = json_conf_app_datafile["SerialStream"]
+                if "Batching" in json_conf_app_datafile: self._Config["Batching"] = json_conf_app_datafile["Batching"]
+                if "Spool" in json_conf_app_datafile: self._Config["Spool"] = json_conf_app_datafile["Spool"]
+                if "Provisioning" in json_conf_app_datafile: self._Config["Provisioning"] = json_conf_app_datafile["Provisioning"]
+                if "NodeRegistry" in json_conf_app_datafile: self._Config["NodeRegistry"] = json_conf_app_datafile["NodeRegistry"]
+                if "DeltaReporting" in json_conf_app_datafile: self._Config["DeltaReporting"] = json_conf_app_datafile["DeltaReporting"]
+                if "Aggregation" in json_conf_app_datafile: self._Config["Aggregation"] = json_conf_app_datafile["Aggregation"]
+                if "Metrics" in json_conf_app_datafile: self._Config["Metrics"] = json_conf_app_datafile["Metrics"]
+                if "Logging" in json_conf_app_datafile: self._Config["Logging"] = json_conf_app_datafile["Logging"]
+                if "Ingress" in json_conf_app_datafile: self._Config["Ingress"] = json_conf_app_datafile["Ingress"]
+                if "NetworkDiff" in json_conf_app_datafile: self._Config["NetworkDiff"] = json_conf_app_datafile["NetworkDiff"]
+                if "ConfigWatcher" in json_conf_app_datafile: self._Config["ConfigWatcher"] = json_conf_app_datafile["ConfigWatcher"]
 
             self._Logger.info("Configuration App loaded")
         except Exception as ex:
@@ -219,20 +393,229 @@ class GWApp():
         except Exception as ex:
             self._Logger.error("Configuration Network load failed: " + str(ex))
             pass
+
+        self._NodeConfigs = node_config.NodeConfigRegistry(self._Config["Net"], CONFIG_FOLDER + CONFIG_NET_FILE)
+
+    #
+    # Apply a configuration file changed on the disk (called by the configuration watcher), return false
+    # if nothing is applied. The new configuration is validated and compiled before any change, the swap
+    # has no await so the lines received in the meantime wait in their queues and none is lost.
+    # @param name CONFIG_APP_FILE or CONFIG_NET_FILE
+    # @param content parsed content of the file
+    #
+    def reload_conf(self, name, content):
+        if not isinstance(content, dict):
+            raise ValueError("json object expected")
+        if name == CONFIG_NET_FILE:
+            return self.reload_net_conf(content)
+        return self.reload_app_conf(content)
+
+    #
+    # Apply the changed sections of the application configuration: log levels and rate limits, data logger.
+    # The other sections are applied at the next restart, a missing section is left unchanged.
+    # @param content
+    #
+    def reload_app_conf(self, content):
+        sections = {}
+        for name in self._Config:
+            if name != "Net" and name in content and content[name] != self._Config[name]:
+                sections[name] = content[name]
+
+        for name in sections:
+            if name != "Logging" and name != "DataLogger":
+                self._Logger.warning("Configuration section %s changed, it is applied at the next restart", name)
+
+        logging_config = sections.get("Logging")
+        if not logging_config is None:
+            hotlog.validate(logging_config)
+
+        logger_config = sections.get("DataLogger")
+        new_data_logger = None
+        if not logger_config is None:
+            if not isinstance(logger_config.get("Enable"), bool):
+                raise ValueError("DataLogger: Enable boolean expected")
+            data_logger.DataLogger.validate(logger_config.get("Config"), logger_config["Enable"])
+            new_data_logger = data_logger.DataLogger(logger_config["Config"], logger_config["Enable"], self._Metrics)
+
+        if not logging_config is None:
+            hotlog.configure(logging_config)
+            self._HotLog.configure(logging_config)
+            self._Decoder.configure_log(logging_config)
+            self._Config["Logging"] = logging_config
+
+        if not new_data_logger is None:
+            self.swap_data_logger(new_data_logger)
+            self._Config["DataLogger"] = logger_config
+
+        return not logging_config is None or not new_data_logger is None
+
+    #
+    # Apply a new network configuration: the registry is compiled again, the slots assigned in the meantime
+    # are kept, the nodes waiting for a configuration take the new slots and the names of the nodes are
+    # updated. The file saved by the registry (slot assignment) is not a change.
+    # @param content
+    #
+    def reload_net_conf(self, content):
+        if content == self._Config["Net"]:
+            return False
+
+        nodes = content.get("Nodes", {})
+        if not isinstance(nodes, dict):
+            raise ValueError("Nodes object expected")
+        for key in nodes:
+            if not isinstance(nodes[key], dict) or not isinstance(nodes[key].get("Provisioning", {}), dict):
+                raise ValueError("invalid configuration of node " + key)
+
+        registry = node_config.NodeConfigRegistry(content, CONFIG_FOLDER + CONFIG_NET_FILE)
+        adopted = registry.adopt(self._NodeConfigs)
+        self._Config["Net"] = content
+        self._NodeConfigs = registry
+
+        # the configurations cached on the nodes are resolved again, the nodes without a configuration
+        # take the new slots and the names are updated
+        for uid in self._Nodes:
+            node = self._Nodes[uid]
+            name = node.Name
+            node.Config = None
+            self._update_field_name(node)
+            if node.Name != name:
+                self.save_node(node)
+                self.mark_node_dirty(node)
+        self.log_dirty_nodes()
+
+        self._Logger.warning("Network configuration: %d free slots, %d assignments kept", registry.free_slots, adopted)
+        return True
+
+    #
+    # Replace the data logger, the snapshots are generated with the new paths and fields
+    # and the pending writes of the previous logger are completed.
+    # @param new_data_logger
+    #
+    def swap_data_logger(self, new_data_logger):
+        old_data_logger = self._DataLogger
+        self._DataLogger = new_data_logger
+        if self._Scheduler.remove_task("LogFlush"):
+            self._Scheduler.add_task("LogFlush", new_data_logger.flush_buffers, new_data_logger.SerialFlushInterval)
+
+        new_data_logger.generate_all(self._Nodes, self.app, self._Topology)
+        old_data_logger.close()
+
+    #
+    # get the configuration of a periodic task merging the default values.
+    # @param name
+    #
+    def get_task_config(self, name):
+        config = dict(SCHEDULER_TASKS_DEF[name])
+        try:
+            tasks = self._Config["Scheduler"]["Tasks"]
+            if name in tasks: config.update(tasks[name])
+        except:
+            pass
+        return config
+
     #
-    # start the Gateway operation
+    # start the Gateway operation, it must be called with a running event loop
     #
     def start(self):
         self._Logger.info("start")
 
+        config = self.get_task_config("Run")
+        self._Scheduler.add_task("Run", self.run, config["Interval"], config["Jitter"])
+
+        config = self.get_task_config("Stats")
+        self._Scheduler.add_task("Stats", self.stats_flush, config["Interval"], config["Jitter"])
+
+        config = self.get_task_config("StaleNodes")
+        self._Scheduler.add_task("StaleNodes", self.stale_nodes_sweep, config["Interval"], config["Jitter"])
+
+        config = self.get_task_config("State")
+        self._Scheduler.add_task("State", self.state_snapshot, config["Interval"], config["Jitter"])
+
+        if self._Metrics.enabled:
+            self._Scheduler.add_task("Metrics", self.metrics_flush, self._Config["Metrics"].get("Interval", METRICS_INTERVAL_DEF))
+
+        # the aggregates are emitted at every hop of the window
+        if not self._Aggregator is None:
+            self._Scheduler.add_task("Aggregation", self.aggregation_flush, self._Aggregator.Hop)
+
+        # flush of the serial logs of the idle ports and of the journal
+        self._Scheduler.add_task("LogFlush", self._DataLogger.flush_buffers, self._DataLogger.SerialFlushInterval)
+
+        # replay of the spooled messages at the drain rate
+        if not self._Spool is None:
+            self._Scheduler.add_task("SpoolDrain", self.spool_drain, self._Config["Spool"].get("DrainInterval", SPOOL_DRAIN_INTERVAL_DEF))
+
+        # check of the configuration files
+        if not self._ConfigWatcher is None:
+            self._Scheduler.add_task("ConfigWatch", self._ConfigWatcher.poll, self._ConfigWatcher.Interval)
+
+        self._Scheduler.start()
+
     #
     # run the Gateway task
     #
     def run(self):
-        self._Logger.info("live " + str(len(self._Nodes)))
+        self._Logger.debug("live %d", len(self._Nodes))
         #self._DataLogger.app(self._Config["Net"]["Nodes"])
         self._DataLogger.app(self.app)
-        self._DataLogger.raw(self._Nodes)
+
+        # the complete snapshot is generated only if a node is changed
+        if self._SnapshotDirty:
+            self._SnapshotDirty = False
+            self._DataLogger.raw(self._Nodes)
+
+        # the slots assigned since the last run are saved in the network configuration file
+        self._NodeConfigs.flush()
+
+    #
+    # generate the compact state snapshot of the nodes
+    #
+    def state_snapshot(self):
+        self._DataLogger.state(self._Nodes)
+
+    #
+    # flush the statistics on the log
+    #
+    def stats_flush(self):
+        self._DataLogger.stats(self.stats)
+
+    #
+    # flush the metrics on the log
+    #
+    def metrics_flush(self):
+        self._DataLogger.metrics(self.metrics)
+
+    #
+    # replay the spooled messages
+    #
+    async def spool_drain(self):
+        await self._Inference.drain_spool(self._Config["Spool"].get("DrainInterval", SPOOL_DRAIN_INTERVAL_DEF))
+
+    #
+    # search the nodes without packets within the stale timeout
+    #
+    def stale_nodes_sweep(self):
+        timeout = self.get_task_config("StaleNodes")["Timeout"]
+        now = time.monotonic()
+
+        stale_nodes = []
+        for uid in self._NodesLastSeen:
+            if now - self._NodesLastSeen[uid] > timeout:
+                stale_nodes.append(uid)
+                if not uid in self._StaleNodes:
+                    self._HotLog.warning("NodeStale", "Node stale uid:'%s' no packets in the last %ss", uid, timeout)
+
+        self._StaleNodes = stale_nodes
+
+    #
+    # send the aggregates of the windows closed
+    #
+    async def aggregation_flush(self):
+        for uid, aggregate in self._Aggregator.flush():
+            node = self.find_node_by_uid(uid)
+            if not node is None:
+                # each aggregate summarizes a window, it is not filtered by the change-only reporting
+                await self.forward_update(node, aggregate, False)
 
     #
     # stop the Gateway operation
@@ -240,6 +623,32 @@ class GWApp():
     def stop(self):
         self._Logger.info("stop")
 
+    #
+    # stop the periodic tasks and generate the last snapshot
+    #
+    async def shutdown(self):
+        self._Logger.info("shutdown")
+        if not self._Ingress is None:
+            await self._Ingress.stop()
+        await self._Scheduler.stop()
+        if not self._Provisioning is None:
+            await self._Provisioning.stop()
+        if not self._Aggregator is None:
+            await self.aggregation_flush()
+        if not self._BatchSender is None:
+            await self._BatchSender.flush_all()
+        if not self._Spool is None:
+            self._Spool.close()
+        self.stop()
+        self.run()
+        self.state_snapshot()
+        # the serial logs, the journal and the pending snapshots are written by the close
+        self._DataLogger.close()
+        if not self._NodeRegistry is None:
+            self._NodeRegistry.compact()
+            self._NodeRegistry.close()
+        self._Logger.info("%s v%s terminated", APP_MODULE_NAME, APP_MODULE_VER)
+
     #
     # Retrieve a node in the list with the uid.
     # @param uid  
@@ -254,37 +663,147 @@ class GWApp():
     # @param address  
     #
     def find_node_by_address(self, address):
-        for uid in self._Nodes:
-            if self._Nodes[uid]["Address"] == address:
-                return self._Nodes[uid]
-        return None
+        uid = self._NodesByAddress.get(self.normalize_address(address))
+        if uid is None:
+            return None
+        return self._Nodes.get(uid)
+
+    #
+    # Normalize a ZigBee address (upper case, "-" if not available).
+    # @param address  
+    #
+    @staticmethod
+    def normalize_address(address):
+        if address is None:
+            return "-"
+        address = str(address).strip().upper()
+        if address == "":
+            return "-"
+        return address
+
+    #
+    # Mark a node as changed, its log is generated by log_dirty_nodes.
+    # @param node  
+    #
+    def mark_node_dirty(self, node):
+        self._DirtyNodes.add(node.UID)
+        self._SnapshotDirty = True
+
+    #
+    # Generate the log only of the nodes changed.
+    #
+    def log_dirty_nodes(self):
+        for uid in self._DirtyNodes:
+            node = self._Nodes.get(uid)
+            if not node is None:
+                self._DataLogger.node(node)
+        self._DirtyNodes.clear()
+
+    #
+    # Add a node to the list and to the address index.
+    # @param node  
+    #
+    def add_node(self, node):
+        self._Nodes[node.UID] = node
+        address = node.Address
+        node.Address = "-"
+        self.set_node_address(node, address)
+
+    #
+    # Change the address of a node keeping the address index updated.
+    # If the address is owned by another node (i.e. address reused after a rejoin) the old owner loses it.
+    # @param node  
+    # @param address  
+    #
+    def set_node_address(self, node, address):
+        uid = node.UID
+        address = self.normalize_address(address)
+
+        # remove the old address from the index
+        old_address = node.Address
+        if self._NodesByAddress.get(old_address) == uid:
+            del self._NodesByAddress[old_address]
+
+        node.Address = address
+        if address == "-":
+            return
+
+        # check the address conflicts
+        owner_uid = self._NodesByAddress.get(address)
+        if not owner_uid is None and owner_uid != uid:
+            owner = self._Nodes.get(owner_uid)
+            if not owner is None and owner.Address == address:
+                self._HotLog.warning("AddressReused", "Address %s reused, uid:'%s' replaces uid:'%s'", address, uid, owner_uid)
+                owner.Address = "-"
+                owner.Parent = "-"
+                self.update_topology(owner)
+                # the next ZbNet entry of the old owner is processed even if unchanged
+                if not self._NetworkDiff is None:
+                    self._NetworkDiff.forget(owner_uid, address)
+                self.mark_node_dirty(owner)
+
+        self._NodesByAddress[address] = uid
+
+    #
+    # Update the position of a node in the topology graph with its address and parent.
+    # @param node
+    #
+    def update_topology(self, node):
+        return self._Topology.update(node.UID, node.Address, self.normalize_address(node.Parent))
+
+    #
+    # Allocate the id of a new node.
+    #
+    def allocate_node_id(self):
+        id_num = self._NextNodeId
+        self._NextNodeId += 1
+        return id_num
+
+    #
+    # Restore a node saved in the registry, with its provisioning result, in the node list.
+    # @param uid  
+    # @param address  
+    #
+    def restore_node(self, uid, address):
+        if self._NodeRegistry is None:
+            return None
+
+        if uid != "":
+            record = self._NodeRegistry.get(uid)
+        else:
+            record = self._NodeRegistry.find_by_address(self.normalize_address(address))
+
+        if record is None or record["UID"] in self._Nodes:
+            return None
+
+        node = self.create_empty_node(record["UID"])
+        for field in record:
+            setattr(node, field, record[field])
+
+        # the saved address could be already used by a live node
+        if not self.find_node_by_address(node.Address) is None:
+            node.Address = "-"
+            node.Parent = "-"
+
+        self.add_node(node)
+        self._Logger.info("Node restored uid:'%s' provisioned:%s", node.UID, node.Provisioned)
+        return node
+
+    #
+    # Save a node in the registry.
+    # @param node  
+    #
+    def save_node(self, node):
+        if not self._NodeRegistry is None:
+            self._NodeRegistry.put(node)
 
     #
     # Create a node starting to a data packet (missing type, parent and network information).
     # @param uid  
     #
     def create_empty_node(self, uid):
-        try:
-            node = {
-                "Name": "",
-                "Id": -1, 
-                "Type": -1,
-                "UID": uid, 
-                "Epoch": -1, 
-                "State": -1, 
-                "Address": "-", 
-                "Parent":"-", 
-                "RSSI": 0, 
-                "Temperature": 0, 
-                "CbM": -1, 
-                "Battery" : {"Voltage":0, "Level": 0, "State": -1},
-                "Provisioned": 0
-            }
+        return node_record.Node(uid)
 
-            return node
-        except Exception as ex:
-            self._Logger.error("Create empty node: " + str(ex))
-            return None
     #
     # Create a node starting to a data packet and return the node.
     # @param uid  
@@ -298,22 +817,22 @@ class GWApp():
             node = self.create_empty_node(uid)
 
             # copy the known data 
-            node["Id"] = id_num
-            node["Epoch"] = epoch
-            node["Address"] = data["ZbAddr"]
+            node.Id = id_num
+            node.Epoch = epoch
+            node.Address = self.normalize_address(data["ZbAddr"])
 
             if "ZbPrntAddr" in data:
-                node["Parent"] = data["ZbPrntAddr"]
+                node.Parent = data["ZbPrntAddr"]
 
             # data part
             if "Temperature" in data:
-                node["Temperature"] = float(data["Temperature"]) / 10
+                node.Temperature = float(data["Temperature"]) / 10
 
             if "CbM" in data:
-                node["CbM"] = int(data["CbM"])
+                node.CbM = int(data["CbM"])
 
             if "Battery" in data:
-                node["Battery"] = data["Battery"]
+                node.Battery = data["Battery"]
 
             self._update_field_name(node)
             return node
@@ -335,21 +854,21 @@ class GWApp():
             node = self.create_empty_node(uid)
 
             # copy the known data 
-            node["Id"] = id_num
-            node["Epoch"] = epoch
-            node["Address"] = data["ZbAddr"]
+            node.Id = id_num
+            node.Epoch = epoch
+            node.Address = self.normalize_address(data["ZbAddr"])
             
             if "ZbPrntAddr" in data:
-                node["Parent"] = data["ZbPrntAddr"]
+                node.Parent = data["ZbPrntAddr"]
 
             if "ZbTyp" in data:
-                node["Type"] = data["ZbTyp"]
+                node.Type = data["ZbTyp"]
 
             if "ZbSts" in data:
-                node["State"] = data["ZbSts"]
+                node.State = data["ZbSts"]
 
             if "RSSI" in data:
-                node["RSSI"] = data["RSSI"]
+                node.RSSI = data["RSSI"]
 
             self._update_field_name(node)
 
@@ -368,7 +887,7 @@ class GWApp():
     def update_node_with_data_packet(self, node, data, epoch = -1):
         modify_fields = []
         try:
-            if "UID" in data and node["UID"] != data["UID"]:
+            if "UID" in data and node.UID != data["UID"]:
                 raise Exception("UID not match")
 
             # adding default fields (always available)
@@ -378,36 +897,36 @@ class GWApp():
             modify_fields.append("Parent")
 
             # copy the known data 
-            node["Epoch"] = epoch
+            node.Epoch = epoch
 
             # check the current and saved address
             if "ZbAddr" in data:
-                new_addr = data["ZbAddr"].upper()
-                if node["Address"] != new_addr:
+                new_addr = self.normalize_address(data["ZbAddr"])
+                if node.Address != new_addr:
                     # in case of a change of address, reset the parent too
-                    node["Address"] = new_addr
-                    node["Parent"] = "-"
+                    self.set_node_address(node, new_addr)
+                    node.Parent = "-"
 
             if "ZbPrntAddr" in data:
-                node["Parent"] = data["ZbPrntAddr"]
+                node.Parent = data["ZbPrntAddr"]
 
             # data part
             if "Temperature" in data:
                 modify_fields.append("Temperature")
-                node["Temperature"] = float(data["Temperature"]) / 10
+                node.Temperature = float(data["Temperature"]) / 10
 
             if "CbM" in data:
                 modify_fields.append("CbM")
-                node["CbM"] = int(data["CbM"])
+                node.CbM = int(data["CbM"])
 
             if "Battery" in data:
                 modify_fields.append("Battery")
-                node["Battery"] = data["Battery"]
+                node.Battery = data["Battery"]
 
             # create the object with the updated data
             node_update = {}
             for k in modify_fields: 
-                node_update[k] = node[k]
+                node_update[k] = getattr(node, k)
 
             return node_update
         except Exception as ex:
@@ -424,7 +943,7 @@ class GWApp():
         modify_fields = []
 
         try:
-            if "UID" in data and node["UID"] != data["UID"]:
+            if "UID" in data and node.UID != data["UID"]:
                 raise Exception("UID not match")
 
             # include the following  fields as default
@@ -434,35 +953,35 @@ class GWApp():
             modify_fields.append("Parent")
 
             # copy the known data 
-            node["Epoch"] = epoch
+            node.Epoch = epoch
 
             # check the current and saved address
             if "ZbAddr" in data:
-                new_addr = data["ZbAddr"].upper()
-                if node["Address"] != new_addr:
+                new_addr = self.normalize_address(data["ZbAddr"])
+                if node.Address != new_addr:
                     # in case of a change of address, reset the parent
-                    node["Address"] = new_addr
-                    node["Parent"] = "-"
+                    self.set_node_address(node, new_addr)
+                    node.Parent = "-"
 
             if "ZbPrntAddr" in data:
-                node["Parent"] = data["ZbPrntAddr"]
+                node.Parent = data["ZbPrntAddr"]
 
             if "ZbTyp" in data:
                 modify_fields.append("Type")
-                node["Type"] = data["ZbTyp"]
+                node.Type = data["ZbTyp"]
 
             if "ZbSts" in data:
                 modify_fields.append("State")
-                node["State"] = data["ZbSts"]
+                node.State = data["ZbSts"]
 
             if "RSSI" in data:
                 modify_fields.append("RSSI")
-                node["RSSI"] = data["RSSI"]
+                node.RSSI = data["RSSI"]
 
             # create an object only with the updated data
             node_update = {}
             for k in modify_fields: 
-                node_update[k] = node[k]
+                node_update[k] = getattr(node, k)
 
             return node_update
 
@@ -500,54 +1019,138 @@ class GWApp():
     # @param addr  
     #
     def get_node(self, uid, addr):
+        start = self._Metrics.start()
         node = None
 
-        #search the node by uid
+        #search the node by uid, an unknown uid is a new node even if its address is already used
         if uid != "":
             node = self.find_node_by_uid(uid)
+        else:
+            #without uid search the node by address
+            node = self.find_node_by_address(addr)
 
-        #if not found search the node by address
+        #if not found search the node in the saved registry
         if node is None:
-            node = self.find_node_by_address(addr)
+            node = self.restore_node(uid, addr)
 
+        self._Metrics.stop("NodeLookup", start)
         return node
 
     #
-    # Perform a provisioning
+    # Perform a provisioning, the request is queued and performed in background
     # @param node  
     #        
     async def do_provisioning(self, node):
         if node is None:
             raise Exception("Invalid node parameter")
         
+        # local mode, there is no cloud to provision
+        if self._Provisioning is None:
+            return
+
+        start = self._Metrics.start()
         try:
-            if node["Provisioned"] <= 0:
+            if node.Provisioned <= 0 and not self._Provisioning.is_pending(node.UID):
                 # get the configuration node (refere to json config file)
-                node_config = self.get_node_config(node["UID"])
+                node_config = self.get_node_config(node)
+                if node_config is None or not node_config.get("Provisioning"):
+                    raise Exception("no provisioning configuration for uid " + node.UID)
 
-                # performing provisioning
-                await self._Inference.node_provisioning(node_config["Provisioning"])
-                node["Provisioned"] = 1
+                # request the provisioning, the result is notified to provisioning_done
+                self._Provisioning.request(node.UID, node_config["Provisioning"])
 
         except Exception as ex:
-            self._Logger.error("provisioning error: " + str(ex))
-            node["Provisioned"] = -1
+            self._HotLog.error("ProvisioningError", "provisioning error: %s", ex)
+            node.Provisioned = -1
+        self._Metrics.stop("DoProvisioning", start)
+
+    #
+    # Perform the provisioning of a node through the identity translation (called by the provisioning queue)
+    # @param config provisioning configuration of the node
+    #
+    async def provision_node(self, config):
+        start = self._Metrics.start()
+        try:
+            await self._Inference.node_provisioning(config)
+        finally:
+            self._Metrics.stop("ProvisioningCall", start)
+
+    #
+    # Provisioning result, the updates buffered during the provisioning are sent or discarded
+    # @param uid  
+    # @param success  
+    #        
+    def provisioning_done(self, uid, success):
+        pending = self._PendingUpdates.pop(uid, None)
+        node = self.find_node_by_uid(uid)
+        if node is None:
+            return
+
+        node.Provisioned = 1 if success else -1
+        # the buffered updates are discarded, the next report after a new provisioning is a full state
+        if not success and not self._DeltaFilter is None:
+            self._DeltaFilter.forget(uid)
+        self.save_node(node)
+        self.mark_node_dirty(node)
+        self.log_dirty_nodes()
+        if success and not pending is None:
+            asyncio.ensure_future(self._send_pending_updates(node, pending))
+
+    #
+    # Send the updates buffered during the provisioning
+    # @param node  
+    # @param pending  
+    #        
+    async def _send_pending_updates(self, node, pending):
+        for node_update in pending:
+            await self.send_msg_to_node(node, node_update)
+
+    #
+    # Forward a node update to the cloud, during the provisioning the update is buffered
+    # @param node  
+    # @param node_update  
+    # @param use_delta (optional) False to send the update without the change-only filter
+    #        
+    async def forward_update(self, node, node_update, use_delta = True):
+        if node_update is None:
+            return
+
+        in_provisioning = not self._Provisioning is None and self._Provisioning.is_pending(node.UID)
+        if node.Provisioned != 1 and not in_provisioning:
+            return
+
+        # only the changed fields are reported, the update is discarded if nothing is changed
+        if use_delta and not self._DeltaFilter is None:
+            node_update = self._DeltaFilter.filter(node, node_update)
+            if node_update is None:
+                return
+
+        if node.Provisioned == 1:
+            await self.send_msg_to_node(node, node_update)
+        else:
+            pending = self._PendingUpdates.get(node.UID)
+            if pending is None:
+                pending = deque(maxlen=self._Config["Provisioning"].get("MaxPending", MAX_PENDING_DEF))
+                self._PendingUpdates[node.UID] = pending
+            # the update is a copy of the node values, it is not changed by the next packets
+            pending.append(node_update)
 
     #
     # Send a message node to the cloud
     # @param node  
-    # @param message  
+    # @param message dictionary with the node update
     #
     async def send_msg_to_node(self, node, message):
         if node is None:
             raise Exception("Invalid node parameter")
 
-        if message == "":
+        if not message:
             return 
 
+        start = self._Metrics.start()
         try:
             # get the configuration node (refere to json config file)
-            node_config = self.get_node_config(node["UID"])
+            node_config = self.get_node_config(node)
             if node_config is None:
                 return
 
@@ -556,11 +1159,15 @@ class GWApp():
             device_physical_id = node_config["Provisioning"]["device_physical_id"]
             out_ch = CHANNEL_IDNTRX
 
-            self._Logger.info("Sending data... message: '" + str(device_message) + "' output: " + out_ch)
-            await self._Inference.node_send_message(device_physical_id, device_message, out_ch)
+            self._HotLog.debug("Send", "Sending data... message: '%s' output: %s", device_message, out_ch)
+            if not self._BatchSender is None:
+                await self._BatchSender.node_send_message(device_physical_id, device_message, out_ch)
+            else:
+                await self._Inference.node_send_message(device_physical_id, device_message, out_ch)
         except Exception as ex:
-            self._Logger.error("send_msg_to_node error: " + str(ex))
+            self._HotLog.error("SendError", "send_msg_to_node error: %s", ex)
             pass
+        self._Metrics.stop("Send", start)
 
     # check the validity of a UID
     def check_uid(self, uid):
@@ -571,42 +1178,15 @@ class GWApp():
 #endregion
 
     #
-    # Decode a line containing a completed json
-    # @param json_line  
+    # Decode a line containing a completed json, each packet type is dispatched to its handler
+    # @param json_line bytes (or str)
     #
     async def data_decode(self, json_line):
-        self._Logger.info("Decode line '" + (json_line) + "'")
-
-        try:
-            # decode the json
-            json_obj = json.loads(json_line)
-
-            # retrieve the 
-            epoch = 0
-            try:
-                if "Epoch" in json_obj:
-                    epoch = int(json_obj["Epoch"])
-            except:
-                epoch = -1
-
-            if "DevSts" in json_obj:
-                payload = json_obj["DevSts"]
-                await self.manage_node_packet(payload, epoch)
-
-            if "ZbNet" in json_obj:
-                payload = json_obj["ZbNet"]
-                await self.manage_network_packet(payload, epoch)
-
-            if "DevFw" in json_obj:
-                payload = json_obj["DevFw"]
-                await self.manage_sys_fw_packet(payload, epoch)
-
-            if "DevRtc" in json_obj:
-                payload = json_obj["DevRtc"]
-                await self.manage_sys_rtc_packet(payload, epoch)
-
-        except json.JSONDecodeError as json_ex:
-            self._Logger.error("Data decode json error: " + str(json_ex))
+        self._Logger.debug("Decode line %r", json_line)
+        start = self._Metrics.start()
+        ret = await self._Decoder.decode(json_line)
+        self._Metrics.stop("DataDecode", start)
+        return ret
             
     #
     # decode and manage node packet
@@ -614,7 +1194,7 @@ class GWApp():
     # @param epoch (optional) 
     #
     async def manage_node_packet(self, data, epoch = -1):
-        self._Logger.info("Node data decoding")
+        self._Logger.debug("Node data decoding")
         try:
             node_to_cloud = None
             node = None
@@ -629,35 +1209,49 @@ class GWApp():
                 addr = data["ZbAddr"]
 
             node = self.get_node(uid, addr)
-            if not node is None: uid = node["UID"]
+            if not node is None: uid = node.UID
 
             # check uid validity
             if not self.check_uid(uid):
                 raise Exception("Invalid uid found for the node data package", uid)
 
+            samples = None
             if node is None: 
                 #we have a new node to add to the list
-                node = self.create_node_with_data_packet(uid, data, len(self._Nodes), epoch)
+                node = self.create_node_with_data_packet(uid, data, self.allocate_node_id(), epoch)
                 if not node is None:
-                    self._Nodes.update({uid: node})
-                    self._DataLogger.log_network(self._Nodes)
-                    node_to_cloud = node
+                    self.add_node(node)
+                    node_to_cloud = node.to_dict()
+                    # the fields of the node not in the packet are the default values, not samples
+                    samples = data
             else:
                 #known node, update data
                 node_to_cloud = self.update_node_with_data_packet(node, data, epoch)
 
             if not node is None: 
-                self._DataLogger.node(node)
-
-                self._Logger.info("Node info uid:'" + uid + "' address:'" + node["Address"] + "' name:'" + node["Name"] + "' out:'" + str(node_to_cloud)+"'")
+                self._NodesLastSeen[uid] = time.monotonic()
+                # the network log is generated for a new node or a change of address or parent
+                if self.update_topology(node):
+                    self._DataLogger.network(self._Nodes, self._Topology)
+                self.save_node(node)
+                self.mark_node_dirty(node)
+                if not node_to_cloud is None:
+                    self._DataLogger.node_event(uid, node_to_cloud, epoch)
+
+                self._HotLog.info("NodeInfo", "Node info uid:'%s' address:'%s' name:'%s' out:'%s'", uid, node.Address, node.Name, node_to_cloud)
                 await self.do_provisioning(node)
 
+                # the aggregated fields are sent at the end of the window
+                if not self._Aggregator is None and not node_to_cloud is None:
+                    node_to_cloud = self._Aggregator.add(uid, node_to_cloud, samples)
+
                 #send only the update
-                if not node_to_cloud is None and node["Provisioned"] == 1:
-                    await self.send_msg_to_node(node, str(node_to_cloud))
+                await self.forward_update(node, node_to_cloud)
+
+            self.log_dirty_nodes()
                     
         except Exception as ex:
-            self._Logger.error("manage data packet: " + str(ex))
+            self._HotLog.error("DataPacketError", "manage data packet: %s", ex)
 
     #
     # decode and manage network packet
@@ -665,56 +1259,125 @@ class GWApp():
     # @param epoch (optional) 
     #
     async def manage_network_packet(self, data, epoch = -1):
-        self._Logger.info("Network data decoding")
+        self._Logger.debug("Network data decoding")
         try:
+            self._DataLogger.network_event(data, epoch)
+
             #get list devices
             data_nodes = data["Devices"]
-            for data_node in data_nodes:
-                node_to_cloud = None
-                node = None
-                uid = ""
-                addr = ""
-
-                # collect node identification, priority: UID, ZbAddr
-                if "UID" in data_node:
-                    uid = data_node["UID"]
+            if self._NetworkDiff is None:
+                changed = data_nodes
+                departed = []
+            else:
+                # only the added and changed entries are processed, the unchanged nodes are only seen
+                # and the provisioning of the nodes not yet provisioned is retried
+                changed, unchanged, departed = self._NetworkDiff.diff(data_nodes)
+                now = time.monotonic()
+                for data_node in unchanged:
+                    uid = data_node.get("UID", "")
+                    node = self._Nodes.get(uid) if uid != "" else self.find_node_by_address(data_node.get("ZbAddr", ""))
+                    if not node is None:
+                        self._NodesLastSeen[node.UID] = now
+                        if node.Provisioned <= 0:
+                            await self.do_provisioning(node)
 
-                if "ZbAddr" in data_node:
-                    addr = data_node["ZbAddr"]
+            for data_node in changed:
+                await self.manage_network_device(data_node, epoch)
 
-                node = self.get_node(uid, addr)
-                if not node is None: uid = node["UID"]
+            for data_node in departed:
+                await self.manage_node_departure(data_node, epoch)
 
-                # check uid validity
-                if not self.check_uid(uid):
-                    raise Exception("Invalid uid found for the node data package", uid)
+            # only the nodes changed by the packet are logged again
+            if len(changed) > 0 or len(departed) > 0:
+                self._DataLogger.network(self._Nodes, self._Topology)
+                self.log_dirty_nodes()
 
-                if node is None: 
-                    # new node
-                    node = self.create_node_with_network_packet(uid, data_node, len(self._Nodes), epoch)
-                    if not node is None:
-                        self._Nodes.update({uid: node})
-                        node_to_cloud = node
-                else:
-                    # known node, update data
-                    node_to_cloud = self.update_node_with_network_packet(node, data_node, epoch)
+        except Exception as ex:
+            # the entries not processed must not be skipped by the next packet
+            if not self._NetworkDiff is None:
+                self._NetworkDiff.reset()
+            self._HotLog.error("NetworkPacketError", "manage network packet: %s", ex)
+            pass
 
-                if not node is None: 
-                    self._DataLogger.node(node)
+    #
+    # manage a device entry of a network packet
+    # @param data_node  
+    # @param epoch (optional) 
+    #
+    async def manage_network_device(self, data_node, epoch = -1):
+        node_to_cloud = None
+        node = None
+        uid = ""
+        addr = ""
+
+        # collect node identification, priority: UID, ZbAddr
+        if "UID" in data_node:
+            uid = data_node["UID"]
+
+        if "ZbAddr" in data_node:
+            addr = data_node["ZbAddr"]
+
+        node = self.get_node(uid, addr)
+        if not node is None: uid = node.UID
+
+        # check uid validity
+        if not self.check_uid(uid):
+            raise Exception("Invalid uid found for the node data package", uid)
+
+        if node is None: 
+            # new node
+            node = self.create_node_with_network_packet(uid, data_node, self.allocate_node_id(), epoch)
+            if not node is None:
+                self.add_node(node)
+                node_to_cloud = node.to_dict()
+        else:
+            # known node, update data
+            node_to_cloud = self.update_node_with_network_packet(node, data_node, epoch)
+
+        if not node is None: 
+            self._NodesLastSeen[uid] = time.monotonic()
+            self.update_topology(node)
+            self.save_node(node)
+            self.mark_node_dirty(node)
+            if not node_to_cloud is None:
+                self._DataLogger.node_event(uid, node_to_cloud, epoch)
+
+            self._HotLog.info("NodeInfo", "Node info uid:'%s' address:'%s' name:'%s' out:'%s'", uid, node.Address, node.Name, node_to_cloud)
+            await self.do_provisioning(node)
+
+            #send only the update
+            await self.forward_update(node, node_to_cloud)
 
-                    self._Logger.info("Node info uid:'" + uid + "' address:'" + node["Address"] + "' name:'" + node["Name"] + "' out:'" + str(node_to_cloud)+"'")
-                    await self.do_provisioning(node)
+    #
+    # manage a device missing in a network packet: the node leaves the topology, its state is
+    # set to NODE_STATE_DEPARTED and the departure is journaled and sent to the cloud
+    # @param data_node last entry of the device
+    # @param epoch (optional) 
+    #
+    async def manage_node_departure(self, data_node, epoch = -1):
+        uid = data_node.get("UID", "")
+        if uid != "":
+            node = self.find_node_by_uid(uid)
+        else:
+            node = self.find_node_by_address(data_node.get("ZbAddr", ""))
+        if node is None:
+            return
 
-                    #send only the update
-                    if not node_to_cloud is None and node["Provisioned"] == 1:
-                        await self.send_msg_to_node(node, str(node_to_cloud))
+        uid = node.UID
+        node.Epoch = epoch
+        node.State = NODE_STATE_DEPARTED
+        self._Topology.remove(uid)
+        self.save_node(node)
+        self.mark_node_dirty(node)
 
-            self._DataLogger.network(self._Nodes)
-            self._DataLogger.all_nodes(self._Nodes)
+        node_to_cloud = {"UID": uid, "Epoch": epoch, "State": node.State}
+        self._DataLogger.node_event(uid, {"UID": uid, "Event": "Departed", "State": node.State}, epoch)
+        self._HotLog.info("NodeDeparted", "Node departed uid:'%s' address:'%s'", uid, node.Address)
 
-        except Exception as ex:
-            self._Logger.error("manage network packet: " + str(ex))            
-            pass
+        # the departure is always reported, the next report after a rejoin is a full state
+        await self.forward_update(node, node_to_cloud, False)
+        if not self._DeltaFilter is None:
+            self._DeltaFilter.forget(uid)
 
     #
     # decode and manage system firmware packet
@@ -722,8 +1385,7 @@ class GWApp():
     # @param epoch (optional) 
     #
     async def manage_sys_fw_packet(self, data, epoch = -1):
-        self._Logger.info("Firmware")
-        self._Logger.warning("no implementation")
+        self._HotLog.warning("DevFw", "Firmware packet: no implementation")
 
     #
     # decode and manage system RTC packet
@@ -731,16 +1393,9 @@ class GWApp():
     # @param epoch (optional) 
     #
     async def manage_sys_rtc_packet(self, data, epoch = -1):
-        self._Logger.info("RTC")
-        self._Logger.warning("no implementation")
+        self._HotLog.warning("DevRtc", "RTC packet: no implementation")
 
 #region Handlers
-    #
-    # termination handler called by the system
-    #
-    def termination_handler(self):
-        self._Logger.info(APP_MODULE_NAME + " v" + APP_MODULE_VER + " terminated")
-
     #
     # handler of a received message
     # @param message incoming message from the serial port
@@ -756,49 +1411,109 @@ class GWApp():
                     serial_port_id = message.custom_properties["device_physical_id"]
 
 
-            # check if the stream exist
-            if not serial_port_id in self._DataSerialStreams:
-                #create the stream data for the serial port id
-                self._DataSerialStreams[serial_port_id] = ""
+            # retrieve the stream reassembler of the serial port
+            stream = self.get_serial_stream(serial_port_id)
 
             # select the default output
             out_ch = CHANNEL_IOTHUB
 
-            partial_str = message.data.decode('utf-8')
-            completed = partial_str[-1:] == "\n"
-            self._DataLogger.serial_stream_log(serial_port_id, ">>" + partial_str + "<< ")
-            self._Logger.info("incoming message on port '" + serial_port_id + "' -  completed " + str(completed) + " '" +  partial_str[-1:] + "'")
-
-            # accumulate the received data
-            self._DataSerialStreams[serial_port_id] += partial_str
+            data = message.data
+            if isinstance(data, str):
+                data = data.encode("utf-8")
 
-            # convert the stream in a array respect the \n key
-            stream_lines = self._DataSerialStreams[serial_port_id].splitlines()
-            
-            # remove the accumulated stream data
-            self._DataSerialStreams[serial_port_id] = ""
+            # the text record is built only if the serial log is enabled
+            if self._DataLogger.SerialLogEnabled:
+                if self._DataLogger.SerialFormat == capture.FORMAT_BINARY:
+                    self._DataLogger.serial_capture(serial_port_id, data)
+                else:
+                    self._DataLogger.serial_stream_log(serial_port_id, capture.text_record(stream.decode_chunk(data)))
+            self._HotLog.debug("Incoming", "incoming message on port '%s' - %d bytes", serial_port_id, len(data))
+
+            # accumulate the received data and collect only the completed lines
+            start = self._Metrics.start()
+            stream_lines = stream.feed(data)
+            self._Metrics.stop("Reassembly", start)
+            self._Metrics.count("Chunks")
+
+            # queue the lines for the worker of the port
+            if not self._Ingress is None:
+                for stream_line in stream_lines:
+                    await self._Ingress.put(serial_port_id, stream_line)
+                return
 
-            # decode each line
+            # decode each line, in case of error discard the line
             for stream_line in stream_lines:
-                self._Logger.info("stream: '" + stream_line + "'")
-                if completed:
-                    # try to decode in case of error discard the line
-                    try:
-                        await self.data_decode(str(stream_line))
-                    except:
-                        pass
-                else:
-                    self._DataSerialStreams[serial_port_id] = stream_line
-                    break
+                try:
+                    await self.data_decode(stream_line)
+                except:
+                    pass
 
         except Exception as ex:
-            self._Logger.error("received serial stream: " + str(ex))
+            self._HotLog.error("StreamError", "received serial stream: %s", ex)
             pass
+
+    #
+    # process a line queued by the ingress, called by the worker of the serial port
+    # @param serial_port_id
+    # @param line
+    #
+    async def process_line(self, serial_port_id, line):
+        await self.data_decode(line)
+
+    #
+    # wait until the queued lines are processed
+    #
+    async def drain(self):
+        if not self._Ingress is None:
+            await self._Ingress.join()
+
+    #
+    # get the stream reassembler of a serial port, creating it at the first use
+    # @param serial_port_id
+    #
+    def get_serial_stream(self, serial_port_id):
+        stream = self._DataSerialStreams.get(serial_port_id)
+        if stream is None:
+            max_line_length = self._Config["SerialStream"].get("MaxLineLength", serial_stream.SerialStreamReassembler.MAX_LINE_LENGTH_DEF)
+            stream = serial_stream.SerialStreamReassembler(max_line_length)
+            self._DataSerialStreams[serial_port_id] = stream
+        return stream
+
     #
     # handler of a received message
     # @param method_request incoming method_request from the iot hub
     #
     async def method_request_received_handler(self, method_request):
-            self._Logger.error("method_request_received_handler not implemented: Name:" + method_request.name + " Payload:" + method_request.payload + " method_request:" + method_request)
+        handler = self._Methods.get(method_request.name)
+        if handler is None:
+            self._Logger.warning("direct method not implemented: " + str(method_request.name))
+            status = 404
+            payload = {"error": "method " + str(method_request.name) + " not implemented"}
+        else:
+            try:
+                status = 200
+                payload = handler(method_request.payload)
+            except Exception as ex:
+                self._Logger.error("direct method " + method_request.name + ": " + str(ex))
+                status = 500
+                payload = {"error": str(ex)}
+
+        if self._Client is None:
+            return
+        try:
+            response = MethodResponse.create_from_method_request(method_request, status, payload)
+            await self._Client.send_method_response(response)
+        except Exception as ex:
+            self._Logger.error("direct method response: " + str(ex))
+
+    #
+    # direct method get_metrics, return the metrics snapshot
+    # @param payload (optional) {"Reset": true} to clear the timers and the recorded counters after the snapshot
+    #
+    def method_get_metrics(self, payload):
+        snapshot = self.metrics
+        if isinstance(payload, dict) and payload.get("Reset", False):
+            self._Metrics.reset()
+        return snapshot
 
 #endregion
@@ -0,0 +1,165 @@
+#!/usr/bin/python3
+#
+# File:    hotlog.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Level configuration and rate limited logging of the per packet paths
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+# The messages are formatted by the logging module only when they are emitted (lazy %-formatting),
+# each message key has a budget of Count messages per Interval seconds and can be sampled (1 out of Sample).
+# The suppressed messages of a key are reported with a single line when its interval expires.
+#
+
+import logging
+import time
+
+LEVEL_DEF       = "INFO"                # level of the root logger
+FORMAT_DEF      = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+RATE_LIMIT_DEF  = {"Count": 10, "Interval": 60, "Sample": 1}
+
+#
+# Numeric level of a level name (i.e. INFO) or number.
+# @param level
+#
+def level_of(level):
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    if not isinstance(value, int):
+        raise ValueError("unknown log level '" + str(level) + "'")
+    return value
+
+#
+# Apply the levels of the logging configuration, it can be called again to change them.
+# @param config {"Level": "INFO", "Loggers": {"name": "level"}}
+#
+def configure(config):
+    level, levels = validate(config)
+
+    # validated before any change
+    logging.getLogger().setLevel(level)
+    for name, value in levels.items():
+        logging.getLogger(name).setLevel(value)
+
+#
+# Check a logging configuration without applying it, return (root level, logger name -> level).
+# @param config {"Level":, "Loggers":, "RateLimit":, "Keys":}
+#
+def validate(config):
+    levels = {name: level_of(level) for name, level in config.get("Loggers", {}).items()}
+    level = level_of(config.get("Level", LEVEL_DEF))
+    limits = [config.get("RateLimit", {})] + list(config.get("Keys", {}).values())
+    for limit in limits:
+        for field in limit:
+            if not field in RATE_LIMIT_DEF or not isinstance(limit[field], (int, float)):
+                raise ValueError("invalid rate limit '" + str(field) + "'")
+    return level, levels
+
+class _KeyState():
+
+    __slots__ = ("Count", "Interval", "Sample", "Seen", "Logged", "Suppressed", "Start")
+
+    def __init__(self, config):
+        self.Count = config["Count"]            # messages logged per interval, 0 for no limit
+        self.Interval = config["Interval"]      # seconds
+        self.Sample = max(1, config["Sample"])  # 1 message out of Sample is considered
+        self.Seen = 0
+        self.Logged = 0
+        self.Suppressed = 0
+        self.Start = time.monotonic()
+
+class RateLimitedLogger():
+
+    #
+    # Constructor.
+    # @param logger
+    # @param config (optional) {"RateLimit": {"Count":, "Interval":, "Sample":}, "Keys": {"key": {...}}}
+    #
+    def __init__(self, logger, config = None):
+        self._Logger = logger
+        self.configure(config)
+
+        # metrics
+        self._Stats = {
+            "Sampled": 0,
+            "Suppressed": 0
+        }
+
+    @property
+    def stats(self):
+        return dict(self._Stats)
+
+    #
+    # Set the rate limits, the budgets of the keys start again.
+    # @param config (optional) {"RateLimit":, "Keys":}
+    #
+    def configure(self, config = None):
+        config = config if not config is None else {}
+        self._Default = dict(RATE_LIMIT_DEF)
+        self._Default.update(config.get("RateLimit", {}))
+        self._KeyConfigs = config.get("Keys", {})
+        self._Keys = {}                         # message key -> _KeyState
+
+    #
+    # Log a message of a key if the level is enabled and the key is within its budget, return true if logged.
+    # @param key message key, the budget is shared by the messages of the same key
+    # @param level
+    # @param msg format string
+    # @param args arguments of the format string
+    #
+    def log(self, key, level, msg, *args):
+        if not self._Logger.isEnabledFor(level):
+            return False
+
+        state = self._Keys.get(key)
+        if state is None:
+            config = dict(self._Default)
+            config.update(self._KeyConfigs.get(key, {}))
+            state = _KeyState(config)
+            self._Keys[key] = state
+
+        state.Seen += 1
+        if state.Sample > 1 and (state.Seen - 1) % state.Sample != 0:
+            self._Stats["Sampled"] += 1
+            return False
+
+        if state.Count <= 0:
+            self._Logger.log(level, msg, *args)
+            return True
+
+        now = time.monotonic()
+        if now - state.Start >= state.Interval:
+            if state.Suppressed > 0:
+                self._Logger.log(level, "%s: %d messages suppressed in the last %.0f s", key, state.Suppressed, now - state.Start)
+            state.Start = now
+            state.Logged = 0
+            state.Suppressed = 0
+
+        if state.Logged >= state.Count:
+            state.Suppressed += 1
+            self._Stats["Suppressed"] += 1
+            return False
+
+        state.Logged += 1
+        self._Logger.log(level, msg, *args)
+        return True
+
+    def debug(self, key, msg, *args):
+        return self.log(key, logging.DEBUG, msg, *args)
+
+    def info(self, key, msg, *args):
+        return self.log(key, logging.INFO, msg, *args)
+
+    def warning(self, key, msg, *args):
+        return self.log(key, logging.WARNING, msg, *args)
+
+    def error(self, key, msg, *args):
+        return self.log(key, logging.ERROR, msg, *args)
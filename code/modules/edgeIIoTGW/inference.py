@@ -15,21 +15,71 @@
 #
 
 from collections import OrderedDict
+import asyncio
+import itertools
+import json
 import logging
 import time
 import uuid
 import os
 
+# application modules
+import decoder
+import provisioning
+
 #azure modules
 from azure.iot.device import Message
 
+# faster json backend selected by the decoder, the standard library is used otherwise
+_fast_dumps = decoder.json_dumps
+
+CONTENT_ENCODING = "utf-8"
+CONTENT_TYPE     = "application/json"
+
+#
+# Encode the payload of a message in json bytes, bytes and str are considered already encoded.
+# @param payload
+#
+def encode_payload(payload):
+    if isinstance(payload, bytes):
+        return payload
+    if isinstance(payload, str):
+        return payload.encode(CONTENT_ENCODING)
+    if not _fast_dumps is None:
+        try:
+            return _fast_dumps(payload)
+        except TypeError:
+            # i.e. not str keys, the standard library is more tolerant
+            pass
+    return json.dumps(payload, separators=(",", ":")).encode(CONTENT_ENCODING)
+
 class Inference():
 
     #
     # Constructor.
+    # @param module_client
+    # @param message_spool (optional) spool.MessageSpool storing the messages not sent
     #
-    def __init__(self, module_client):
+    def __init__(self, module_client, message_spool = None):
         self._module_client = module_client
+        self._Spool = message_spool
+        self._Offline = False                   # last send failed, the messages are spooled
+
+        # message id: random prefix of the module instance and counter
+        self._MessageIdPrefix = uuid.uuid4().hex[:12] + "-"
+        self._MessageCounter = itertools.count(1)
+        self._CustomProperties = {}             # device_physical_id -> custom properties of its messages
+
+        # metrics
+        self._Stats = {
+            "Messages": 0,
+            "Bytes": 0,
+            "Errors": 0
+        }
+
+    @property
+    def stats(self):
+        return dict(self._Stats)
 
     #
     # Set method parameters.
@@ -65,17 +115,21 @@ class Inference():
 
     #
     # Create message.
+    # @param device_physical_id
+    # @param payload json bytes
     #
-    def _create_message(self, device_physical_id, message):
+    def _create_message(self, device_physical_id, payload):
 
         # Creating PnP message.
-        new_message = Message(message)
-        new_message.id = uuid.uuid4()
-        new_message.content_encoding = "utf-8"
-        new_message.content_type = "application/json"
-        
+        new_message = Message(payload, self._MessageIdPrefix + str(next(self._MessageCounter)), CONTENT_ENCODING, CONTENT_TYPE)
+
         # Adding device identifier (this is required by the Identity Translation Module to translate identity).
-        new_message.custom_properties["device_physical_id"] = device_physical_id
+        # The properties are built once for each device, the message gets its own copy.
+        properties = self._CustomProperties.get(device_physical_id)
+        if properties is None:
+            properties = {"device_physical_id": device_physical_id}
+            self._CustomProperties[device_physical_id] = properties
+        new_message.custom_properties = dict(properties)
 
         return new_message
 
@@ -87,10 +141,9 @@ class Inference():
     #
     async def node_provisioning(self, node):
         try:
-            activity = "Provisioning node device ... " + node["device_id"]
             module_id = "edgeIdentityTranslation"
             method_name = "provision_leaf_device"
-            logging.getLogger(__name__).info(activity, module_id, method_name)
+            logging.getLogger(__name__).info("Provisioning node device ... %s (%s.%s)", node["device_id"], module_id, method_name)
 
             # Keeping the first device by default.
             payload = dict()
@@ -113,26 +166,106 @@ class Inference():
         except Exception as e:
             raise e
         
-    async def set_nodes(self, nodes):
-        ex = None
-        for node in nodes:
+    #
+    # Provisioning of a list of nodes through a bounded provisioning queue, the first error is raised.
+    #
+    # @param nodes list of node provisioning configuration.
+    # @param config (optional) configuration of the queue {"Concurrency":, "Backoff":, "BackoffMax":}
+    # @param max_retry (optional) number of retry after the first failure of a node
+    #
+    async def set_nodes(self, nodes, config = None, max_retry = 0):
+        errors = {}                             # device_physical_id -> last error
+        failed = []
+
+        async def provision(node):
             try:
-                self.node_provisioning(node)
-            except Exception as ex_local:
-                if ex is None:
-                    ex = ex_local
+                await self.node_provisioning(node)
+            except Exception as ex:
+                errors[node.get("device_physical_id")] = ex
+                raise
+
+        def done(uid, success):
+            if not success:
+                failed.append(uid)
+
+        # a node listed twice is provisioned once
+        queue = provisioning.ProvisioningQueue(provision, max_retry, config, done)
+        for node in nodes:
+            queue.request(node.get("device_physical_id"), node)
+        await queue.join()
 
         #notify only the first exception
-        if not ex is None:
-            raise ex
+        if len(failed) > 0:
+            raise errors[failed[0]]
 
+    #
+    # Send a message of a node through the identity translation.
+    #
+    # @param node_uuid device_physical_id of the node.
+    # @param message dictionary (or list) encoded in json, str and bytes are sent as they are.
+    # @param output_channel
+    #
     async def node_send_message(self, node_uuid, message, output_channel):
+        payload = encode_payload(message)
+
+        # a device with spooled messages sends the new ones after them
+        if not self._Spool is None and self._Spool.is_pending(node_uuid):
+            if not self._Spool.put(node_uuid, output_channel, payload):
+                raise Exception("message of " + str(node_uuid) + " rejected by the spool")
+            return None
+
+        try:
+            return await self._send(node_uuid, payload, output_channel)
+        except Exception as e:
+            if self._Spool is None or not self._Spool.put(node_uuid, output_channel, payload):
+                raise e
+            if not self._Offline:
+                self._Offline = True
+                logging.getLogger(__name__).warning("Cloud send failed, the messages are spooled: %s", e)
+            return None
+
+    #
+    # Send the spooled messages in order, up to the drain rate of the spool for an interval.
+    # The replay stops at the first failure, the message is retried at the next drain.
+    #
+    # @param interval seconds since the previous drain.
+    #
+    async def drain_spool(self, interval):
+        if self._Spool is None:
+            return 0
+
+        self._Spool.purge()
+        sent = 0
+        for message_id, device, channel, payload in self._Spool.peek(max(1, int(self._Spool.DrainRate * interval))):
+            try:
+                await self._send(device, payload, channel)
+            except Exception as e:
+                logging.getLogger(__name__).debug("Spool replay failed: %s", e)
+                return sent
+            self._Spool.remove(message_id, device, len(payload))
+            sent += 1
+
+        if self._Offline and self._Spool.count == 0:
+            self._Offline = False
+            logging.getLogger(__name__).warning("Spool drained, the messages are sent again")
+        return sent
+
+    #
+    # Send a json payload.
+    #
+    # @param node_uuid device_physical_id of the node.
+    # @param payload json bytes
+    # @param output_channel
+    #
+    async def _send(self, node_uuid, payload, output_channel):
         try:
-            _msg = self._create_message(node_uuid, message)
-            # logging.getLogger(__name__).info("\n\n", _msg, "\n\n")
+            _msg = self._create_message(node_uuid, payload)
             await self._module_client.send_message_to_output(_msg, output_channel)
+            self._Stats["Messages"] += 1
+            self._Stats["Bytes"] += len(payload)
             return _msg
 
         except Exception as e:
+            self._Stats["Errors"] += 1
             raise e
  
\ No newline at end of file
@@ -0,0 +1,223 @@
+#!/usr/bin/python3
+#
+# File:    ingress.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Bounded ingress queues of the serial lines with a worker for each serial port
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+# The message handler only reassembles the lines and queues them, the worker of the serial port
+# processes its queue in order. When a queue is full the overflow policy is applied:
+#   DropOldest  the oldest queued line is discarded
+#   Conflate    a queued line of the same node (UID) or a queued ZbNet packet is replaced by the new one,
+#               the oldest line is discarded if there is nothing to replace
+#   Block       the handler waits for a free place (backpressure on the message handler)
+#
+
+import asyncio
+import collections
+import logging
+import re
+
+POLICY_DROP_OLDEST = "DropOldest"
+POLICY_CONFLATE    = "Conflate"
+POLICY_BLOCK       = "Block"
+
+POLICIES = (POLICY_DROP_OLDEST, POLICY_CONFLATE, POLICY_BLOCK)
+
+NETWORK_KEY = "ZbNet"
+NETWORK_TAG = b'"ZbNet"'
+UID_PATTERN = re.compile(rb'"UID"\s*:\s*"([^"]*)"')
+
+#
+# Conflation key of a line without parsing it: ZbNet for the network packets, the UID for the node packets,
+# None if the line cannot be conflated.
+# @param line bytes
+#
+def conflation_key(line):
+    if NETWORK_TAG in line:
+        return NETWORK_KEY
+    match = UID_PATTERN.search(line)
+    if match is None:
+        return None
+    return match.group(1)
+
+class _PortQueue():
+
+    def __init__(self):
+        self.Frames = collections.deque()       # [conflation key, line, metrics start]
+        self.Keys = {}                          # conflation key -> queued frame
+        self.NotEmpty = asyncio.Event()
+        self.NotFull = asyncio.Event()
+        self.Idle = asyncio.Event()             # nothing queued or in progress
+        self.NotFull.set()
+        self.Idle.set()
+        self.Worker = None                      # task of the worker, None when stopped
+
+        # metrics
+        self.Stats = {
+            "Enqueued": 0,
+            "Processed": 0,
+            "Dropped": 0,
+            "Conflated": 0,
+            "Blocked": 0,
+            "Errors": 0,
+            "MaxDepth": 0
+        }
+
+class Ingress():
+
+    MAX_DEPTH_DEF = 256                         # max number of queued lines of a serial port
+    POLICY_DEF    = POLICY_DROP_OLDEST
+
+    _Logger = logging.getLogger(__name__)
+
+    #
+    # Constructor.
+    # @param process coroutine function(serial port, line) processing a line
+    # @param config (optional) {"MaxDepth":, "Policy": "DropOldest"|"Conflate"|"Block"}
+    # @param pipeline_metrics (optional) metrics.Metrics recording the queue wait time
+    #
+    def __init__(self, process, config = None, pipeline_metrics = None):
+        config = config if not config is None else {}
+        self._Process = process
+        self._MaxDepth = max(1, config.get("MaxDepth", self.MAX_DEPTH_DEF))
+        self._Policy = config.get("Policy", self.POLICY_DEF)
+        if not self._Policy in POLICIES:
+            self._Logger.error("Ingress policy '%s' unknown, %s is used", self._Policy, self.POLICY_DEF)
+            self._Policy = self.POLICY_DEF
+        self._Metrics = pipeline_metrics
+        self._Queues = {}                       # serial port -> _PortQueue
+
+    @property
+    def Policy(self):
+        return self._Policy
+
+    @property
+    def stats(self):
+        ports = {}
+        for port in list(self._Queues):
+            queue = self._Queues[port]
+            ports[port] = dict(queue.Stats)
+            ports[port]["Depth"] = len(queue.Frames)
+        return {"Policy": self._Policy, "Capacity": self._MaxDepth, "Ports": ports}
+
+    #
+    # Sum of a counter of all the serial ports.
+    # @param name (i.e. Dropped)
+    #
+    def total(self, name):
+        return sum(queue.Stats[name] for queue in list(self._Queues.values()))
+
+    #
+    # Queue a line of a serial port, the worker of the port is started at the first line.
+    # @param port serial port
+    # @param line bytes
+    #
+    async def put(self, port, line):
+        queue = self._Queues.get(port)
+        if queue is None:
+            queue = _PortQueue()
+            self._Queues[port] = queue
+        if queue.Worker is None:
+            queue.Worker = asyncio.ensure_future(self._worker(port, queue))
+
+        key = None
+        if self._Policy == POLICY_CONFLATE:
+            key = conflation_key(line)
+
+        if len(queue.Frames) >= self._MaxDepth:
+            frame = queue.Keys.get(key) if not key is None else None
+            if not frame is None:
+                # the queued line keeps its position, only the content is replaced
+                frame[1] = line
+                queue.Stats["Conflated"] += 1
+                return
+
+            if self._Policy == POLICY_BLOCK:
+                queue.Stats["Blocked"] += 1
+                while len(queue.Frames) >= self._MaxDepth:
+                    queue.NotFull.clear()
+                    await queue.NotFull.wait()
+            else:
+                self._pop(queue)
+                queue.Stats["Dropped"] += 1
+
+        frame = [key, line, self._Metrics.start() if not self._Metrics is None else None]
+        queue.Frames.append(frame)
+        if not key is None:
+            queue.Keys[key] = frame
+        queue.Stats["Enqueued"] += 1
+        if len(queue.Frames) > queue.Stats["MaxDepth"]:
+            queue.Stats["MaxDepth"] = len(queue.Frames)
+        queue.Idle.clear()
+        queue.NotEmpty.set()
+
+    #
+    # Remove the oldest frame of a queue.
+    # @param queue
+    #
+    def _pop(self, queue):
+        frame = queue.Frames.popleft()
+        if not frame[0] is None and queue.Keys.get(frame[0]) is frame:
+            del queue.Keys[frame[0]]
+        queue.NotFull.set()
+        return frame
+
+    #
+    # Process the lines of a serial port in order.
+    # @param port
+    # @param queue
+    #
+    async def _worker(self, port, queue):
+        while True:
+            while len(queue.Frames) == 0:
+                queue.Idle.set()
+                queue.NotEmpty.clear()
+                await queue.NotEmpty.wait()
+
+            frame = self._pop(queue)
+            if not self._Metrics is None:
+                self._Metrics.stop("IngressWait", frame[2])
+            try:
+                await self._Process(port, frame[1])
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                queue.Stats["Errors"] += 1
+                self._Logger.error("ingress port '%s': %s", port, ex)
+            queue.Stats["Processed"] += 1
+
+    #
+    # Wait until all the queued lines are processed.
+    #
+    async def join(self):
+        while True:
+            queues = [queue for queue in list(self._Queues.values()) if not queue.Idle.is_set()]
+            if len(queues) == 0:
+                return
+            for queue in queues:
+                await queue.Idle.wait()
+
+    #
+    # Stop the workers, they are started again by the next line of their port.
+    # @param drain (optional) process the queued lines before stopping
+    #
+    async def stop(self, drain = True):
+        if drain:
+            await self.join()
+        workers = []
+        for queue in list(self._Queues.values()):
+            if not queue.Worker is None:
+                workers.append(queue.Worker)
+                queue.Worker.cancel()
+                queue.Worker = None
+        if len(workers) > 0:
+            await asyncio.gather(*workers, return_exceptions=True)
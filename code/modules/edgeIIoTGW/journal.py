@@ -0,0 +1,199 @@
+#!/usr/bin/python3
+#
+# File:    journal.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Append-only NDJSON time series journal (writer and reader)
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import argparse
+import calendar
+import json
+import os
+import sys
+import time
+
+PARTITION_HOUR = "Hour"
+PARTITION_DAY  = "Day"
+
+# partition -> (time format, partition length in seconds)
+PARTITIONS = {
+    PARTITION_HOUR: ("%Y%m%d%H", 3600),
+    PARTITION_DAY : ("%Y%m%d", 86400)
+}
+
+KIND_NODE    = "Node"
+KIND_NETWORK = "Network"
+
+TAG = "<tag>"
+FILENAME_DEF = "journal_" + TAG + ".ndjson"
+
+class JournalWriter():
+
+    BUFFER_SIZE = 65536
+
+    #
+    # Constructor.
+    # @param path folder of the journal files
+    # @param filename file name with the TAG placeholder replaced by the partition time
+    # @param partition (optional) PARTITION_HOUR or PARTITION_DAY
+    #
+    def __init__(self, path, filename = FILENAME_DEF, partition = PARTITION_HOUR):
+        if not partition in PARTITIONS:
+            raise Exception("Invalid journal partition " + str(partition))
+
+        self._Path = path
+        self._Filename = filename
+        self._TimeFormat = PARTITIONS[partition][0]
+        self._Partition = None
+        self._File = None
+        self.records = 0
+
+    #
+    # Append a record to the journal, the partition file is changed when the time moves to a new partition.
+    # @param kind KIND_NODE or KIND_NETWORK
+    # @param uid node uid (None for the network events)
+    # @param data
+    # @param epoch (optional) epoch of the packet
+    #
+    def append(self, kind, uid, data, epoch = -1):
+        ts = time.time()
+        partition = time.strftime(self._TimeFormat, time.gmtime(ts))
+        if partition != self._Partition:
+            self._open(partition)
+
+        record = {"Ts": round(ts, 3), "Epoch": epoch, "Kind": kind, "UID": uid, "Data": data}
+        self._File.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+        self.records += 1
+
+    #
+    # Flush the buffered records.
+    #
+    def flush(self):
+        if not self._File is None:
+            self._File.flush()
+
+    #
+    # Close the journal.
+    #
+    def close(self):
+        if not self._File is None:
+            self._File.close()
+        self._File = None
+        self._Partition = None
+
+    #
+    # Open the file of a partition.
+    # @param partition
+    #
+    def _open(self, partition):
+        self.close()
+        filename = os.path.join(self._Path, self._Filename.replace(TAG, partition))
+        self._File = open(filename, "ab", buffering=self.BUFFER_SIZE)
+        self._Partition = partition
+
+class JournalReader():
+
+    #
+    # Constructor.
+    # @param path folder of the journal files
+    # @param filename (optional) file name with the TAG placeholder
+    #
+    def __init__(self, path, filename = FILENAME_DEF):
+        self._Path = path
+        self._Prefix, self._Suffix = filename.split(TAG)
+
+    #
+    # List the partition files overlapping a time range, sorted by time.
+    # @param start (optional) unix time
+    # @param end (optional) unix time
+    #
+    def partitions(self, start = None, end = None):
+        files = []
+        for name in os.listdir(self._Path):
+            if not name.startswith(self._Prefix) or not name.endswith(self._Suffix):
+                continue
+
+            stamp = name[len(self._Prefix):len(name) - len(self._Suffix)]
+            bounds = self._partition_bounds(stamp)
+            if bounds is None:
+                continue
+            if not start is None and bounds[1] <= start:
+                continue
+            if not end is None and bounds[0] > end:
+                continue
+            files.append((bounds[0], os.path.join(self._Path, name)))
+
+        files.sort()
+        return [f for _, f in files]
+
+    #
+    # Stream the records of a time range, optionally filtered by node and kind.
+    # @param start (optional) unix time
+    # @param end (optional) unix time
+    # @param uid (optional)
+    # @param kind (optional)
+    #
+    def read(self, start = None, end = None, uid = None, kind = None):
+        for filename in self.partitions(start, end):
+            with open(filename, "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # truncated line
+                        continue
+                    if not start is None and record["Ts"] < start:
+                        continue
+                    if not end is None and record["Ts"] > end:
+                        continue
+                    if not uid is None and record["UID"] != uid:
+                        continue
+                    if not kind is None and record["Kind"] != kind:
+                        continue
+                    yield record
+
+    #
+    # Time range [start, end) of a partition name.
+    # @param stamp
+    #
+    def _partition_bounds(self, stamp):
+        for partition in PARTITIONS:
+            time_format, length = PARTITIONS[partition]
+            # the formats are only digits, the length selects the partition
+            if len(stamp) != len(time.strftime(time_format, time.gmtime(0))):
+                continue
+            try:
+                begin = calendar.timegm(time.strptime(stamp, time_format))
+                return (begin, begin + length)
+            except ValueError:
+                pass
+        return None
+
+#
+# Print the journal records on the standard output.
+#
+def main():
+    parser = argparse.ArgumentParser(description="Read the gateway journal")
+    parser.add_argument("path", help="journal folder (i.e. /app/log/)")
+    parser.add_argument("--filename", default="iiotgw_" + FILENAME_DEF, help="journal file name with the " + TAG + " placeholder")
+    parser.add_argument("--start", type=float, default=None, help="unix time")
+    parser.add_argument("--end", type=float, default=None, help="unix time")
+    parser.add_argument("--uid", default=None)
+    parser.add_argument("--kind", default=None, choices=[KIND_NODE, KIND_NETWORK])
+    args = parser.parse_args()
+
+    reader = JournalReader(args.path, args.filename)
+    for record in reader.read(args.start, args.end, args.uid, args.kind):
+        sys.stdout.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+if __name__ == "__main__":
+    main()
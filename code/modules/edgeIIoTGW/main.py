@@ -36,6 +36,7 @@ import uuid
 
 #application modules import
 import gw
+import hotlog
 
 #azure modules
 from azure.iot.device.aio import IoTHubModuleClient
@@ -55,7 +56,6 @@ def create_client():
 
     # Define function for handling received messages
     async def receive_message_handler(message):
-        print("message", message)
         if not IIoTEdgeGW is None:
             await IIoTEdgeGW.receive_message_handler(message)
 
@@ -79,32 +79,33 @@ def create_client():
     return client
 
 async def run_sample():
-    while True:
-        if not IIoTEdgeGW is None:
-            IIoTEdgeGW.run()
-        time.sleep(10)
+    # the periodic jobs run as asyncio tasks, so the message handlers are never blocked
+    if not IIoTEdgeGW is None:
+        IIoTEdgeGW.start()
+
+    while not stop_event.is_set():
+        await asyncio.sleep(1)
 
 def main():
     global IIoTEdgeGW
+    # the levels are set by the GWApp from the Logging section of config_app.json
+    logging.basicConfig(format=hotlog.FORMAT_DEF, level=hotlog.LEVEL_DEF)
     logger = logging.getLogger(__name__)
-    logger.setLevel(logging.INFO)
 
-    print ("Sys.version", sys.version)
+    logger.info("Sys.version %s", sys.version)
     if not sys.version >= "3.5.3":
         raise Exception( "The sample requires python 3.5.3+. Current version of Python: %s" % sys.version )
-    logger.info("Application info:" + gw.APP_MODULE_NAME + " v" + gw.APP_MODULE_VER + "")
+    logger.info("Application info:%s v%s", gw.APP_MODULE_NAME, gw.APP_MODULE_VER)
 
     # NOTE: Client is implicitly connected due to the handler being set on it
-    print("Client")
     client = create_client()
 
     if client is None:
         logger.info("Local mode (no client)")
 
     # Define a handler to cleanup when module is is terminated by Edge
+    # only the stop is requested here, the logs are drained by the shutdown of the gateway
     def module_termination_handler(signal, frame):
-        if not IIoTEdgeGW is None:
-            IIoTEdgeGW.termination_handler()
         stop_event.set()
 
     # Set the Edge termination handler
@@ -118,10 +119,10 @@ def main():
             raise Exception("No gateway object created")
         loop.run_until_complete(run_sample())
     except Exception as e:
-        print ( "Unexpected error %s " % e )
+        logger.error("Unexpected error %s", e)
         raise
     finally:
-        print("Shutting down IoT Hub Client...")
+        logger.warning("Shutting down IoT Hub Client...")
         if not IIoTEdgeGW is None:
             loop.run_until_complete(IIoTEdgeGW.shutdown())
         loop.close()
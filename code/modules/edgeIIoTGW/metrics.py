@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+#
+# File:    metrics.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Low overhead counters and latency histograms of the ingest pipeline
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import time
+
+BUCKETS = 32                                    # bucket i counts the durations in [2^(i-1), 2^i) microseconds
+
+class Histogram():
+
+    __slots__ = ("Count", "Sum", "Max", "Buckets")
+
+    def __init__(self):
+        self.Count = 0
+        self.Sum = 0.0                          # seconds
+        self.Max = 0.0                          # seconds
+        self.Buckets = [0] * BUCKETS
+
+    #
+    # Add a duration.
+    # @param seconds
+    #
+    def record(self, seconds):
+        self.Count += 1
+        self.Sum += seconds
+        if seconds > self.Max: self.Max = seconds
+        self.Buckets[min(int(seconds * 1000000).bit_length(), BUCKETS - 1)] += 1
+
+    #
+    # Upper bound in microseconds of a percentile.
+    # @param p 0-100
+    #
+    def percentile(self, p):
+        rank = self.Count * p / 100
+        total = 0
+        for i in range(BUCKETS):
+            total += self.Buckets[i]
+            if total >= rank and total > 0:
+                return 1 << i
+        return 0
+
+    #
+    # Summary in microseconds, the buckets are listed by upper bound (only the not empty ones).
+    #
+    def snapshot(self):
+        return {
+            "N": self.Count,
+            "Avg": round(self.Sum / self.Count * 1000000, 1) if self.Count > 0 else 0.0,
+            "Max": round(self.Max * 1000000, 1),
+            "P50": self.percentile(50),
+            "P99": self.percentile(99),
+            "Buckets": {str(1 << i): self.Buckets[i] for i in range(BUCKETS) if self.Buckets[i] > 0}
+        }
+
+class Metrics():
+
+    #
+    # Constructor.
+    # @param enable (optional) when disabled start() returns None and nothing is recorded
+    #
+    def __init__(self, enable = False):
+        self.enabled = enable
+        self._Timers = {}                       # name -> Histogram
+        self._Counters = {}                     # name -> value
+        self._Start = time.time()
+
+    #
+    # Start a timer, the value is passed to stop().
+    #
+    def start(self):
+        if not self.enabled:
+            return None
+        return time.perf_counter()
+
+    #
+    # Stop a timer and record the duration.
+    # @param name
+    # @param start value returned by start()
+    #
+    def stop(self, name, start):
+        if start is None:
+            return
+        self.observe(name, time.perf_counter() - start)
+
+    #
+    # Record a duration.
+    # @param name
+    # @param seconds
+    #
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        histogram = self._Timers.get(name)
+        if histogram is None:
+            histogram = Histogram()
+            self._Timers[name] = histogram
+        histogram.record(seconds)
+
+    #
+    # Increment a counter.
+    # @param name
+    # @param value (optional)
+    #
+    def count(self, name, value = 1):
+        if not self.enabled:
+            return
+        self._Counters[name] = self._Counters.get(name, 0) + value
+
+    #
+    # Clear the timers and the counters.
+    #
+    def reset(self):
+        self._Timers = {}
+        self._Counters = {}
+        self._Start = time.time()
+
+    #
+    # Current values, the durations are in microseconds.
+    # @param counters (optional) counters collected by the caller, merged with the recorded ones
+    #
+    def snapshot(self, counters = None):
+        all_counters = dict(counters) if not counters is None else {}
+        all_counters.update(self._Counters)
+        return {
+            "Enabled": self.enabled,
+            "Since": round(self._Start, 3),
+            "Time": round(time.time(), 3),
+            "Counters": all_counters,
+            "Timers": {name: self._Timers[name].snapshot() for name in list(self._Timers)}
+        }
@@ -0,0 +1,164 @@
+#!/usr/bin/python3
+#
+# File:    network_diff.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Difference between two ZbNet packets (added, changed, unchanged and departed devices)
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+# The fingerprint of a device entry is the tuple of its fields (without the IgnoreFields), the fingerprint
+# of a packet is the list of the fingerprints of its entries. A packet equal to the previous one is
+# compared with a single list comparison. Every RefreshInterval seconds all the entries are reported as
+# changed so the ignored fields and the periodic work of the nodes are refreshed.
+# A device reported with its UID after an entry without UID (or the opposite) at the same address is
+# the same device: its entry is moved to the new key and it is not reported as departed.
+#
+
+import time
+
+class NetworkDiff():
+
+    REFRESH_INTERVAL_DEF = 900                  # seconds between two complete processing of a packet, 0 never
+
+    #
+    # Constructor.
+    # @param config (optional) {"RefreshInterval":, "IgnoreFields": []}
+    #
+    def __init__(self, config = None):
+        config = config if not config is None else {}
+        self._RefreshInterval = config.get("RefreshInterval", self.REFRESH_INTERVAL_DEF)
+        self._IgnoreFields = frozenset(config.get("IgnoreFields", []))
+
+        self._Entries = {}                      # device key -> (fingerprint, entry) of the last packet
+        self._Addresses = {}                    # address key -> device key of the last packet
+        self._LastPacket = None                 # fingerprints of the entries of the last packet
+        self._LastRefresh = time.monotonic()
+
+        # metrics
+        self._Stats = {
+            "Packets": 0,
+            "UnchangedPackets": 0,
+            "Refreshes": 0,
+            "Added": 0,
+            "Changed": 0,
+            "Skipped": 0,
+            "Rekeyed": 0,
+            "Departed": 0
+        }
+
+    @property
+    def stats(self):
+        stats = dict(self._Stats)
+        stats["Devices"] = len(self._Entries)
+        return stats
+
+    #
+    # Key of a device entry: the UID, or the address when the UID is missing.
+    # @param entry
+    #
+    @staticmethod
+    def key(entry):
+        uid = entry.get("UID", "")
+        if uid != "":
+            return uid
+        return NetworkDiff.address_key(entry.get("ZbAddr", ""))
+
+    #
+    # Key of a device entry without UID.
+    # @param address
+    #
+    @staticmethod
+    def address_key(address):
+        return "@" + str(address).strip().upper()
+
+    #
+    # Fingerprint of a device entry.
+    # @param entry
+    #
+    def fingerprint(self, entry):
+        if len(self._IgnoreFields) == 0:
+            return tuple(entry.items())
+        ignore = self._IgnoreFields
+        return tuple(item for item in entry.items() if not item[0] in ignore)
+
+    #
+    # Compare a packet with the previous one, return (changed, unchanged, departed):
+    # the added or changed entries to process, the unchanged entries and the last entries of the departed devices.
+    # @param devices list of the device entries of the packet
+    #
+    def diff(self, devices):
+        self._Stats["Packets"] += 1
+        fingerprints = [self.fingerprint(entry) for entry in devices]
+
+        now = time.monotonic()
+        refresh = self._RefreshInterval > 0 and now - self._LastRefresh >= self._RefreshInterval
+        if refresh:
+            self._LastRefresh = now
+            self._Stats["Refreshes"] += 1
+        elif fingerprints == self._LastPacket:
+            self._Stats["UnchangedPackets"] += 1
+            self._Stats["Skipped"] += len(devices)
+            return [], devices, []
+
+        changed = []
+        unchanged = []
+        entries = {}
+        addresses = {}
+        rekeyed = set()
+        for entry, fingerprint in zip(devices, fingerprints):
+            key = self.key(entry)
+            address = self.address_key(entry.get("ZbAddr", ""))
+            last = self._Entries.get(key)
+            if last is None:
+                # the UID of the device at the same address is reported or is missing now
+                last_key = self._Addresses.get(address)
+                if not last_key is None and last_key != key and (key[0] == "@" or last_key[0] == "@"):
+                    last = self._Entries.get(last_key)
+                    rekeyed.add(last_key)
+                    self._Stats["Rekeyed"] += 1
+
+            if last is None:
+                self._Stats["Added"] += 1
+                changed.append(entry)
+            elif refresh or last[0] != fingerprint:
+                self._Stats["Changed"] += 1
+                changed.append(entry)
+            else:
+                self._Stats["Skipped"] += 1
+                unchanged.append(entry)
+            entries[key] = (fingerprint, entry)
+            addresses[address] = key
+
+        departed = [self._Entries[key][1] for key in self._Entries if not key in entries and not key in rekeyed]
+        self._Stats["Departed"] += len(departed)
+
+        self._Entries = entries
+        self._Addresses = addresses
+        self._LastPacket = fingerprints
+        return changed, unchanged, departed
+
+    #
+    # Forget the fingerprint of a device, its next entry is processed.
+    # @param uid
+    # @param address (optional) address of the device, for its entries without UID
+    #
+    def forget(self, uid, address = None):
+        keys = [uid] if address is None else [uid, self.address_key(address)]
+        for key in keys:
+            if not self._Entries.pop(key, None) is None:
+                self._LastPacket = None
+
+    #
+    # Forget all the fingerprints, the next packet is processed completely.
+    #
+    def reset(self):
+        self._Entries = {}
+        self._Addresses = {}
+        self._LastPacket = None
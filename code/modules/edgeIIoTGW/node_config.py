@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+#
+# File:    node_config.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Precompiled registry of the nodes provisioning configuration
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+from collections import OrderedDict
+import json
+import logging
+import os
+
+class NodeConfigRegistry():
+
+    SLOT_TAG = "NODE"                           # key tag of the free configuration slots (i.e. NODE0001)
+
+    _Logger = logging.getLogger(__name__)
+
+    #
+    # Constructor.
+    # @param net_config network configuration (content of config_net.json)
+    # @param filename (optional) file where the slot assignments are persisted
+    #
+    def __init__(self, net_config, filename = None):
+        self._Filename = filename
+        self._Dirty = False                     # slots assigned since the last save
+        self.compile(net_config)
+
+    @property
+    def free_slots(self):
+        return len(self._FreeSlots)
+
+    @property
+    def dirty(self):
+        return self._Dirty
+
+    #
+    # Compile the configuration: uid direct lookup and ordered set of the free slots.
+    # @param net_config
+    #
+    def compile(self, net_config):
+        if not "Nodes" in net_config:
+            net_config["Nodes"] = {}
+
+        self._NetConfig = net_config
+        self._ByUid = {}
+        self._FreeSlots = OrderedDict()         # free slot keys in file order
+
+        nodes = net_config["Nodes"]
+        for key in nodes:
+            if key.find(self.SLOT_TAG) != -1:
+                self._FreeSlots[key] = None
+            else:
+                self._ByUid[key] = nodes[key]
+
+    #
+    # Get the configuration of a uid without assigning a free slot.
+    # @param uid
+    #
+    def get(self, uid):
+        return self._ByUid.get(uid)
+
+    #
+    # Configurations of the known uids, list of (uid, config).
+    #
+    def items(self):
+        return list(self._ByUid.items())
+
+    #
+    # Get the configuration of a uid, in case of unknown uid the first free slot is assigned to it.
+    # The assignment is saved by the next flush, not on the packet path.
+    # @param uid
+    #
+    def assign(self, uid):
+        config = self._ByUid.get(uid)
+        if not config is None or uid == "":
+            return config
+
+        if len(self._FreeSlots) == 0:
+            return None
+
+        return self._assign_slot(uid, next(iter(self._FreeSlots)))
+
+    #
+    # Keep the slots assigned by the previous registry (i.e. the file has been edited from a copy taken
+    # before an assignment): a uid of the previous registry missing in this configuration takes back the
+    # free slot with the same configuration. Return the number of slots assigned again.
+    # @param previous NodeConfigRegistry replaced by this one
+    #
+    def adopt(self, previous):
+        adopted = 0
+        nodes = self._NetConfig["Nodes"]
+        for uid, config in previous.items():
+            if uid in self._ByUid:
+                continue
+            for slot in self._FreeSlots:
+                if nodes[slot] == config:
+                    self._assign_slot(uid, slot)
+                    adopted += 1
+                    break
+        return adopted
+
+    #
+    # Assign a free slot to a uid, the slot key is renamed to the uid (moved at the end of the nodes).
+    # @param uid
+    # @param slot
+    #
+    def _assign_slot(self, uid, slot):
+        del self._FreeSlots[slot]
+        self._Logger.info("Config update uid:%s temp_uid:%s", uid, slot)
+
+        config = self._NetConfig["Nodes"].pop(slot)
+        self._NetConfig["Nodes"][uid] = config
+        self._ByUid[uid] = config
+        self._Dirty = True
+        return config
+
+    #
+    # Save the network configuration if a slot has been assigned since the last save.
+    #
+    def flush(self):
+        if not self._Dirty:
+            return False
+        # in case of failure the file is saved again at the next flush
+        self._Dirty = not self.persist()
+        return not self._Dirty
+
+    #
+    # Save the network configuration with the assigned slots, the file is replaced atomically.
+    #
+    def persist(self):
+        if self._Filename is None:
+            return False
+
+        filename_tmp = self._Filename + ".tmp"
+        try:
+            with open(filename_tmp, "w") as f:
+                f.write(json.dumps(self._NetConfig, indent=2))
+            os.replace(filename_tmp, self._Filename)
+            return True
+        except Exception as ex:
+            self._Logger.error("Configuration Network save failed: " + str(ex))
+            return False
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+#
+# File:    node_record.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Compact record of a node connected to the gateway
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+from operator import attrgetter
+
+# node fields in output order
+FIELDS = ("Name", "Id", "Type", "UID", "Epoch", "State", "Address", "Parent", "RSSI", "Temperature", "CbM", "Battery", "Provisioned")
+
+class Node():
+
+    __slots__ = FIELDS + ("Config",)            # Config is not an output field
+
+    #
+    # Constructor, a node with only the uid (missing type, parent and network information).
+    # @param uid
+    #
+    def __init__(self, uid):
+        self.Name = ""                          # str
+        self.Id = -1                            # int
+        self.Type = -1                          # int, ZigBee device type
+        self.UID = uid                          # str
+        self.Epoch = -1                         # int, epoch of the last packet
+        self.State = -1                         # int, ZigBee state
+        self.Address = "-"                      # str, normalized ZigBee address
+        self.Parent = "-"                       # str, ZigBee address of the parent
+        self.RSSI = 0                           # int
+        self.Temperature = 0                    # float, degrees
+        self.CbM = -1                           # int
+        self.Battery = {"Voltage": 0, "Level": 0, "State": -1}
+        self.Provisioned = 0                    # int, 1 done, 0 not done, -1 failed
+        self.Config = None                      # dict, configuration of config_net.json, None until resolved
+
+    #
+    # Dictionary access, kept for the code written for the node dictionaries.
+    # @param field
+    #
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except (AttributeError, TypeError):
+            raise KeyError(field)
+
+    def __setitem__(self, field, value):
+        if not field in FIELDS:
+            raise KeyError(field)
+        setattr(self, field, value)
+
+    def __contains__(self, field):
+        return field in FIELDS
+
+    def keys(self):
+        return FIELDS
+
+    def __repr__(self):
+        return "Node(" + repr(self.to_dict()) + ")"
+
+    #
+    # Copy of the fields in a dictionary (json serialization, messages to the cloud).
+    #
+    def to_dict(self):
+        return dict(zip(FIELDS, _get_fields(self)))
+
+_get_fields = attrgetter(*FIELDS)
+
+#
+# Compile the projection of a list of fields, the returned function converts a node in a dictionary
+# with only the fields of the list. The fields not available in a node are skipped.
+# @param fields
+#
+def projection(fields):
+    fields = tuple(field for field in fields if field in FIELDS)
+    if len(fields) == 0:
+        return lambda node: {}
+
+    if len(fields) == 1:
+        field = fields[0]
+        get_field = attrgetter(field)
+        return lambda node: {field: get_field(node)}
+
+    get_fields = attrgetter(*fields)
+    return lambda node: dict(zip(fields, get_fields(node)))
+
+#
+# Convert a dictionary of nodes (uid -> node) in a serializable dictionary.
+# @param nodes
+#
+def nodes_to_dict(nodes):
+    return {uid: nodes[uid].to_dict() for uid in nodes}
@@ -0,0 +1,200 @@
+#!/usr/bin/python3
+#
+# File:    node_registry.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Persistent registry of the nodes for warm restarts
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import json
+import logging
+import os
+
+# application modules
+import node_record
+
+class NodeRegistry():
+
+    PATH_DEF          = "/app/config/"
+    PREFIX_DEF        = "iiotgw_"
+    COMPACT_EVERY_DEF = 500                     # journal entries before a compaction
+
+    SNAPSHOT_FILE = "nodes.snapshot"
+    JOURNAL_FILE  = "nodes.journal"
+
+    # node fields saved in the registry
+    FIELDS = ["UID", "Id", "Name", "Type", "Address", "Parent", "Provisioned"]
+
+    _Logger = logging.getLogger(__name__)
+
+    #
+    # Constructor.
+    # @param config (optional) {"Path":, "Prefix":, "CompactEvery":}
+    #
+    def __init__(self, config = None):
+        config = config if not config is None else {}
+        path = config.get("Path", self.PATH_DEF)
+        prefix = config.get("Prefix", self.PREFIX_DEF)
+        self._SnapshotFilename = os.path.join(path, prefix + self.SNAPSHOT_FILE)
+        self._JournalFilename = os.path.join(path, prefix + self.JOURNAL_FILE)
+        self._CompactEvery = config.get("CompactEvery", self.COMPACT_EVERY_DEF)
+        self._Project = node_record.projection(self.FIELDS)
+
+        self._Records = {}                      # uid -> record
+        self._ByAddress = {}                    # address -> uid
+        self._Journal = None
+        self._JournalEntries = 0
+
+        # metrics
+        self._Stats = {
+            "Writes": 0,
+            "Compactions": 0
+        }
+
+    @property
+    def stats(self):
+        stats = dict(self._Stats)
+        stats["Records"] = len(self._Records)
+        stats["JournalEntries"] = self._JournalEntries
+        return stats
+
+    #
+    # Next node id not used by the saved nodes.
+    #
+    @property
+    def next_id(self):
+        ids = [self._Records[uid]["Id"] for uid in self._Records if isinstance(self._Records[uid].get("Id"), int)]
+        return max(ids) + 1 if len(ids) > 0 else 0
+
+    #
+    # Load the snapshot and replay the journal.
+    #
+    def load(self):
+        self._Records = {}
+        self._ByAddress = {}
+        self._JournalEntries = 0
+
+        try:
+            if os.path.exists(self._SnapshotFilename):
+                with open(self._SnapshotFilename) as f:
+                    records = json.load(f)
+                for uid in records:
+                    self._set_record(records[uid])
+        except Exception as ex:
+            self._Logger.error("Node registry snapshot load failed: " + str(ex))
+
+        try:
+            if os.path.exists(self._JournalFilename):
+                with open(self._JournalFilename) as f:
+                    for line in f:
+                        try:
+                            self._set_record(json.loads(line))
+                            self._JournalEntries += 1
+                        except ValueError:
+                            # truncated line written during a power loss
+                            pass
+        except Exception as ex:
+            self._Logger.error("Node registry journal load failed: " + str(ex))
+
+        self._Logger.info("Node registry loaded: %d nodes", len(self._Records))
+        return len(self._Records)
+
+    #
+    # Get the saved record of a node.
+    # @param uid
+    #
+    def get(self, uid):
+        return self._Records.get(uid)
+
+    #
+    # Get the saved record of a node with the address.
+    # @param address
+    #
+    def find_by_address(self, address):
+        uid = self._ByAddress.get(address)
+        if uid is None:
+            return None
+        return self._Records.get(uid)
+
+    #
+    # Save a node, the journal is written only if the saved fields are changed.
+    # @param node
+    #
+    def put(self, node):
+        record = self._Project(node)
+
+        # only a completed provisioning is kept, the other results are performed again after a restart
+        if record["Provisioned"] != 1:
+            record["Provisioned"] = 0
+
+        if self._Records.get(record["UID"]) == record:
+            return False
+
+        self._set_record(record)
+        try:
+            if self._Journal is None:
+                self._Journal = open(self._JournalFilename, "a")
+            self._Journal.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self._Journal.flush()
+            self._JournalEntries += 1
+            self._Stats["Writes"] += 1
+        except Exception as ex:
+            self._Logger.error("Node registry write failed: " + str(ex))
+            return False
+
+        if self._JournalEntries >= self._CompactEvery:
+            self.compact()
+        return True
+
+    #
+    # Write a new snapshot and clear the journal.
+    #
+    def compact(self):
+        filename_tmp = self._SnapshotFilename + ".tmp"
+        try:
+            with open(filename_tmp, "w") as f:
+                f.write(json.dumps(self._Records, separators=(",", ":")))
+            os.replace(filename_tmp, self._SnapshotFilename)
+
+            if not self._Journal is None:
+                self._Journal.close()
+            self._Journal = open(self._JournalFilename, "w")
+            self._JournalEntries = 0
+            self._Stats["Compactions"] += 1
+            return True
+        except Exception as ex:
+            self._Logger.error("Node registry compaction failed: " + str(ex))
+            return False
+
+    #
+    # Close the registry.
+    #
+    def close(self):
+        try:
+            if not self._Journal is None:
+                self._Journal.close()
+        except:
+            pass
+        self._Journal = None
+
+    #
+    # Store a record updating the address index.
+    # @param record
+    #
+    def _set_record(self, record):
+        uid = record["UID"]
+        old = self._Records.get(uid)
+        if not old is None and self._ByAddress.get(old["Address"]) == uid:
+            del self._ByAddress[old["Address"]]
+
+        self._Records[uid] = record
+        if record["Address"] != "-":
+            self._ByAddress[record["Address"]] = uid
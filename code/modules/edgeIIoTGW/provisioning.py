@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+#
+# File:    provisioning.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Bounded background queue for the node provisioning
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import asyncio
+import logging
+
+class ProvisioningQueue():
+
+    CONCURRENCY_DEF      = 2                    # max number of provisioning in progress
+    BACKOFF_DEF          = 2.0                  # delay before the first retry, doubled at every retry
+    BACKOFF_MAX_DEF      = 60.0                 # max delay between two retries
+    FAILURE_COOLDOWN_DEF = 300.0                # new requests for a failed uid are ignored for this time
+
+    _Logger = logging.getLogger(__name__)
+
+    #
+    # Constructor.
+    # @param provision coroutine function performing the provisioning with a node configuration
+    # @param max_retry number of retry after the first failure
+    # @param config (optional) {"Concurrency":, "Backoff":, "BackoffMax":, "FailureCooldown":}
+    # @param on_done (optional) callback(uid, success) at the end of a request
+    #
+    def __init__(self, provision, max_retry, config = None, on_done = None):
+        config = config if not config is None else {}
+        self._Provision = provision
+        self._MaxRetry = max_retry
+        self._Concurrency = config.get("Concurrency", self.CONCURRENCY_DEF)
+        self._Backoff = config.get("Backoff", self.BACKOFF_DEF)
+        self._BackoffMax = config.get("BackoffMax", self.BACKOFF_MAX_DEF)
+        self._FailureCooldown = config.get("FailureCooldown", self.FAILURE_COOLDOWN_DEF)
+        self._OnDone = on_done
+
+        self._Semaphore = None                  # created at the first request with the running loop
+        self._InFlight = {}                     # uid -> task
+        self._Failures = {}                     # uid -> loop time of the last failure
+
+        # metrics
+        self._Stats = {
+            "Requests": 0,
+            "Deduplicated": 0,
+            "Cooldown": 0,
+            "Succeeded": 0,
+            "Failed": 0,
+            "Retries": 0
+        }
+
+    @property
+    def stats(self):
+        stats = dict(self._Stats)
+        stats["InFlight"] = len(self._InFlight)
+        return stats
+
+    #
+    # Check if a provisioning is in progress for a uid.
+    # @param uid
+    #
+    def is_pending(self, uid):
+        return uid in self._InFlight
+
+    #
+    # Request the provisioning of a node, the request is ignored if it is already in progress.
+    # @param uid
+    # @param config provisioning configuration of the node
+    #
+    def request(self, uid, config):
+        if uid in self._InFlight:
+            self._Stats["Deduplicated"] += 1
+            return False
+
+        loop = asyncio.get_event_loop()
+        failure = self._Failures.get(uid)
+        if not failure is None and loop.time() - failure < self._FailureCooldown:
+            self._Stats["Cooldown"] += 1
+            return False
+
+        if self._Semaphore is None:
+            self._Semaphore = asyncio.Semaphore(self._Concurrency)
+
+        self._Stats["Requests"] += 1
+        self._InFlight[uid] = asyncio.ensure_future(self._run(uid, config))
+        return True
+
+    #
+    # Wait for the end of all the requests in progress.
+    #
+    async def join(self):
+        while len(self._InFlight) > 0:
+            await asyncio.gather(*list(self._InFlight.values()), return_exceptions=True)
+
+    #
+    # Cancel all the requests in progress.
+    #
+    async def stop(self):
+        tasks = list(self._InFlight.values())
+        for task in tasks:
+            task.cancel()
+        if len(tasks) > 0:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    #
+    # Perform a provisioning with retry, the concurrency slot is released during the backoff.
+    # @param uid
+    # @param config
+    #
+    async def _run(self, uid, config):
+        success = False
+        try:
+            for attempt in range(self._MaxRetry + 1):
+                if attempt > 0:
+                    self._Stats["Retries"] += 1
+                    await asyncio.sleep(min(self._Backoff * (2 ** (attempt - 1)), self._BackoffMax))
+
+                try:
+                    async with self._Semaphore:
+                        await self._Provision(config)
+                    success = True
+                    break
+                except asyncio.CancelledError:
+                    raise
+                except Exception as ex:
+                    self._Logger.error("provisioning error uid:'%s' attempt %d: %s", uid, attempt + 1, ex)
+        finally:
+            self._InFlight.pop(uid, None)
+
+        if success:
+            self._Stats["Succeeded"] += 1
+            self._Failures.pop(uid, None)
+        else:
+            self._Stats["Failed"] += 1
+            self._Failures[uid] = asyncio.get_event_loop().time()
+
+        if not self._OnDone is None:
+            self._OnDone(uid, success)
@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+#
+# File:    scheduler.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Non-blocking periodic task scheduler based on asyncio
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import asyncio
+import logging
+import random
+
+class ScheduledTask():
+
+    #
+    # Constructor.
+    # @param name
+    # @param callback function or coroutine function called at every tick
+    # @param interval period in seconds
+    # @param jitter (optional) max random delay in seconds added to every tick
+    # @param delay (optional) delay of the first tick in seconds, default interval
+    #
+    def __init__(self, name, callback, interval, jitter = 0.0, delay = None):
+        if interval <= 0:
+            raise Exception("Invalid interval for task " + name)
+
+        self.name = name
+        self.callback = callback
+        self.interval = float(interval)
+        self.jitter = max(0.0, float(jitter))
+        self.delay = self.interval if delay is None else max(0.0, float(delay))
+        self.handle = None
+
+        # metrics
+        self.runs = 0
+        self.errors = 0
+        self.overruns = 0
+        self.missed = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.last_lateness = 0.0
+        self.max_lateness = 0.0
+
+    @property
+    def stats(self):
+        return {
+            "Interval": self.interval,
+            "Runs": self.runs,
+            "Errors": self.errors,
+            "Overruns": self.overruns,
+            "Missed": self.missed,
+            "LastDuration": round(self.last_duration, 6),
+            "MaxDuration": round(self.max_duration, 6),
+            "AvgDuration": round(self.total_duration / self.runs, 6) if self.runs > 0 else 0.0,
+            "LastLateness": round(self.last_lateness, 6),
+            "MaxLateness": round(self.max_lateness, 6)
+        }
+
+class Scheduler():
+
+    _Logger = logging.getLogger(__name__)
+
+    #
+    # Constructor.
+    #
+    def __init__(self):
+        self._Tasks = {}
+        self._Running = False
+
+    @property
+    def isRunning(self):
+        return self._Running
+
+    @property
+    def stats(self):
+        return {name: self._Tasks[name].stats for name in self._Tasks}
+
+    #
+    # Add a periodic task, if the scheduler is already running the task is started immediately.
+    # @param name
+    # @param callback function or coroutine function
+    # @param interval period in seconds
+    # @param jitter (optional)
+    # @param delay (optional)
+    #
+    def add_task(self, name, callback, interval, jitter = 0.0, delay = None):
+        if name in self._Tasks:
+            raise Exception("Task already scheduled " + name)
+
+        task = ScheduledTask(name, callback, interval, jitter, delay)
+        self._Tasks[name] = task
+        if self._Running:
+            task.handle = asyncio.ensure_future(self._task_runner(task))
+        return task
+
+    #
+    # Remove a periodic task, return false if it is not scheduled.
+    # @param name
+    #
+    def remove_task(self, name):
+        task = self._Tasks.pop(name, None)
+        if task is None:
+            return False
+        if not task.handle is None:
+            task.handle.cancel()
+        return True
+
+    #
+    # Start all the tasks, it must be called with a running event loop.
+    #
+    def start(self):
+        if self._Running:
+            return
+
+        self._Running = True
+        for name in self._Tasks:
+            task = self._Tasks[name]
+            task.handle = asyncio.ensure_future(self._task_runner(task))
+
+    #
+    # Stop all the tasks and wait for their completion.
+    #
+    async def stop(self):
+        self._Running = False
+        handles = []
+        for name in self._Tasks:
+            task = self._Tasks[name]
+            if not task.handle is None:
+                task.handle.cancel()
+                handles.append(task.handle)
+                task.handle = None
+
+        if len(handles) > 0:
+            await asyncio.gather(*handles, return_exceptions=True)
+
+    #
+    # Periodic loop of a single task, the deadlines are computed on the loop clock so the
+    # execution time of the callback doesn't accumulate drift.
+    # @param task
+    #
+    async def _task_runner(self, task):
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + task.delay
+
+        while True:
+            jitter = random.uniform(0, task.jitter) if task.jitter > 0 else 0.0
+            await asyncio.sleep(max(0.0, deadline + jitter - loop.time()))
+
+            start = loop.time()
+            task.last_lateness = max(0.0, start - deadline - jitter)
+            task.max_lateness = max(task.max_lateness, task.last_lateness)
+
+            try:
+                ret = task.callback()
+                if asyncio.iscoroutine(ret):
+                    await ret
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                task.errors += 1
+                self._Logger.error("Scheduled task '" + task.name + "' failed: " + str(ex))
+
+            end = loop.time()
+            task.runs += 1
+            task.last_duration = end - start
+            task.total_duration += task.last_duration
+            task.max_duration = max(task.max_duration, task.last_duration)
+            if task.last_duration > task.interval:
+                task.overruns += 1
+
+            # skip the ticks already expired instead of running them back to back
+            deadline += task.interval
+            if deadline < end:
+                skipped = int((end - deadline) // task.interval) + 1
+                task.missed += skipped
+                deadline += skipped * task.interval
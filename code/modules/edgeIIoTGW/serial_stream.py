@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+#
+# File:    serial_stream.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Incremental reassembler of the serial stream in lines
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import codecs
+
+class SerialStreamReassembler():
+
+    MAX_LINE_LENGTH_DEF = 4096
+
+    #
+    # Constructor.
+    # @param max_line_length (optional) longer lines are discarded up to the next new line
+    #
+    def __init__(self, max_line_length = MAX_LINE_LENGTH_DEF):
+        self._MaxLineLength = max_line_length
+        self._Buffer = bytearray()              # pending bytes, it never contains a new line
+        self._Discarding = False                # true while skipping the tail of a too long line
+        self._Decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        # metrics
+        self.lines = 0
+        self.dropped_lines = 0
+
+    @property
+    def pending(self):
+        return len(self._Buffer)
+
+    #
+    # Append a received chunk and return the list of the completed lines (bytes, without line terminators).
+    # Only the new bytes are scanned, the previous buffer never contains a new line.
+    # @param data
+    #
+    def feed(self, data):
+        lines = []
+        buf = self._Buffer
+        scan_start = len(buf)
+        buf += data
+
+        line_start = 0
+        idx = buf.find(b"\n", scan_start)
+        while idx != -1:
+            if self._Discarding:
+                # end of a too long line
+                self._Discarding = False
+            else:
+                line = bytes(buf[line_start:idx]).rstrip(b"\r")
+                if len(line) > self._MaxLineLength:
+                    self.dropped_lines += 1
+                elif len(line) > 0:
+                    lines.append(line)
+            line_start = idx + 1
+            idx = buf.find(b"\n", line_start)
+
+        if line_start > 0:
+            del buf[:line_start]
+
+        # uncompleted line too long, discard it up to the next new line
+        if len(buf) > self._MaxLineLength:
+            if not self._Discarding:
+                self.dropped_lines += 1
+            self._Discarding = True
+            buf.clear()
+
+        self.lines += len(lines)
+        return lines
+
+    #
+    # Decode a chunk into text keeping the multibyte characters split across chunks.
+    # @param data
+    #
+    def decode_chunk(self, data):
+        return self._Decoder.decode(data)
+
+    #
+    # Discard the pending data.
+    #
+    def reset(self):
+        self._Buffer.clear()
+        self._Discarding = False
+        self._Decoder.reset()
@@ -0,0 +1,246 @@
+#!/usr/bin/python3
+#
+# File:    spool.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Disk-backed store-and-forward spool of the cloud messages not sent
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+# The messages are stored in a SQLite database (WAL journal) in arrival order, the replay
+# takes them in the same order so the messages of a device are never reordered.
+# Caps: MaxMessages, MaxBytes (payload bytes) and MaxAge (seconds), when the spool is full
+# the Eviction policy drops the oldest messages (DropOldest) or rejects the new one (DropNewest).
+#
+
+import logging
+import os
+import sqlite3
+import time
+
+EVICTION_DROP_OLDEST = "DropOldest"
+EVICTION_DROP_NEWEST = "DropNewest"
+
+class MessageSpool():
+
+    PATH_DEF         = "/app/config/spool/"     # persistent volume, the log volume is a tmpfs
+    FILE_DEF         = "iiotgw_spool.db"
+    MAX_MESSAGES_DEF = 100000
+    MAX_BYTES_DEF    = 64 * 1024 * 1024
+    MAX_AGE_DEF      = 7 * 24 * 3600            # seconds
+    DRAIN_RATE_DEF   = 20                       # messages per second replayed when the cloud is reachable
+    EVICTION_DEF     = EVICTION_DROP_OLDEST
+
+    _Logger = logging.getLogger(__name__)
+
+    #
+    # Constructor.
+    # @param config (optional) {"Path":, "File":, "MaxMessages":, "MaxBytes":, "MaxAge":, "DrainRate":, "Eviction":}
+    #
+    def __init__(self, config = None):
+        config = config if not config is None else {}
+        self._Path = config.get("Path", self.PATH_DEF)
+        self._Filename = os.path.join(self._Path, config.get("File", self.FILE_DEF))
+        self._MaxMessages = config.get("MaxMessages", self.MAX_MESSAGES_DEF)
+        self._MaxBytes = config.get("MaxBytes", self.MAX_BYTES_DEF)
+        self._MaxAge = config.get("MaxAge", self.MAX_AGE_DEF)
+        self._DrainRate = config.get("DrainRate", self.DRAIN_RATE_DEF)
+        self._Eviction = config.get("Eviction", self.EVICTION_DEF)
+
+        self._Db = None
+        self._Count = 0                         # messages in the spool
+        self._Bytes = 0                         # payload bytes in the spool
+        self._Devices = {}                      # device -> messages in the spool
+
+        # metrics
+        self._Stats = {
+            "Spooled": 0,
+            "Replayed": 0,
+            "Evicted": 0,
+            "Expired": 0,
+            "Rejected": 0,
+            "Errors": 0
+        }
+
+    @property
+    def isOpen(self):
+        return not self._Db is None
+
+    @property
+    def count(self):
+        return self._Count
+
+    @property
+    def DrainRate(self):
+        return self._DrainRate
+
+    @property
+    def stats(self):
+        stats = dict(self._Stats)
+        stats["Pending"] = self._Count
+        stats["Bytes"] = self._Bytes
+        stats["Devices"] = len(self._Devices)
+        return stats
+
+    #
+    # Open the database and load the counters of the messages already spooled, return false on error.
+    #
+    def open(self):
+        try:
+            os.makedirs(self._Path, exist_ok=True)
+            self._Db = sqlite3.connect(self._Filename)
+            self._Db.execute("PRAGMA journal_mode=WAL")
+            self._Db.execute("PRAGMA synchronous=NORMAL")
+            self._Db.execute("CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                             "device TEXT NOT NULL, channel TEXT NOT NULL, created REAL NOT NULL, payload BLOB NOT NULL)")
+            self._Db.commit()
+
+            self._Devices = {}
+            self._Count = 0
+            self._Bytes = 0
+            for device, count, size in self._Db.execute("SELECT device, COUNT(*), SUM(LENGTH(payload)) FROM messages GROUP BY device"):
+                self._Devices[device] = count
+                self._Count += count
+                self._Bytes += size
+            self._Logger.info("Spool opened: %d messages", self._Count)
+            return True
+        except Exception as ex:
+            self._Logger.error("Spool open failed: %s", ex)
+            self.close()
+            return False
+
+    #
+    # Close the database.
+    #
+    def close(self):
+        if self._Db is None:
+            return
+        try:
+            self._Db.close()
+        except Exception as ex:
+            self._Logger.error("Spool close failed: %s", ex)
+        self._Db = None
+
+    #
+    # Check if a device has messages in the spool, its new messages must be spooled after them.
+    # @param device
+    #
+    def is_pending(self, device):
+        return device in self._Devices
+
+    #
+    # Store a message, return false if it is rejected.
+    # @param device device_physical_id
+    # @param channel output channel
+    # @param payload json bytes
+    #
+    def put(self, device, channel, payload):
+        if self._Db is None:
+            self._Stats["Rejected"] += 1
+            return False
+
+        try:
+            if self._Count >= self._MaxMessages or self._Bytes + len(payload) > self._MaxBytes:
+                if self._Eviction == EVICTION_DROP_NEWEST or len(payload) > self._MaxBytes:
+                    self._Stats["Rejected"] += 1
+                    return False
+                self._evict(len(payload))
+
+            self._Db.execute("INSERT INTO messages (device, channel, created, payload) VALUES (?, ?, ?, ?)",
+                             (device, channel, time.time(), payload))
+            self._Db.commit()
+        except Exception as ex:
+            self._Stats["Errors"] += 1
+            self._Logger.error("Spool write failed: %s", ex)
+            return False
+
+        self._Devices[device] = self._Devices.get(device, 0) + 1
+        self._Count += 1
+        self._Bytes += len(payload)
+        self._Stats["Spooled"] += 1
+        return True
+
+    #
+    # Oldest messages, list of (id, device, channel, payload).
+    # @param limit
+    #
+    def peek(self, limit):
+        if self._Db is None or self._Count == 0:
+            return []
+        return self._Db.execute("SELECT id, device, channel, payload FROM messages ORDER BY id LIMIT ?", (limit,)).fetchall()
+
+    #
+    # Remove a message replayed, return false if the spool is not open.
+    # @param message_id
+    # @param device
+    # @param size payload bytes
+    #
+    def remove(self, message_id, device, size):
+        if self._Db is None:
+            return False
+        self._Db.execute("DELETE FROM messages WHERE id = ?", (message_id,))
+        self._Db.commit()
+        self._forget(device, 1, size)
+        self._Stats["Replayed"] += 1
+        return True
+
+    #
+    # Remove the messages older than MaxAge.
+    #
+    def purge(self):
+        if self._Db is None or self._Count == 0 or self._MaxAge <= 0:
+            return 0
+        try:
+            limit = time.time() - self._MaxAge
+            rows = self._Db.execute("SELECT device, COUNT(*), SUM(LENGTH(payload)) FROM messages WHERE created < ? GROUP BY device",
+                                    (limit,)).fetchall()
+            if len(rows) == 0:
+                return 0
+            self._Db.execute("DELETE FROM messages WHERE created < ?", (limit,))
+            self._Db.commit()
+        except Exception as ex:
+            self._Stats["Errors"] += 1
+            self._Logger.error("Spool purge failed: %s", ex)
+            return 0
+
+        expired = 0
+        for device, count, size in rows:
+            self._forget(device, count, size)
+            expired += count
+        self._Stats["Expired"] += expired
+        return expired
+
+    #
+    # Drop the oldest messages to make room for a new one.
+    # @param size payload bytes of the new message
+    #
+    def _evict(self, size):
+        while self._Count > 0 and (self._Count >= self._MaxMessages or self._Bytes + size > self._MaxBytes):
+            rows = self._Db.execute("SELECT id, device, LENGTH(payload) FROM messages ORDER BY id LIMIT 64").fetchall()
+            for message_id, device, length in rows:
+                if self._Count < self._MaxMessages and self._Bytes + size <= self._MaxBytes:
+                    break
+                self._Db.execute("DELETE FROM messages WHERE id = ?", (message_id,))
+                self._forget(device, 1, length)
+                self._Stats["Evicted"] += 1
+
+    #
+    # Update the counters of the removed messages.
+    # @param device
+    # @param count
+    # @param size
+    #
+    def _forget(self, device, count, size):
+        remaining = self._Devices.get(device, 0) - count
+        if remaining > 0:
+            self._Devices[device] = remaining
+        else:
+            self._Devices.pop(device, None)
+        self._Count -= count
+        self._Bytes -= size
@@ -0,0 +1,25 @@
+#!/usr/bin/python3
+#
+# File:    conftest.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Test configuration: the modules of the gateway and the tools are imported from their folders
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+# Run from the repository root with: python -m pytest code/modules/edgeIIoTGW/tests
+#
+
+import os
+import sys
+
+MODULE_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, os.path.join(MODULE_FOLDER, "tools"))
+sys.path.insert(0, MODULE_FOLDER)
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+#
+# File:    test_aggregation.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the windowed aggregation of the node telemetry
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import pytest
+
+import aggregation
+
+def test_aggregated_fields_are_removed_from_the_update():
+    aggregator = aggregation.WindowAggregator()
+    assert aggregator.add("A", {"UID": "A", "Epoch": 1, "Temperature": 20.0}) is None
+    assert aggregator.add("A", {"UID": "A", "Epoch": 2, "Temperature": 21.0, "RSSI": -40}) == {"UID": "A", "Epoch": 2, "RSSI": -40}
+
+def test_fields_without_sample_are_removed_without_aggregation():
+    aggregator = aggregation.WindowAggregator()
+    update = {"UID": "A", "Epoch": 1, "Temperature": 0, "CbM": -1, "RSSI": -40}
+    assert aggregator.add("A", update, {"Temperature": 215}) == {"UID": "A", "Epoch": 1, "RSSI": -40}
+    aggregate = aggregator.flush()[0][1]
+    assert aggregate["TemperatureCount"] == 1 and not "CbM" in aggregate
+
+def test_tumbling_window():
+    aggregator = aggregation.WindowAggregator({"Window": 60})
+    for epoch, value in enumerate([20.0, 22.0, 21.0]):
+        aggregator.add("A", {"UID": "A", "Epoch": epoch, "Temperature": value})
+
+    aggregates = aggregator.flush()
+    assert aggregates == [("A", {"Temperature": 21.0, "TemperatureMin": 20.0, "TemperatureMax": 22.0,
+                                 "TemperatureLast": 21.0, "TemperatureCount": 3, "UID": "A", "Epoch": 2})]
+
+    # a tumbling window starts empty, the idle node is removed
+    assert aggregator.flush() == []
+    assert aggregator.stats["Nodes"] == 0
+
+def test_sliding_window_reuses_the_oldest_pane():
+    aggregator = aggregation.WindowAggregator({"Window": 30, "Hop": 10, "Fields": ["Temperature"]})
+    aggregator.add("A", {"UID": "A", "Temperature": 10.0})
+    assert aggregator.flush()[0][1]["TemperatureCount"] == 1
+
+    aggregator.add("A", {"UID": "A", "Temperature": 20.0})
+    aggregate = aggregator.flush()[0][1]
+    assert aggregate["TemperatureCount"] == 2 and aggregate["Temperature"] == 15.0
+
+    aggregator.add("A", {"UID": "A", "Temperature": 30.0})
+    aggregate = aggregator.flush()[0][1]
+    assert aggregate["TemperatureCount"] == 3 and aggregate["TemperatureMin"] == 10.0
+
+    # the pane of the first sample is out of the window
+    aggregator.add("A", {"UID": "A", "Temperature": 40.0})
+    aggregate = aggregator.flush()[0][1]
+    assert aggregate["TemperatureCount"] == 3 and aggregate["TemperatureMin"] == 20.0 and aggregate["Temperature"] == 30.0
+
+    # the samples leave the window one pane at a time
+    assert aggregator.flush()[0][1]["TemperatureCount"] == 2
+    assert aggregator.flush()[0][1]["TemperatureCount"] == 1
+    assert aggregator.flush() == []
+
+def test_values_not_numeric_are_ignored():
+    aggregator = aggregation.WindowAggregator({"Fields": ["Temperature"]})
+    assert aggregator.add("A", {"UID": "A", "Temperature": "n/a"}) is None
+    assert aggregator.flush() == []
+
+def test_invalid_hop():
+    with pytest.raises(Exception):
+        aggregation.WindowAggregator({"Window": 10, "Hop": 20})
@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+#
+# File:    test_batch_sender.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the batching of the node messages sent through the identity translation
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import asyncio
+import json
+
+import pytest
+
+import batch_sender
+import inference
+import stubs
+
+CHANNEL = "identitytranslation_output"
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+@pytest.fixture(autouse=True)
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+def make_sender(send_latency = 0.0, **config):
+    received = []
+    client = stubs.StubModuleClient(send_latency, on_send=lambda message, output, now: received.append(json.loads(message.data)))
+    config.setdefault("MaxDelay", 1000.0)
+    return batch_sender.BatchSender(inference.Inference(client), config), received
+
+def test_array_keeps_every_message_in_order():
+    sender, received = make_sender(MaxMessages=3)
+    for seq in range(3):
+        run(sender.node_send_message("A", {"Seq": seq, "T": 20}, CHANNEL))
+    assert received == [[{"Seq": 0, "T": 20}, {"Seq": 1, "T": 20}, {"Seq": 2, "T": 20}]]
+    assert sender.stats["FlushReason"]["MaxMessages"] == 1
+
+def test_merge_keeps_the_latest_values():
+    sender, received = make_sender(MaxMessages=2, Mode=batch_sender.BatchSender.MODE_MERGE)
+    message = {"Seq": 0, "T": 20}
+    run(sender.node_send_message("A", message, CHANNEL))
+    # the queued message is a copy
+    message["T"] = 99
+    run(sender.node_send_message("A", {"Seq": 1, "R": -40}, CHANNEL))
+    assert received == [{"Seq": 1, "T": 20, "R": -40}]
+
+def test_batches_are_per_device():
+    sender, received = make_sender(MaxMessages=10)
+    run(sender.node_send_message("A", {"a": 1}, CHANNEL))
+    run(sender.node_send_message("B", {"b": 1}, CHANNEL))
+    assert sender.pending == 2
+    run(sender.flush_all())
+    assert sorted(received, key=str) == [[{"a": 1}], [{"b": 1}]]
+    assert sender.stats["FlushReason"]["Shutdown"] == 2
+
+def test_max_bytes():
+    sender, received = make_sender(MaxMessages=100, MaxBytes=40)
+    for seq in range(3):
+        run(sender.node_send_message("A", {"a": 1111111111 + seq}, CHANNEL))
+    # each message is 17 bytes with its separator, the third one does not fit
+    assert received == [[{"a": 1111111111}, {"a": 1111111112}]]
+    assert sender.pending == 1
+
+def test_max_delay():
+    sender, received = make_sender(MaxDelay=0.01)
+    run(sender.node_send_message("A", {"a": 1}, CHANNEL))
+    run(asyncio.sleep(0.05))
+    assert received == [[{"a": 1}]]
+    assert sender.stats["FlushReason"]["MaxDelay"] == 1
+
+def test_batch_started_during_a_flush_is_kept():
+    sender, received = make_sender(0.01, MaxMessages=100, MaxBytes=40)
+    run(sender.node_send_message("A", {"a": 1111111111}, CHANNEL))
+    run(sender.node_send_message("A", {"a": 2222222222}, CHANNEL))
+
+    # the first message flushes the full batch, the second one starts a new batch during the send
+    async def concurrent():
+        await asyncio.gather(sender.node_send_message("A", {"a": 3333333333}, CHANNEL),
+                             sender.node_send_message("A", {"a": 4444444444}, CHANNEL))
+    run(concurrent())
+    run(sender.flush_all())
+
+    sent = [message["a"] for batch in received for message in batch]
+    assert sorted(sent) == [1111111111, 2222222222, 3333333333, 4444444444]
+    assert sender.stats["Messages"] == 4
@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+#
+# File:    test_config_watcher.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the change detection of the configuration files
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import json
+import os
+import time
+
+import config_watcher
+
+_Clock = [time.time_ns()]
+
+#
+# Write a file, the modification time is moved forward so that every write is a change.
+# @param filename
+# @param content json content, or str written as it is
+#
+def write(filename, content):
+    with open(filename, "w") as f:
+        f.write(content if isinstance(content, str) else json.dumps(content))
+    _Clock[0] += 10 ** 9
+    os.utime(filename, ns=(_Clock[0], _Clock[0]))
+
+def make_watcher(tmp_path, result = True):
+    changes = []
+
+    def on_change(name, content):
+        changes.append((name, content))
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    filename = str(tmp_path / "config_app.json")
+    write(filename, {"Level": 1})
+    watcher = config_watcher.ConfigWatcher({"config_app.json": filename}, on_change, {"Interval": 0.5})
+    return watcher, filename, changes
+
+def test_loaded_file_is_not_a_change(tmp_path):
+    watcher, filename, changes = make_watcher(tmp_path)
+    assert watcher.Interval == 0.5
+    assert watcher.poll() == 0 and watcher.poll() == 0
+    assert changes == []
+    assert watcher.stats["Checks"] == 2 and watcher.stats["Changes"] == 0
+
+def test_changed_file_is_applied_once(tmp_path):
+    watcher, filename, changes = make_watcher(tmp_path)
+    write(filename, {"Level": 2})
+    assert watcher.poll() == 1
+    assert watcher.poll() == 0
+    assert changes == [("config_app.json", {"Level": 2})]
+    assert watcher.stats["Changes"] == 1 and watcher.stats["Applied"] == 1
+
+def test_size_change_with_same_mtime(tmp_path):
+    watcher, filename, changes = make_watcher(tmp_path)
+    mtime = os.stat(filename).st_mtime_ns
+    with open(filename, "w") as f:
+        json.dump({"Level": 22}, f)
+    os.utime(filename, ns=(mtime, mtime))
+    assert watcher.poll() == 1
+    assert changes == [("config_app.json", {"Level": 22})]
+
+def test_replaced_file(tmp_path):
+    watcher, filename, changes = make_watcher(tmp_path)
+    st = os.stat(filename)
+
+    # same modification time and size, only the inode is changed
+    new_filename = str(tmp_path / "config_app.json.tmp")
+    with open(new_filename, "w") as f:
+        json.dump({"Level": 3}, f)
+    os.utime(new_filename, ns=(st.st_mtime_ns, st.st_mtime_ns))
+    os.replace(new_filename, filename)
+    assert os.stat(filename).st_size == st.st_size
+
+    assert watcher.poll() == 1
+    assert changes == [("config_app.json", {"Level": 3})]
+
+def test_unchanged_content_is_ignored(tmp_path):
+    watcher, filename, changes = make_watcher(tmp_path, False)
+    write(filename, {"Level": 1})
+    assert watcher.poll() == 0
+    assert len(changes) == 1
+    assert watcher.stats["Ignored"] == 1 and watcher.stats["Applied"] == 0
+
+def test_invalid_file_is_rejected_and_loaded_at_its_next_change(tmp_path):
+    watcher, filename, changes = make_watcher(tmp_path)
+    write(filename, '{"Level": ')
+    assert watcher.poll() == 0
+    assert changes == [] and watcher.stats["Rejected"] == 1
+
+    # not loaded again until it is changed
+    assert watcher.poll() == 0 and watcher.stats["Rejected"] == 1
+
+    write(filename, {"Level": 4})
+    assert watcher.poll() == 1
+    assert changes == [("config_app.json", {"Level": 4})]
+
+def test_content_rejected_by_the_callback(tmp_path):
+    watcher, filename, changes = make_watcher(tmp_path, ValueError("invalid level"))
+    write(filename, {"Level": "x"})
+    assert watcher.poll() == 0
+    assert len(changes) == 1
+    assert watcher.stats["Rejected"] == 1 and watcher.stats["Applied"] == 0
+
+def test_missing_file(tmp_path):
+    watcher, filename, changes = make_watcher(tmp_path)
+    os.remove(filename)
+    assert watcher.poll() == 0
+    assert watcher.stats["Changes"] == 0
+
+    # a file created again is a change
+    write(filename, {"Level": 5})
+    assert watcher.poll() == 1
+    assert changes == [("config_app.json", {"Level": 5})]
+
+def test_missing_file_at_start(tmp_path):
+    changes = []
+    filename = str(tmp_path / "config_net.json")
+    watcher = config_watcher.ConfigWatcher({"config_net.json": filename}, lambda name, content: changes.append(content) or True)
+    assert watcher.Interval == config_watcher.ConfigWatcher.INTERVAL_DEF
+    assert watcher.poll() == 0
+
+    write(filename, {"Nodes": {}})
+    assert watcher.poll() == 1
+    assert changes == [{"Nodes": {}}]
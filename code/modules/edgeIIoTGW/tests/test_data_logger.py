@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+#
+# File:    test_data_logger.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the snapshots of the data logger and of its write-behind thread
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import json
+import threading
+
+import data_logger
+
+def make_logger(tmp_path, write_behind = True, queue_size = 256):
+    return data_logger.DataLogger({"Path": str(tmp_path) + "/", "WriteBehind": {"Enable": write_behind, "QueueSize": queue_size}})
+
+def read(tmp_path, name):
+    with open(tmp_path / ("iiotgw_" + name)) as f:
+        return json.load(f)
+
+#
+# Hold the writer thread in the write of a file until the returned event is set.
+#
+def hold_writer(logger, filename):
+    entered = threading.Event()
+    release = threading.Event()
+    write = logger._write_file
+
+    def held_write(name, text):
+        if name == "iiotgw_" + filename and threading.current_thread() is logger._Writer and not release.is_set():
+            entered.set()
+            release.wait(5)
+        return write(name, text)
+
+    logger._write_file = held_write
+    return entered, release
+
+def test_unchanged_content_is_not_written_again(tmp_path):
+    logger = make_logger(tmp_path, write_behind=False)
+    logger.app({"A": 1})
+    logger.app({"A": 1})
+    logger.app({"A": 2})
+    stats = logger.WriteStats
+    assert stats["Writes"] == 2 and stats["Unchanged"] == 1
+    assert read(tmp_path, "app.log") == {"A": 2}
+
+def test_pending_snapshots_are_coalesced(tmp_path):
+    logger = make_logger(tmp_path)
+    entered, release = hold_writer(logger, "app.log")
+    logger.app({"Seq": 1})
+    assert entered.wait(5)
+
+    logger.app({"Seq": 2})
+    logger.app({"Seq": 3})
+    release.set()
+    assert logger.flush(5)
+
+    stats = logger.WriteStats
+    assert stats["Coalesced"] == 1 and stats["Writes"] == 2
+    assert read(tmp_path, "app.log") == {"Seq": 3}
+    logger.close(5)
+
+def test_overflow_is_written_by_the_caller_except_the_file_in_flight(tmp_path):
+    logger = make_logger(tmp_path, queue_size=1)
+    entered, release = hold_writer(logger, "app.log")
+    logger.app({"Seq": 1})
+    assert entered.wait(5)
+
+    # the queue is full with the stats, the raw snapshot is written by the caller
+    logger.stats({"Seq": 1})
+    logger.raw({})
+    assert logger.WriteStats["Overflows"] == 1
+    assert read(tmp_path, "complete.log") == {}
+
+    # a newer snapshot of the file in flight is queued, it is written after the older one
+    logger.app({"Seq": 2})
+    assert logger.WriteStats["Overflows"] == 1
+    release.set()
+    assert logger.flush(5)
+    assert read(tmp_path, "app.log") == {"Seq": 2}
+
+    # the digest matches the file, the same snapshot is skipped
+    logger.app({"Seq": 2})
+    assert logger.WriteStats["Unchanged"] == 1
+    logger.close(5)
+
+def test_close_writes_the_pending_snapshots(tmp_path):
+    logger = make_logger(tmp_path)
+    entered, release = hold_writer(logger, "app.log")
+    logger.app({"Seq": 1})
+    assert entered.wait(5)
+    logger.app({"Seq": 2})
+    logger.stats({"Seq": 1})
+
+    threading.Timer(0.05, release.set).start()
+    logger.close(5)
+    assert read(tmp_path, "app.log") == {"Seq": 2}
+    assert read(tmp_path, "stats.log") == {"Seq": 1}
+    assert logger.QueueDepth == 0
+
+def make_serial_logger(tmp_path, **serial_log):
+    return data_logger.DataLogger({"Path": str(tmp_path) + "/", "SerialLog": serial_log})
+
+def serial_size(tmp_path, port):
+    path = tmp_path / ("iiotgw_serial_" + port + ".log")
+    return path.stat().st_size if path.exists() else 0
+
+def test_serial_log_is_flushed_at_the_byte_threshold(tmp_path):
+    logger = make_serial_logger(tmp_path, FlushBytes=10, FlushInterval=1000)
+    logger.serial_stream_log("ttyS0", "12345")
+    assert serial_size(tmp_path, "ttyS0") == 0
+    logger.serial_stream_log("ttyS0", "678901")
+    assert serial_size(tmp_path, "ttyS0") == 11
+    logger.close()
+
+def test_serial_log_is_flushed_by_the_periodic_flush(tmp_path):
+    logger = make_serial_logger(tmp_path, FlushBytes=1000, FlushInterval=1000)
+    logger.serial_stream_log("ttyS0", "12345")
+    logger.serial_stream_log("ttyS1", "678")
+    logger.flush_serial()
+    assert serial_size(tmp_path, "ttyS0") == 5 and serial_size(tmp_path, "ttyS1") == 3
+    logger.close()
+
+def test_least_recently_used_serial_log_is_closed(tmp_path):
+    logger = make_serial_logger(tmp_path, FlushBytes=1000, FlushInterval=1000, MaxHandles=2)
+    logger.serial_stream_log("ttyS0", "0")
+    logger.serial_stream_log("ttyS1", "1")
+    logger.serial_stream_log("ttyS0", "0")
+    logger.serial_stream_log("ttyS2", "2")
+
+    # ttyS1 is the least recently used, its data is written by the close
+    assert serial_size(tmp_path, "ttyS1") == 1 and serial_size(tmp_path, "ttyS0") == 0
+    logger.close()
+    assert serial_size(tmp_path, "ttyS0") == 2 and serial_size(tmp_path, "ttyS2") == 1
+
+def test_serial_log_can_be_disabled(tmp_path):
+    assert make_serial_logger(tmp_path).SerialLogEnabled
+    assert not make_serial_logger(tmp_path, Enable=False).SerialLogEnabled
+    assert not data_logger.DataLogger({"Path": str(tmp_path) + "/"}, False).SerialLogEnabled
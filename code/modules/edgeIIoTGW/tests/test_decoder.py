@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+#
+# File:    test_decoder.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the packet decoder registry and of the selection of its json backend
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import asyncio
+import importlib
+import json
+import sys
+
+import pytest
+
+import decoder
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+@pytest.fixture(autouse=True)
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+#
+# Reload the decoder with some json modules missing, the decoder is reloaded again at the end of the test.
+#
+@pytest.fixture
+def reload_without(monkeypatch):
+    def reload(*modules):
+        for name in modules:
+            monkeypatch.setitem(sys.modules, name, None)
+        return importlib.reload(decoder)
+    yield reload
+    monkeypatch.undo()
+    importlib.reload(decoder)
+
+def make_decoder():
+    packets = []
+
+    async def handler(payload, epoch):
+        packets.append((payload, epoch))
+
+    packet_decoder = decoder.PacketDecoder()
+    packet_decoder.register("DevSts", handler)
+    packet_decoder.register("ZbNet", handler)
+    return packet_decoder, packets
+
+def test_packets_are_dispatched_by_key():
+    packet_decoder, packets = make_decoder()
+    assert run(packet_decoder.decode(b'{"DevSts":{"UID":"A"},"Epoch":12}'))
+    assert run(packet_decoder.decode('{"ZbNet":{"Devices":[]}}\r\n'))
+    assert packets == [({"UID": "A"}, 12), ({"Devices": []}, 0)]
+
+def test_invalid_epoch():
+    packet_decoder, packets = make_decoder()
+    run(packet_decoder.decode(b'{"DevSts":{},"Epoch":"x"}'))
+    assert packets == [({}, -1)]
+
+def test_discarded_lines_are_counted():
+    packet_decoder, packets = make_decoder()
+    assert not run(packet_decoder.decode(b"garbage"))
+    assert not run(packet_decoder.decode(b"{"))
+    assert not run(packet_decoder.decode(b'{"DevSts":{"UID":}'))
+    assert not run(packet_decoder.decode(b'{"DevRtc":{}}'))
+    packet_decoder.unregister("DevSts")
+    assert not run(packet_decoder.decode(b'{"DevSts":{}}'))
+
+    stats = packet_decoder.stats
+    assert stats["Lines"] == 5 and stats["Rejected"] == 2 and stats["Errors"] == 1 and stats["Unknown"] == 2
+    assert packets == []
+
+def test_standard_library_backend(reload_without):
+    module = reload_without("orjson", "ujson")
+    assert module.JSON_BACKEND == "json"
+    assert module.json_loads is json.loads and module.json_dumps is None
+
+    packet_decoder, packets = make_decoder()
+    assert run(packet_decoder.decode(b'{"DevSts":{"T":215}}'))
+    assert packets == [({"T": 215}, 0)]
+    assert packet_decoder.stats["Backend"] == "json"
+
+def test_without_orjson_nothing_encodes_the_payloads(reload_without):
+    try:
+        import ujson
+        expected = "ujson"
+    except ImportError:
+        expected = "json"
+    module = reload_without("orjson")
+    assert module.JSON_BACKEND == expected
+    assert module.json_dumps is None
+
+def test_orjson_backend():
+    orjson = pytest.importorskip("orjson")
+    assert decoder.JSON_BACKEND == "orjson"
+    assert decoder.json_loads is orjson.loads and decoder.json_dumps is orjson.dumps
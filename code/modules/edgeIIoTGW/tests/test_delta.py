@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+#
+# File:    test_delta.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the change-only reporting of the node updates
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import delta
+import node_record
+
+def make_node(uid = "AA000001", **fields):
+    node = node_record.Node(uid)
+    for field in fields:
+        node[field] = fields[field]
+    return node
+
+def test_first_update_is_a_full_state():
+    delta_filter = delta.DeltaFilter()
+    node = make_node(Temperature=25.0, RSSI=-50)
+    state = delta_filter.filter(node, {"UID": node.UID, "Epoch": 1, "Temperature": 25.0})
+    assert state["Temperature"] == 25.0 and state["RSSI"] == -50 and "Battery" in state
+    assert delta_filter.stats["FullStates"] == 1
+
+def test_changes_within_the_deadbands_are_suppressed():
+    delta_filter = delta.DeltaFilter()
+    node = make_node(Temperature=25.0, RSSI=-50)
+    delta_filter.filter(node, {"UID": node.UID, "Epoch": 1})
+
+    assert delta_filter.filter(node, {"UID": node.UID, "Epoch": 2, "Temperature": 25.2, "RSSI": -47}) is None
+    assert delta_filter.stats["Suppressed"] == 1
+
+    update = delta_filter.filter(node, {"UID": node.UID, "Epoch": 3, "Temperature": 25.3, "RSSI": -47})
+    assert update == {"Temperature": 25.3, "UID": node.UID, "Epoch": 3}
+
+def test_the_deadband_is_measured_from_the_reported_value():
+    delta_filter = delta.DeltaFilter({"Deadbands": {"Temperature": 0.5}})
+    node = make_node(Temperature=20.0)
+    delta_filter.filter(node, {"UID": node.UID})
+
+    # a slow drift is reported once it exceeds the deadband from the last reported value
+    assert delta_filter.filter(node, {"Temperature": 20.3}) is None
+    assert delta_filter.filter(node, {"Temperature": 20.5}) is None
+    assert delta_filter.filter(node, {"Temperature": 20.6}) == {"Temperature": 20.6}
+    assert delta_filter.filter(node, {"Temperature": 20.9}) is None
+
+def test_deadband_boundaries():
+    delta_filter = delta.DeltaFilter({"Deadbands": {"Temperature": 0.2, "RSSI": 0, "CbM": 5}})
+    node = make_node(Temperature=25.0, RSSI=-50, CbM=10)
+    delta_filter.filter(node, {"UID": node.UID})
+
+    # a change equal to the deadband is suppressed in both directions, a zero deadband reports every change
+    assert delta_filter.filter(node, {"Temperature": 25.2}) is None
+    assert delta_filter.filter(node, {"Temperature": 24.8}) is None
+    assert delta_filter.filter(node, {"Temperature": 24.79}) == {"Temperature": 24.79}
+    assert delta_filter.filter(node, {"RSSI": -51}) == {"RSSI": -51}
+
+    # a value not numeric is compared without the deadband
+    assert delta_filter.filter(node, {"CbM": "n/a"}) == {"CbM": "n/a"}
+    assert delta_filter.filter(node, {"CbM": 12}) == {"CbM": 12}
+
+def test_nested_fields_use_their_own_deadband():
+    delta_filter = delta.DeltaFilter()
+    battery = {"Voltage": 3000, "Level": 80, "State": 1}
+    node = make_node(Battery=dict(battery))
+    delta_filter.filter(node, {"UID": node.UID})
+
+    assert delta_filter.filter(node, {"Battery": dict(battery, Level=81)}) is None
+    assert delta_filter.filter(node, {"Battery": dict(battery, Level=82)}) == {"Battery": dict(battery, Level=82)}
+    assert delta_filter.filter(node, {"Battery": dict(battery, Level=82, State=2)}) is not None
+
+def test_fields_without_deadband_are_reported_at_every_change():
+    delta_filter = delta.DeltaFilter()
+    node = make_node(State=1)
+    delta_filter.filter(node, {"UID": node.UID})
+    assert delta_filter.filter(node, {"State": 1}) is None
+    assert delta_filter.filter(node, {"State": 2}) == {"State": 2}
+
+def test_heartbeat_sends_a_full_state(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(delta.time, "monotonic", lambda: now[0])
+    delta_filter = delta.DeltaFilter({"Heartbeat": 60})
+    node = make_node(Temperature=25.0)
+    delta_filter.filter(node, {"UID": node.UID})
+
+    now[0] += 59
+    assert delta_filter.filter(node, {"Temperature": 25.0}) is None
+    now[0] += 1
+    state = delta_filter.filter(node, {"Temperature": 25.0})
+    assert state["UID"] == node.UID and state["Temperature"] == 25.0
+    assert delta_filter.stats["FullStates"] == 2
+
+def test_forget_makes_the_next_update_a_full_state():
+    delta_filter = delta.DeltaFilter()
+    node = make_node()
+    delta_filter.filter(node, {"UID": node.UID})
+    delta_filter.forget(node.UID)
+    assert "Battery" in delta_filter.filter(node, {"State": -1})
+
+def test_owned_fields_are_not_in_the_full_state():
+    delta_filter = delta.DeltaFilter(None, ["Temperature", "CbM"])
+    state = delta_filter.filter(make_node(Temperature=25.0), {})
+    assert not "Temperature" in state and not "CbM" in state
+    assert "RSSI" in state
@@ -0,0 +1,154 @@
+#!/usr/bin/python3
+#
+# File:    test_gw.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the gateway application with a stub client and a temporary configuration folder
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import asyncio
+import json
+import os
+
+import pytest
+
+import gw
+import stubs
+
+TEMPLATE_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "template_config", "config_app.json")
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+@pytest.fixture(autouse=True)
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+#
+# Gateway with the template configuration, the files and the background features are disabled.
+# @param sections the sections of config_app.json changed by the test
+#
+def make_gateway(tmp_path, monkeypatch, nodes = None, **sections):
+    with open(TEMPLATE_APP) as f:
+        config_app = json.load(f)
+    config_app["DataLogger"]["Enable"] = False
+    config_app["DataLogger"]["Config"]["Path"] = str(tmp_path) + "/"
+    for name in ("NodeRegistry", "Spool", "Ingress", "ConfigWatcher", "DeltaReporting"):
+        config_app[name]["Enable"] = False
+    for name in sections:
+        config_app[name].update(sections[name])
+
+    with open(tmp_path / "config_app.json", "w") as f:
+        json.dump(config_app, f)
+    with open(tmp_path / "config_net.json", "w") as f:
+        json.dump({"EdgeGateway": {}, "Nodes": nodes if not nodes is None else {}}, f)
+    monkeypatch.setattr(gw, "CONFIG_FOLDER", str(tmp_path) + "/")
+
+    sent = []
+    client = stubs.StubModuleClient(on_send=lambda message, output, now: sent.append(json.loads(message.data)))
+    return gw.GWApp(client), sent
+
+def test_first_packet_without_telemetry_is_not_aggregated(tmp_path, monkeypatch):
+    app, sent = make_gateway(tmp_path, monkeypatch, Aggregation={"Enable": True})
+    run(app.manage_node_packet({"UID": "AA000001", "ZbAddr": "0001"}))
+    run(app.manage_node_packet({"UID": "AA000001", "ZbAddr": "0001", "Temperature": 215}))
+    run(app.manage_node_packet({"UID": "AA000001", "ZbAddr": "0001", "Temperature": 225, "CbM": 7}))
+
+    # the default values of the new node (Temperature 0, CbM -1) are not samples
+    aggregate = dict(app._Aggregator.flush())["AA000001"]
+    assert aggregate["TemperatureCount"] == 2 and aggregate["TemperatureMin"] == 21.5
+    assert aggregate["CbMCount"] == 1 and aggregate["CbMMin"] == 7.0
+
+def test_nodes_are_found_by_normalized_address(tmp_path, monkeypatch):
+    app, sent = make_gateway(tmp_path, monkeypatch)
+    run(app.manage_node_packet({"UID": "AA000001", "ZbAddr": "ab01"}))
+    node = app.find_node_by_uid("AA000001")
+    assert node.Address == "AB01"
+    assert app.find_node_by_address(" ab01 ") is node
+    assert app.get_node("", "AB01") is node
+    assert app.find_node_by_address("") is None and app.find_node_by_address(None) is None
+
+    # a packet without UID is matched by its address
+    run(app.manage_node_packet({"ZbAddr": "AB01", "Temperature": 215}))
+    assert node.Temperature == 21.5 and len(app._Nodes) == 1
+
+def test_address_change_updates_the_index(tmp_path, monkeypatch):
+    app, sent = make_gateway(tmp_path, monkeypatch)
+    run(app.manage_node_packet({"UID": "AA000001", "ZbAddr": "0001"}))
+    run(app.manage_node_packet({"UID": "AA000001", "ZbAddr": "0002"}))
+    node = app.find_node_by_uid("AA000001")
+    assert app.find_node_by_address("0001") is None
+    assert app.find_node_by_address("0002") is node
+
+def test_address_reused_by_another_node(tmp_path, monkeypatch):
+    app, sent = make_gateway(tmp_path, monkeypatch)
+    run(app.manage_node_packet({"UID": "AA000001", "ZbAddr": "0001"}))
+    run(app.manage_node_packet({"UID": "AA000002", "ZbAddr": "0001"}))
+
+    # an unknown uid is a new node, the old owner loses the address
+    old, new = app.find_node_by_uid("AA000001"), app.find_node_by_uid("AA000002")
+    assert app.find_node_by_address("0001") is new
+    assert old.Address == "-" and new.Address == "0001"
+
+def test_warm_restart_restores_the_saved_nodes(tmp_path, monkeypatch):
+    registry = {"Enable": True, "Path": str(tmp_path) + "/"}
+    app, sent = make_gateway(tmp_path, monkeypatch, NodeRegistry=registry)
+    run(app.manage_node_packet({"UID": "AA000001", "ZbAddr": "0001"}))
+    run(app.manage_node_packet({"UID": "AA000002", "ZbAddr": "0002"}))
+    run(app.shutdown())
+
+    # the node is restored with its id at its first packet, found by its address
+    app, sent = make_gateway(tmp_path, monkeypatch, NodeRegistry=registry)
+    assert len(app._Nodes) == 0
+    run(app.manage_node_packet({"ZbAddr": "0002", "Temperature": 200}))
+    node = app.find_node_by_uid("AA000002")
+    assert node.Id == 1 and node.Address == "0002"
+    assert app.allocate_node_id() == 2
+
+def test_reload_of_the_network_configuration(tmp_path, monkeypatch):
+    app, sent = make_gateway(tmp_path, monkeypatch, nodes={"AA000001": {"Name": "Motor1"}})
+    run(app.manage_node_packet({"UID": "AA000001", "ZbAddr": "0001"}))
+    node = app.find_node_by_uid("AA000001")
+    assert node.Name == "Motor1"
+
+    net_config = {"EdgeGateway": {}, "Nodes": {"AA000001": {"Name": "Pump1"}}}
+    assert app.reload_conf(gw.CONFIG_NET_FILE, net_config)
+    assert node.Name == "Pump1"
+
+    # the same content is not a change
+    assert not app.reload_conf(gw.CONFIG_NET_FILE, json.loads(json.dumps(net_config)))
+
+def test_invalid_configuration_is_rejected(tmp_path, monkeypatch):
+    app, sent = make_gateway(tmp_path, monkeypatch, nodes={"AA000001": {"Name": "Motor1"}})
+    net_config = app._Config["Net"]
+    logging_config = app._Config["Logging"]
+
+    with pytest.raises(ValueError):
+        app.reload_conf(gw.CONFIG_APP_FILE, [])
+    with pytest.raises(ValueError):
+        app.reload_conf(gw.CONFIG_NET_FILE, {"Nodes": {"AA000001": "Motor1"}})
+    with pytest.raises(ValueError):
+        app.reload_conf(gw.CONFIG_APP_FILE, {"Logging": {"RateLimit": {"Unknown": 1}}})
+    with pytest.raises(ValueError):
+        app.reload_conf(gw.CONFIG_APP_FILE, {"DataLogger": {"Enable": "yes"}})
+
+    # the running configuration is kept
+    assert app._Config["Net"] is net_config and app._Config["Logging"] is logging_config
+
+def test_sections_applied_at_the_next_restart_are_not_reloaded(tmp_path, monkeypatch):
+    app, sent = make_gateway(tmp_path, monkeypatch)
+    aggregation = dict(app._Config["Aggregation"], Enable=not app._Config["Aggregation"].get("Enable", False))
+    assert not app.reload_conf(gw.CONFIG_APP_FILE, {"Aggregation": aggregation})
+    assert not app.reload_conf(gw.CONFIG_APP_FILE, {"Logging": app._Config["Logging"]})
+    assert app._Config["Aggregation"] != aggregation
@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+#
+# File:    test_hotlog.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the log level configuration and of the rate limited logger
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import logging
+
+import pytest
+
+import hotlog
+
+class _ListHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(hotlog.time, "monotonic", lambda: now[0])
+    return now
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger("test_hotlog")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = _ListHandler()
+    logger.handlers = [handler]
+    yield logger
+    logger.handlers = []
+
+def test_budget_and_summary_of_the_suppressed_messages(clock, logger):
+    hot = hotlog.RateLimitedLogger(logger, {"RateLimit": {"Count": 2, "Interval": 60}})
+    logged = [hot.info("NodeInfo", "node %d", n) for n in range(5)]
+    assert logged == [True, True, False, False, False]
+    assert hot.stats["Suppressed"] == 3
+
+    # the next message after the interval is preceded by the summary
+    clock[0] += 60
+    assert hot.info("NodeInfo", "node %d", 5)
+    assert logger.handlers[0].messages == ["node 0", "node 1", "NodeInfo: 3 messages suppressed in the last 60 s", "node 5"]
+
+def test_keys_have_their_own_budget(clock, logger):
+    hot = hotlog.RateLimitedLogger(logger, {"RateLimit": {"Count": 1}, "Keys": {"Incoming": {"Count": 3}}})
+    assert [hot.debug("Incoming", "in") for _ in range(4)] == [True, True, True, False]
+    assert hot.warning("Stale", "stale")
+    assert not hot.warning("Stale", "stale")
+
+def test_sampling(clock, logger):
+    hot = hotlog.RateLimitedLogger(logger, {"RateLimit": {"Count": 0, "Sample": 3}})
+    logged = [hot.info("NodeInfo", "node %d", n) for n in range(7)]
+    assert logged == [True, False, False, True, False, False, True]
+    assert hot.stats["Sampled"] == 4 and hot.stats["Suppressed"] == 0
+
+def test_disabled_level_is_not_counted(clock, logger):
+    logger.setLevel(logging.WARNING)
+    hot = hotlog.RateLimitedLogger(logger, {"RateLimit": {"Count": 1}})
+    assert not hot.info("NodeInfo", "node")
+    assert hot.error("NodeInfo", "error")
+    assert hot.stats["Suppressed"] == 0
+
+def test_configure_starts_the_budgets_again(clock, logger):
+    hot = hotlog.RateLimitedLogger(logger, {"RateLimit": {"Count": 1}})
+    hot.info("NodeInfo", "node")
+    assert not hot.info("NodeInfo", "node")
+    hot.configure({"RateLimit": {"Count": 2}})
+    assert hot.info("NodeInfo", "node") and hot.info("NodeInfo", "node")
+
+def test_validate_and_configure_levels():
+    assert hotlog.validate({}) == (logging.INFO, {})
+    assert hotlog.validate({"Level": "debug", "Loggers": {"azure": "WARNING"}}) == (logging.DEBUG, {"azure": logging.WARNING})
+    with pytest.raises(ValueError):
+        hotlog.validate({"Level": "LOUD"})
+    with pytest.raises(ValueError):
+        hotlog.validate({"RateLimit": {"Budget": 1}})
+
+    root = logging.getLogger()
+    level = root.level
+    try:
+        hotlog.configure({"Level": "ERROR", "Loggers": {"test_hotlog.child": "DEBUG"}})
+        assert root.level == logging.ERROR
+        assert logging.getLogger("test_hotlog.child").level == logging.DEBUG
+    finally:
+        root.setLevel(level)
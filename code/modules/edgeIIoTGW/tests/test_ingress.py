@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+#
+# File:    test_ingress.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the bounded ingress queues of the serial lines
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import asyncio
+
+import pytest
+
+import ingress
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+@pytest.fixture(autouse=True)
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+def line(uid, seq):
+    return b'{"DevSts":{"UID":"%s","Seq":%d}}' % (uid.encode(), seq)
+
+#
+# Queue the lines while the worker is held, then release it and return the processed lines.
+#
+def feed(config, lines):
+    processed = []
+    gate = asyncio.Event()
+
+    async def process(port, data):
+        await gate.wait()
+        processed.append(data)
+
+    queue = ingress.Ingress(process, config)
+
+    async def scenario():
+        producer = asyncio.ensure_future(_put_all(queue, lines))
+        await asyncio.sleep(0.01)
+        gate.set()
+        await producer
+        await queue.stop()
+
+    run(scenario())
+    return processed, queue.stats["Ports"]["p"]
+
+#
+# The worker takes the first line before the next ones are queued.
+#
+async def _put_all(queue, lines):
+    await queue.put("p", lines[0])
+    await asyncio.sleep(0)
+    for data in lines[1:]:
+        await queue.put("p", data)
+
+def test_lines_are_processed_in_order():
+    lines = [line("A", seq) for seq in range(5)]
+    processed, stats = feed({"MaxDepth": 10}, lines)
+    assert processed == lines
+    assert stats["Enqueued"] == 5 and stats["Processed"] == 5
+
+def test_drop_oldest():
+    lines = [line("A", seq) for seq in range(6)]
+    processed, stats = feed({"MaxDepth": 3, "Policy": ingress.POLICY_DROP_OLDEST}, lines)
+    # the first line is in the worker, the queue keeps the 3 newest
+    assert processed == [lines[0]] + lines[3:]
+    assert stats["Dropped"] == 2
+
+def test_block_keeps_every_line():
+    lines = [line("A", seq) for seq in range(6)]
+    processed, stats = feed({"MaxDepth": 2, "Policy": ingress.POLICY_BLOCK}, lines)
+    assert processed == lines
+    assert stats["Blocked"] > 0 and stats["Dropped"] == 0
+
+def test_conflate_only_when_the_queue_is_full():
+    lines = [line("A", seq) for seq in range(5)]
+    processed, stats = feed({"MaxDepth": 100, "Policy": ingress.POLICY_CONFLATE}, lines)
+    assert processed == lines
+    assert stats["Conflated"] == 0
+
+def test_conflate_replaces_the_queued_line_of_the_same_node():
+    lines = [line("A", 0), line("A", 1), line("B", 1), line("A", 2), line("C", 1)]
+    processed, stats = feed({"MaxDepth": 2, "Policy": ingress.POLICY_CONFLATE}, lines)
+    # A2 replaces A1 in its position, C1 has nothing to replace and drops the oldest line
+    assert processed == [line("A", 0), line("B", 1), line("C", 1)]
+    assert stats["Conflated"] == 1 and stats["Dropped"] == 1
+
+def test_conflation_key():
+    assert ingress.conflation_key(b'{"ZbNet":{"Devices":[]}}') == ingress.NETWORK_KEY
+    assert ingress.conflation_key(line("A", 1)) == b"A"
+    assert ingress.conflation_key(b'{"DevFw":{}}') is None
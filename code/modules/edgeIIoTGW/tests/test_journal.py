@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+#
+# File:    test_journal.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the append-only NDJSON journal and of its reader
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import os
+
+import pytest
+
+import data_logger
+import journal
+
+HOUR = 1700002800                               # 2023-11-14 23:00:00 UTC
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [float(HOUR)]
+    monkeypatch.setattr(journal.time, "time", lambda: now[0])
+    return now
+
+def test_records_are_partitioned_by_hour(tmp_path, clock):
+    writer = journal.JournalWriter(str(tmp_path))
+    writer.append(journal.KIND_NODE, "A", {"T": 1}, 10)
+    clock[0] += 1800
+    writer.append(journal.KIND_NETWORK, None, {"Devices": []})
+    clock[0] += 1800
+    writer.append(journal.KIND_NODE, "B", {"T": 2}, 11)
+    writer.close()
+
+    assert sorted(os.listdir(tmp_path)) == ["journal_2023111423.ndjson", "journal_2023111500.ndjson"]
+    records = list(journal.JournalReader(str(tmp_path)).read())
+    assert [(r["Kind"], r["UID"], r["Epoch"]) for r in records] == [("Node", "A", 10), ("Network", None, -1), ("Node", "B", 11)]
+    assert records[0]["Data"] == {"T": 1} and records[0]["Ts"] == HOUR
+    assert writer.records == 3
+
+def test_day_partition(tmp_path, clock):
+    writer = journal.JournalWriter(str(tmp_path), partition=journal.PARTITION_DAY)
+    writer.append(journal.KIND_NODE, "A", {})
+    clock[0] += 1800
+    writer.append(journal.KIND_NODE, "A", {})
+    writer.close()
+    assert os.listdir(tmp_path) == ["journal_20231114.ndjson"]
+    assert len(list(journal.JournalReader(str(tmp_path)).read())) == 2
+
+    with pytest.raises(Exception):
+        journal.JournalWriter(str(tmp_path), partition="Week")
+
+def test_reader_filters(tmp_path, clock):
+    writer = journal.JournalWriter(str(tmp_path))
+    for n in range(6):
+        writer.append(journal.KIND_NODE if n % 2 == 0 else journal.KIND_NETWORK, "A" if n % 3 == 0 else "B", {"N": n})
+        clock[0] += 1200
+    writer.close()
+
+    reader = journal.JournalReader(str(tmp_path))
+    assert len(reader.partitions()) == 2
+    # the partition of the first hour is not opened for a range in the second hour
+    assert len(reader.partitions(HOUR + 3600)) == 1
+    assert [r["Data"]["N"] for r in reader.read(start=HOUR + 1200, end=HOUR + 3600)] == [1, 2, 3]
+    assert [r["Data"]["N"] for r in reader.read(uid="A")] == [0, 3]
+    assert [r["Data"]["N"] for r in reader.read(kind=journal.KIND_NODE)] == [0, 2, 4]
+
+def test_truncated_record_and_other_files_are_skipped(tmp_path, clock):
+    writer = journal.JournalWriter(str(tmp_path))
+    writer.append(journal.KIND_NODE, "A", {"N": 0})
+    writer.close()
+    with open(tmp_path / "journal_2023111423.ndjson", "ab") as f:
+        f.write(b'{"Ts":1700002801,"Ki')
+    (tmp_path / "journal_latest.ndjson").write_bytes(b"")
+
+    reader = journal.JournalReader(str(tmp_path))
+    assert [r["Data"]["N"] for r in reader.read()] == [0]
+
+def test_data_logger_writes_the_journal(tmp_path, clock):
+    logger = data_logger.DataLogger({"Path": str(tmp_path) + "/", "Journal": {"Enable": True}})
+    logger.node_event("A", {"UID": "A", "Temperature": 21.5}, 7)
+    logger.network_event({"Devices": []}, 8)
+    logger.close()
+
+    records = list(journal.JournalReader(str(tmp_path), "iiotgw_" + journal.FILENAME_DEF).read())
+    assert [(r["Kind"], r["UID"], r["Epoch"]) for r in records] == [("Node", "A", 7), ("Network", None, 8)]
@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+#
+# File:    test_metrics.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the counters and of the latency histograms of the ingest pipeline
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import metrics
+
+def test_histogram_buckets():
+    histogram = metrics.Histogram()
+    histogram.record(0)                         # bucket 0
+    histogram.record(0.000001)                  # 1 us, bucket 1
+    histogram.record(0.000003)                  # 3 us, bucket 2
+    histogram.record(0.0001)                    # 100 us, bucket 7
+    histogram.record(10 ** 6)                   # last bucket
+
+    assert histogram.Count == 5 and histogram.Max == 10 ** 6
+    assert histogram.Buckets[0] == 1 and histogram.Buckets[1] == 1 and histogram.Buckets[2] == 1
+    assert histogram.Buckets[7] == 1 and histogram.Buckets[metrics.BUCKETS - 1] == 1
+
+def test_histogram_percentiles():
+    histogram = metrics.Histogram()
+    assert histogram.percentile(50) == 0
+
+    for i in range(99):
+        histogram.record(0.00001)               # 10 us, bucket 4
+    histogram.record(0.001)                     # 1000 us, bucket 10
+    assert histogram.percentile(50) == 16 and histogram.percentile(99) == 16
+    assert histogram.percentile(100) == 1024
+
+def test_histogram_snapshot():
+    histogram = metrics.Histogram()
+    assert histogram.snapshot() == {"N": 0, "Avg": 0.0, "Max": 0.0, "P50": 0, "P99": 0, "Buckets": {}}
+
+    histogram.record(0.00001)
+    histogram.record(0.00003)
+    snapshot = histogram.snapshot()
+    assert snapshot["N"] == 2 and snapshot["Avg"] == 20.0 and snapshot["Max"] == 30.0
+    assert snapshot["Buckets"] == {"16": 1, "32": 1}
+
+def test_disabled():
+    recorder = metrics.Metrics()
+    assert recorder.start() is None
+    recorder.stop("Decode", None)
+    recorder.observe("Decode", 0.001)
+    recorder.count("Lines")
+
+    snapshot = recorder.snapshot()
+    assert not snapshot["Enabled"] and snapshot["Counters"] == {} and snapshot["Timers"] == {}
+
+def test_timers():
+    recorder = metrics.Metrics(True)
+    start = recorder.start()
+    assert not start is None
+    recorder.stop("Decode", start)
+    recorder.observe("Decode", 0.001)
+    recorder.observe("Send", 0.002)
+
+    timers = recorder.snapshot()["Timers"]
+    assert sorted(timers) == ["Decode", "Send"]
+    assert timers["Decode"]["N"] == 2 and timers["Send"]["N"] == 1
+    assert timers["Send"]["Max"] == 2000.0
+
+def test_counters():
+    recorder = metrics.Metrics(True)
+    recorder.count("Lines")
+    recorder.count("Lines", 4)
+    recorder.count("Dropped")
+
+    # the recorded counters replace the counters of the caller with the same name
+    snapshot = recorder.snapshot({"Lines": 1, "Queued": 3})
+    assert snapshot["Enabled"]
+    assert snapshot["Counters"] == {"Lines": 5, "Queued": 3, "Dropped": 1}
+    assert snapshot["Time"] >= snapshot["Since"]
+
+def test_reset():
+    recorder = metrics.Metrics(True)
+    recorder.count("Lines")
+    recorder.observe("Decode", 0.001)
+    since = recorder.snapshot()["Since"]
+
+    recorder.reset()
+    snapshot = recorder.snapshot()
+    assert snapshot["Counters"] == {} and snapshot["Timers"] == {}
+    assert snapshot["Since"] >= since
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+#
+# File:    test_network_diff.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the difference between two ZbNet packets
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import network_diff
+
+def entry(uid, addr, rssi = -50, parent = "0000"):
+    return {"UID": uid, "ZbAddr": addr, "ZbPrntAddr": parent, "ZbTyp": 2, "ZbSts": 1, "RSSI": rssi}
+
+def test_first_packet_adds_every_entry():
+    diff = network_diff.NetworkDiff()
+    devices = [entry("A", "0001"), entry("B", "0002")]
+    assert diff.diff(devices) == (devices, [], [])
+    assert diff.stats["Added"] == 2 and diff.stats["Devices"] == 2
+
+def test_identical_packet_is_skipped():
+    diff = network_diff.NetworkDiff()
+    diff.diff([entry("A", "0001"), entry("B", "0002")])
+    devices = [entry("A", "0001"), entry("B", "0002")]
+    assert diff.diff(devices) == ([], devices, [])
+    assert diff.stats["UnchangedPackets"] == 1
+
+def test_changed_and_departed_entries():
+    diff = network_diff.NetworkDiff()
+    diff.diff([entry("A", "0001"), entry("B", "0002"), entry("C", "0003")])
+    changed, unchanged, departed = diff.diff([entry("A", "0001", -70), entry("B", "0002")])
+    assert changed == [entry("A", "0001", -70)]
+    assert unchanged == [entry("B", "0002")]
+    assert departed == [entry("C", "0003")]
+    assert diff.stats["Departed"] == 1 and diff.stats["Devices"] == 2
+
+def test_ignored_fields_do_not_make_a_change():
+    diff = network_diff.NetworkDiff({"IgnoreFields": ["RSSI"]})
+    diff.diff([entry("A", "0001", -50)])
+    assert diff.diff([entry("A", "0001", -80)])[0] == []
+    assert diff.diff([entry("A", "0001", -80, "0002")])[0] != []
+
+def test_refresh_reports_every_entry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(network_diff.time, "monotonic", lambda: now[0])
+    diff = network_diff.NetworkDiff({"RefreshInterval": 60})
+    devices = [entry("A", "0001")]
+    diff.diff(devices)
+
+    now[0] += 30
+    assert diff.diff(devices)[0] == []
+    now[0] += 30
+    assert diff.diff(devices)[0] == devices
+    assert diff.stats["Refreshes"] == 1
+
+def test_entries_without_uid_are_keyed_by_address():
+    diff = network_diff.NetworkDiff()
+    devices = [{"ZbAddr": "00ab", "ZbSts": 1}]
+    diff.diff(devices)
+    assert network_diff.NetworkDiff.key(devices[0]) == "@00AB"
+
+    diff.forget("A", "00Ab ")
+    assert diff.diff(devices)[0] == devices
+
+def test_forget_and_reset():
+    diff = network_diff.NetworkDiff()
+    devices = [entry("A", "0001"), entry("B", "0002")]
+    diff.diff(devices)
+    diff.forget("A")
+    assert diff.diff(devices)[0] == [devices[0]]
+
+    diff.reset()
+    assert diff.diff(devices)[0] == devices
+
+def test_uid_reported_later_is_the_same_device():
+    diff = network_diff.NetworkDiff()
+    diff.diff([{"ZbAddr": "0001", "ZbSts": 1}, entry("B", "0002")])
+
+    # the entry moves from the address key to the UID, nothing departs
+    devices = [entry("A", "0001"), entry("B", "0002")]
+    assert diff.diff(devices) == ([devices[0]], [devices[1]], [])
+    assert diff.stats["Rekeyed"] == 1 and diff.stats["Departed"] == 0
+
+    # the UID missing again is not a departure either
+    devices = [{"ZbAddr": "0001", "ZbSts": 1}, entry("B", "0002")]
+    assert diff.diff(devices) == ([devices[0]], [devices[1]], [])
+    assert diff.stats["Rekeyed"] == 2 and diff.stats["Devices"] == 2
+
+def test_another_uid_at_the_same_address_departs():
+    diff = network_diff.NetworkDiff()
+    diff.diff([entry("A", "0001")])
+    changed, unchanged, departed = diff.diff([entry("C", "0001")])
+    assert changed == [entry("C", "0001")] and departed == [entry("A", "0001")]
+    assert diff.stats["Rekeyed"] == 0
@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+#
+# File:    test_node_config.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the registry of the nodes provisioning configuration and of its free slots
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import copy
+import json
+
+import node_config
+
+NET_CONFIG = {
+    "EdgeGateway": {},
+    "Nodes": {
+        "AA000001": {"Name": "Known"},
+        "NODE0001": {"Name": "Slot1"},
+        "NODE0002": {"Name": "Slot2"}
+    }
+}
+
+def make_registry(tmp_path, net_config = None):
+    net_config = copy.deepcopy(net_config if not net_config is None else NET_CONFIG)
+    return node_config.NodeConfigRegistry(net_config, str(tmp_path / "config_net.json"))
+
+def read(tmp_path):
+    with open(tmp_path / "config_net.json") as f:
+        return json.load(f)
+
+def test_known_uid_keeps_its_configuration(tmp_path):
+    registry = make_registry(tmp_path)
+    assert registry.assign("AA000001") == {"Name": "Known"}
+    assert registry.free_slots == 2 and not registry.dirty
+    assert registry.assign("") is None
+
+def test_free_slots_are_assigned_in_file_order(tmp_path):
+    registry = make_registry(tmp_path)
+    assert registry.assign("BB000001") == {"Name": "Slot1"}
+    assert registry.assign("BB000002") == {"Name": "Slot2"}
+    assert registry.assign("BB000003") is None
+    # an assigned uid keeps its slot
+    assert registry.assign("BB000001") == {"Name": "Slot1"}
+    assert registry.free_slots == 0
+    assert registry.get("BB000003") is None
+
+def test_assignment_is_saved_by_the_flush(tmp_path):
+    registry = make_registry(tmp_path)
+    registry.assign("BB000001")
+    assert registry.dirty
+    assert not (tmp_path / "config_net.json").exists()
+
+    assert registry.flush()
+    assert list(read(tmp_path)["Nodes"]) == ["AA000001", "NODE0002", "BB000001"]
+    assert not registry.flush()
+
+def test_released_slot_is_free_again(tmp_path):
+    registry = make_registry(tmp_path)
+    registry.assign("BB000001")
+    registry.flush()
+
+    # the uid renamed back to a slot in the file is a free slot of the next registry
+    net_config = read(tmp_path)
+    net_config["Nodes"]["NODE0003"] = net_config["Nodes"].pop("BB000001")
+    registry = make_registry(tmp_path, net_config)
+    assert registry.free_slots == 2
+    assert registry.assign("CC000001") == {"Name": "Slot2"}
+    assert registry.assign("CC000002") == {"Name": "Slot1"}
+
+def test_adopt_keeps_the_assignments_of_the_previous_registry(tmp_path):
+    previous = make_registry(tmp_path)
+    previous.assign("BB000001")
+
+    # the file is edited from a copy taken before the assignment
+    net_config = copy.deepcopy(NET_CONFIG)
+    net_config["Nodes"]["AA000001"]["Name"] = "Renamed"
+    registry = make_registry(tmp_path, net_config)
+    assert registry.adopt(previous) == 1
+    assert registry.get("BB000001") == {"Name": "Slot1"}
+    assert registry.get("AA000001") == {"Name": "Renamed"}
+    assert registry.free_slots == 1 and registry.dirty
+
+    # a slot changed in the new file is not taken back
+    net_config["Nodes"]["NODE0001"]["Name"] = "Changed"
+    registry = make_registry(tmp_path, net_config)
+    assert registry.adopt(previous) == 0
+    assert registry.get("BB000001") is None
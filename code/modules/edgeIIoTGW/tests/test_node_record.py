@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+#
+# File:    test_node_record.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the compact node record and of its projections
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import json
+
+import pytest
+
+from node_record import FIELDS, Node, nodes_to_dict, projection
+
+def make_node(uid = "00124B0001", **fields):
+    node = Node(uid)
+    for field in fields:
+        node[field] = fields[field]
+    return node
+
+def test_new_node_defaults():
+    node = Node("00124B0001")
+    assert node.UID == "00124B0001" and node.Address == "-" and node.Parent == "-"
+    assert node.CbM == -1 and node.Provisioned == 0 and node.Config is None
+
+def test_slots():
+    node = Node("00124B0001")
+    with pytest.raises(AttributeError):
+        node.Unknown = 1
+    assert not hasattr(node, "__dict__")
+
+def test_dictionary_access():
+    node = make_node(Name = "Motor1", RSSI = -60)
+    assert node["Name"] == "Motor1" and node["RSSI"] == -60
+    assert "Temperature" in node and not "Unknown" in node
+    assert list(node.keys()) == list(FIELDS)
+
+    with pytest.raises(KeyError):
+        node["Unknown"]
+    with pytest.raises(KeyError):
+        node[0]
+    with pytest.raises(KeyError):
+        node["Unknown"] = 1
+
+    # Config is an attribute but not an output field
+    assert not "Config" in node
+    with pytest.raises(KeyError):
+        node["Config"] = {}
+
+def test_to_dict():
+    node = make_node(Name = "Motor1", Temperature = 21.5)
+    node.Config = {"Name": "Motor1"}
+    fields = node.to_dict()
+    assert tuple(fields) == FIELDS
+    assert fields["Name"] == "Motor1" and fields["Temperature"] == 21.5
+    assert not "Config" in fields
+    assert json.loads(json.dumps(fields)) == fields
+
+def test_projection():
+    node = make_node(Name = "Motor1", RSSI = -60, CbM = 3)
+
+    assert projection([])(node) == {}
+    assert projection(["Unknown", "Config"])(node) == {}
+    assert projection(["RSSI"])(node) == {"RSSI": -60}
+    assert projection(["CbM", "Unknown", "Name"])(node) == {"CbM": 3, "Name": "Motor1"}
+
+    # the projection reads the current values of the node
+    get_fields = projection(["UID", "RSSI"])
+    node.RSSI = -70
+    assert get_fields(node) == {"UID": "00124B0001", "RSSI": -70}
+
+def test_nodes_to_dict():
+    nodes = {"A": make_node("A", Name = "Motor1"), "B": make_node("B")}
+    fields = nodes_to_dict(nodes)
+    assert list(fields) == ["A", "B"]
+    assert fields["A"] == nodes["A"].to_dict() and fields["B"]["UID"] == "B"
+    assert nodes_to_dict({}) == {}
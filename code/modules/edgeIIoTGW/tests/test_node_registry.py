@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+#
+# File:    test_node_registry.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the persistent registry of the nodes (journal replay and compaction)
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import node_record
+import node_registry
+
+def make_registry(tmp_path, **config):
+    config["Path"] = str(tmp_path)
+    registry = node_registry.NodeRegistry(config)
+    registry.load()
+    return registry
+
+def make_node(uid, node_id, address, provisioned = 0):
+    node = node_record.Node(uid)
+    node.Id = node_id
+    node.Name = "Node" + uid[-2:]
+    node.Address = address
+    node.Provisioned = provisioned
+    return node
+
+def journal_lines(tmp_path):
+    with open(tmp_path / ("iiotgw_" + node_registry.NodeRegistry.JOURNAL_FILE)) as f:
+        return f.read().splitlines()
+
+def test_journal_is_replayed_at_load(tmp_path):
+    registry = make_registry(tmp_path)
+    assert registry.put(make_node("AA000001", 0, "0001", 1))
+    assert registry.put(make_node("AA000002", 1, "0002"))
+    assert registry.put(make_node("AA000001", 0, "0003", 1))
+    registry.close()
+
+    reloaded = make_registry(tmp_path)
+    assert reloaded.get("AA000001")["Address"] == "0003"
+    assert reloaded.find_by_address("0003")["UID"] == "AA000001"
+    assert reloaded.find_by_address("0001") is None
+    assert reloaded.next_id == 2
+    assert reloaded.stats["JournalEntries"] == 3
+
+def test_unchanged_node_is_not_written(tmp_path):
+    registry = make_registry(tmp_path)
+    node = make_node("AA000001", 0, "0001")
+    assert registry.put(node)
+    node.Temperature = 25.0
+    assert not registry.put(node)
+    assert len(journal_lines(tmp_path)) == 1
+
+def test_only_a_completed_provisioning_is_kept(tmp_path):
+    registry = make_registry(tmp_path)
+    registry.put(make_node("AA000001", 0, "0001", -1))
+    registry.put(make_node("AA000002", 1, "0002", 1))
+    registry.close()
+
+    reloaded = make_registry(tmp_path)
+    assert reloaded.get("AA000001")["Provisioned"] == 0
+    assert reloaded.get("AA000002")["Provisioned"] == 1
+
+def test_compaction_writes_a_snapshot_and_clears_the_journal(tmp_path):
+    registry = make_registry(tmp_path, CompactEvery=3)
+    for n in range(4):
+        registry.put(make_node("AA00000%d" % n, n, "000%d" % n))
+    assert registry.stats["Compactions"] == 1
+    assert len(journal_lines(tmp_path)) == 1
+    registry.close()
+
+    reloaded = make_registry(tmp_path)
+    assert reloaded.stats["Records"] == 4 and reloaded.stats["JournalEntries"] == 1
+    assert reloaded.get("AA000000")["Address"] == "0000"
+
+def test_truncated_journal_line_is_skipped(tmp_path):
+    registry = make_registry(tmp_path)
+    registry.put(make_node("AA000001", 0, "0001"))
+    registry.close()
+    with open(tmp_path / ("iiotgw_" + node_registry.NodeRegistry.JOURNAL_FILE), "a") as f:
+        f.write('{"UID":"AA000002","Id":1,"Na')
+
+    reloaded = make_registry(tmp_path)
+    assert reloaded.stats["Records"] == 1
+    assert reloaded.get("AA000002") is None
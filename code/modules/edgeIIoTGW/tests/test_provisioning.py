@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+#
+# File:    test_provisioning.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the bounded background queue of the node provisioning
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import asyncio
+
+import pytest
+
+import inference
+import provisioning
+import stubs
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+@pytest.fixture(autouse=True)
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+#
+# Provisioning stub: the uids in failures fail the given number of times, the calls are recorded.
+#
+class Provisioner():
+
+    def __init__(self, failures = None, latency = 0.0):
+        self.failures = dict(failures) if not failures is None else {}
+        self.latency = latency
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, config):
+        uid = config["UID"]
+        self.calls.append(uid)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.failures.get(uid, 0) > 0:
+                self.failures[uid] -= 1
+                raise ConnectionError("provisioning of " + uid + " failed")
+        finally:
+            self.running -= 1
+
+def make_queue(provisioner, max_retry = 0, **config):
+    done = []
+    config.setdefault("Backoff", 0.01)
+    queue = provisioning.ProvisioningQueue(provisioner, max_retry, config, lambda uid, success: done.append((uid, success)))
+    return queue, done
+
+def test_request_in_flight_is_deduplicated():
+    provisioner = Provisioner(latency=0.01)
+    queue, done = make_queue(provisioner)
+    assert queue.request("A", {"UID": "A"})
+    assert not queue.request("A", {"UID": "A"})
+    assert queue.is_pending("A")
+    run(queue.join())
+
+    assert provisioner.calls == ["A"] and done == [("A", True)]
+    assert queue.stats["Deduplicated"] == 1 and queue.stats["InFlight"] == 0
+
+    # the request is accepted again once done
+    assert queue.request("A", {"UID": "A"})
+    run(queue.join())
+
+def test_concurrency_is_bounded():
+    provisioner = Provisioner(latency=0.01)
+    queue, done = make_queue(provisioner, Concurrency=2)
+    for uid in "ABCDE":
+        queue.request(uid, {"UID": uid})
+    run(queue.join())
+    assert provisioner.max_running == 2
+    assert queue.stats["Succeeded"] == 5
+
+def test_retry_with_backoff_releases_the_slot():
+    provisioner = Provisioner({"A": 2})
+    queue, done = make_queue(provisioner, 3, Concurrency=1, Backoff=0.05)
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    queue.request("A", {"UID": "A"})
+    queue.request("B", {"UID": "B"})
+    run(queue.join())
+
+    # B is provisioned during the backoff of A, the delays are 0.05 then 0.1 s
+    assert provisioner.calls == ["A", "B", "A", "A"]
+    assert done == [("B", True), ("A", True)]
+    assert loop.time() - start >= 0.15
+    assert queue.stats["Retries"] == 2 and queue.stats["Failed"] == 0
+
+def test_backoff_is_capped():
+    provisioner = Provisioner({"A": 3})
+    queue, done = make_queue(provisioner, 3, Backoff=0.02, BackoffMax=0.02)
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    queue.request("A", {"UID": "A"})
+    run(queue.join())
+    assert done == [("A", True)]
+    # without the cap the delays would be 0.02, 0.04 and 0.08 s
+    assert loop.time() - start < 0.12
+
+def test_failed_uid_waits_for_the_cooldown():
+    provisioner = Provisioner({"A": 1, "B": 1})
+    queue, done = make_queue(provisioner, FailureCooldown=0.05)
+    queue.request("A", {"UID": "A"})
+    run(queue.join())
+    assert done == [("A", False)]
+
+    assert not queue.request("A", {"UID": "A"})
+    assert queue.stats["Cooldown"] == 1
+
+    run(asyncio.sleep(0.06))
+    assert queue.request("A", {"UID": "A"})
+    run(queue.join())
+    assert done[-1] == ("A", True)
+
+def test_stop_cancels_the_requests():
+    provisioner = Provisioner(latency=10)
+    queue, done = make_queue(provisioner)
+    queue.request("A", {"UID": "A"})
+    run(asyncio.sleep(0))
+    run(queue.stop())
+    assert queue.stats["InFlight"] == 0 and done == []
+
+def test_set_nodes_provisions_every_node_once(monkeypatch):
+    monkeypatch.setenv("IOTEDGE_DEVICEID", "test-gw")
+    client = stubs.StubModuleClient()
+    nodes = [{"id_scope": "-", "device_id": "Node%d" % n, "primary_key": "-", "device_physical_id": "DP%d" % n,
+              "device_template_id": "T"} for n in range(3)]
+    run(inference.Inference(client).set_nodes(nodes + nodes[:1]))
+    assert client.methods == 3
+
+    client.fail(1)
+    with pytest.raises(ConnectionError):
+        run(inference.Inference(client).set_nodes(nodes))
+    assert client.methods == 5
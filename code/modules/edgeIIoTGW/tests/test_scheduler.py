@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+#
+# File:    test_scheduler.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the non-blocking periodic task scheduler
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import asyncio
+
+import pytest
+
+import scheduler
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+@pytest.fixture(autouse=True)
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+#
+# Run the scheduler for a time, then stop it.
+#
+def run_for(tasks, seconds):
+    async def scenario():
+        tasks.start()
+        await asyncio.sleep(seconds)
+        await tasks.stop()
+    run(scenario())
+
+def test_invalid_interval():
+    with pytest.raises(Exception):
+        scheduler.ScheduledTask("Bad", lambda: None, 0)
+
+def test_functions_and_coroutines_run_periodically():
+    calls = []
+
+    async def coroutine():
+        calls.append("coroutine")
+
+    tasks = scheduler.Scheduler()
+    tasks.add_task("Function", lambda: calls.append("function"), 0.02, delay=0)
+    tasks.add_task("Coroutine", coroutine, 0.02, delay=0)
+    run_for(tasks, 0.09)
+
+    stats = tasks.stats
+    assert 3 <= stats["Function"]["Runs"] <= 6 and 3 <= stats["Coroutine"]["Runs"] <= 6
+    assert calls.count("function") == stats["Function"]["Runs"]
+    assert not tasks.isRunning
+
+def test_first_tick_after_the_interval():
+    calls = []
+    tasks = scheduler.Scheduler()
+    tasks.add_task("Late", lambda: calls.append(1), 0.2)
+    run_for(tasks, 0.05)
+    assert calls == []
+
+def test_overrun_skips_the_expired_ticks():
+    durations = [0.05]
+
+    async def slow():
+        if len(durations) > 0:
+            await asyncio.sleep(durations.pop())
+
+    tasks = scheduler.Scheduler()
+    tasks.add_task("Slow", slow, 0.02, delay=0)
+    run_for(tasks, 0.1)
+
+    # the first run lasts 2.5 intervals: its ticks at 0.02 and 0.04 are missed, not run back to back
+    stats = tasks.stats["Slow"]
+    assert stats["Overruns"] == 1
+    assert stats["Missed"] == 2
+    assert stats["MaxDuration"] >= 0.05
+    assert 2 <= stats["Runs"] <= 4
+
+def test_error_is_counted_and_the_task_continues():
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise ValueError("failure")
+
+    tasks = scheduler.Scheduler()
+    tasks.add_task("Failing", failing, 0.02, delay=0)
+    run_for(tasks, 0.05)
+    assert len(calls) >= 2
+    assert tasks.stats["Failing"]["Errors"] == len(calls)
+
+def test_add_and_remove_while_running():
+    calls = []
+
+    async def scenario():
+        tasks.start()
+        tasks.add_task("Added", lambda: calls.append(1), 0.01, delay=0)
+        await asyncio.sleep(0.03)
+        assert tasks.remove_task("Added")
+        count = len(calls)
+        await asyncio.sleep(0.03)
+        assert len(calls) == count
+        await tasks.stop()
+
+    tasks = scheduler.Scheduler()
+    run(scenario())
+    assert len(calls) >= 2
+    assert not tasks.remove_task("Added")
+    tasks.add_task("Other", lambda: None, 1)
+    with pytest.raises(Exception):
+        tasks.add_task("Other", lambda: None, 1)
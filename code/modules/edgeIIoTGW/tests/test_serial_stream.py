@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+#
+# File:    test_serial_stream.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the reassembly of the serial lines
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import serial_stream
+
+def test_lines_split_across_chunks_are_reassembled():
+    stream = serial_stream.SerialStreamReassembler()
+    assert stream.feed(b'{"DevSts":') == []
+    assert stream.pending == 10
+    assert stream.feed(b'{"UID":"A"}}\r\n{"ZbNet"') == [b'{"DevSts":{"UID":"A"}}']
+    assert stream.feed(b':{}}\n\n') == [b'{"ZbNet":{}}']
+    assert stream.pending == 0
+    assert stream.lines == 2
+
+def test_several_lines_in_one_chunk():
+    stream = serial_stream.SerialStreamReassembler()
+    assert stream.feed(b"a\nb\r\nc\nd") == [b"a", b"b", b"c"]
+    assert stream.feed(b"\n") == [b"d"]
+
+def test_too_long_line_is_dropped_up_to_the_next_new_line():
+    stream = serial_stream.SerialStreamReassembler(max_line_length=8)
+    assert stream.feed(b"0123456789") == []
+    assert stream.pending == 0
+    assert stream.feed(b"abcdef") == []
+    assert stream.feed(b"gh\nok\n") == [b"ok"]
+    assert stream.dropped_lines == 1
+
+def test_too_long_complete_line_is_dropped():
+    stream = serial_stream.SerialStreamReassembler(max_line_length=4)
+    assert stream.feed(b"123456\nabc\n") == [b"abc"]
+    assert stream.dropped_lines == 1
+
+def test_multibyte_characters_split_across_chunks_are_decoded():
+    stream = serial_stream.SerialStreamReassembler()
+    data = "temp 25°C\n".encode("utf-8")
+    split = data.index(b"\xc2") + 1
+    assert stream.decode_chunk(data[:split]) == "temp 25"
+    assert stream.decode_chunk(data[split:]) == "°C\n"
+
+def test_reset_discards_the_pending_data():
+    stream = serial_stream.SerialStreamReassembler()
+    stream.feed(b"partial")
+    stream.reset()
+    assert stream.pending == 0
+    assert stream.feed(b"line\n") == [b"line"]
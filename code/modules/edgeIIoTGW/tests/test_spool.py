@@ -0,0 +1,171 @@
+#!/usr/bin/python3
+#
+# File:    test_spool.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the disk spool of the cloud messages and of its replay through Inference
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import asyncio
+import json
+
+import pytest
+
+import inference
+import spool
+import stubs
+
+CHANNEL = "identitytranslation_output"
+
+def make_spool(tmp_path, **config):
+    config["Path"] = str(tmp_path)
+    message_spool = spool.MessageSpool(config)
+    assert message_spool.open()
+    return message_spool
+
+def make_inference(tmp_path, **config):
+    received = []
+    client = stubs.StubModuleClient(on_send=lambda message, output, now: received.append(json.loads(message.data)))
+    return client, inference.Inference(client, make_spool(tmp_path, **config)), received
+
+def send(node_inference, device, seq):
+    return asyncio.get_event_loop().run_until_complete(node_inference.node_send_message(device, {"Dev": device, "Seq": seq}, CHANNEL))
+
+def drain(node_inference, interval = 1000.0):
+    return asyncio.get_event_loop().run_until_complete(node_inference.drain_spool(interval))
+
+@pytest.fixture(autouse=True)
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+def test_failed_messages_are_spooled_and_replayed_in_order(tmp_path):
+    client, node_inference, received = make_inference(tmp_path)
+    client.fail()
+    send(node_inference, "A", 1)
+    send(node_inference, "B", 1)
+    send(node_inference, "A", 2)
+    assert node_inference._Spool.count == 3
+
+    # the cloud is back, the new message of A waits for the spooled ones
+    client.set_failing(False)
+    send(node_inference, "A", 3)
+    send(node_inference, "C", 1)
+    assert received == [{"Dev": "C", "Seq": 1}]
+    assert node_inference._Spool.count == 4
+
+    assert drain(node_inference) == 4
+    assert [(m["Dev"], m["Seq"]) for m in received[1:]] == [("A", 1), ("B", 1), ("A", 2), ("A", 3)]
+    assert node_inference._Spool.count == 0
+    assert not node_inference._Spool.is_pending("A")
+    assert node_inference._Spool.stats["Replayed"] == 4
+
+def test_replay_stops_at_the_first_failure(tmp_path):
+    client, node_inference, received = make_inference(tmp_path)
+    client.fail()
+    for seq in range(3):
+        send(node_inference, "A", seq)
+    client.set_failing(False)
+
+    client.fail(1)
+    assert drain(node_inference) == 0
+    assert node_inference._Spool.count == 3
+
+    assert drain(node_inference) == 3
+    assert [m["Seq"] for m in received] == [0, 1, 2]
+
+def test_replay_is_limited_by_the_drain_rate(tmp_path):
+    client, node_inference, received = make_inference(tmp_path, DrainRate=2)
+    client.fail()
+    for seq in range(5):
+        send(node_inference, "A", seq)
+    client.set_failing(False)
+
+    assert drain(node_inference, 1.0) == 2
+    assert drain(node_inference, 1.0) == 2
+    assert drain(node_inference, 1.0) == 1
+    assert [m["Seq"] for m in received] == [0, 1, 2, 3, 4]
+
+def test_max_messages_evicts_the_oldest(tmp_path):
+    message_spool = make_spool(tmp_path, MaxMessages=3)
+    for seq in range(5):
+        assert message_spool.put("A" if seq % 2 == 0 else "B", CHANNEL, b"%d" % seq)
+
+    assert message_spool.count == 3
+    assert message_spool.stats["Evicted"] == 2
+    assert [row[3] for row in message_spool.peek(10)] == [b"2", b"3", b"4"]
+
+def test_max_bytes_evicts_the_oldest_and_rejects_a_message_too_big(tmp_path):
+    message_spool = make_spool(tmp_path, MaxBytes=10)
+    for seq in range(4):
+        assert message_spool.put("A", CHANNEL, b"%04d" % seq)
+
+    assert message_spool.count == 2
+    assert message_spool.stats["Bytes"] == 8
+    assert [row[3] for row in message_spool.peek(10)] == [b"0002", b"0003"]
+
+    assert not message_spool.put("A", CHANNEL, b"x" * 11)
+    assert message_spool.stats["Rejected"] == 1
+    assert message_spool.count == 2
+
+def test_drop_newest_rejects_the_new_messages(tmp_path):
+    message_spool = make_spool(tmp_path, MaxMessages=2, Eviction=spool.EVICTION_DROP_NEWEST)
+    assert message_spool.put("A", CHANNEL, b"0")
+    assert message_spool.put("A", CHANNEL, b"1")
+    assert not message_spool.put("A", CHANNEL, b"2")
+
+    assert message_spool.stats["Rejected"] == 1
+    assert [row[3] for row in message_spool.peek(10)] == [b"0", b"1"]
+
+def test_purge_removes_the_messages_older_than_max_age(tmp_path, monkeypatch):
+    message_spool = make_spool(tmp_path, MaxAge=60)
+    now = 1000000.0
+    monkeypatch.setattr(spool.time, "time", lambda: now)
+    message_spool.put("A", CHANNEL, b"old")
+    message_spool.put("B", CHANNEL, b"old")
+
+    now += 30
+    message_spool.put("A", CHANNEL, b"new")
+    now += 40
+    assert message_spool.purge() == 2
+
+    assert message_spool.count == 1
+    assert message_spool.stats["Expired"] == 2
+    assert message_spool.is_pending("A")
+    assert not message_spool.is_pending("B")
+    assert [row[3] for row in message_spool.peek(10)] == [b"new"]
+
+def test_reopen_rebuilds_the_counters(tmp_path):
+    message_spool = make_spool(tmp_path)
+    message_spool.put("A", CHANNEL, b"123")
+    message_spool.put("B", CHANNEL, b"45")
+    message_spool.put("A", CHANNEL, b"6")
+    message_spool.close()
+
+    reopened = make_spool(tmp_path)
+    assert reopened.count == 3
+    assert reopened.stats["Bytes"] == 6
+    assert reopened.stats["Devices"] == 2
+    assert reopened.is_pending("A") and reopened.is_pending("B")
+    assert [row[1] for row in reopened.peek(10)] == ["A", "B", "A"]
+
+def test_closed_spool_rejects_every_operation(tmp_path):
+    message_spool = make_spool(tmp_path)
+    message_spool.put("A", CHANNEL, b"123")
+    message_id, device, channel, payload = message_spool.peek(1)[0]
+    message_spool.close()
+
+    assert not message_spool.remove(message_id, device, len(payload))
+    assert not message_spool.put("A", CHANNEL, b"4")
+    assert message_spool.peek(10) == []
+    assert message_spool.purge() == 0
@@ -0,0 +1,137 @@
+#!/usr/bin/python3
+#
+# File:    test_topology.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Tests of the incremental graph of the ZigBee topology
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import random
+
+import topology
+
+NO = topology.NO_ADDRESS
+
+def make_mesh():
+    graph = topology.TopologyGraph()
+    graph.update("C", "0000", NO)
+    graph.update("R1", "0001", "0000")
+    graph.update("R2", "0002", "0001")
+    graph.update("E1", "0003", "0002")
+    graph.update("E2", "0004", "0001")
+    return graph
+
+def test_parents_depth_and_subtree():
+    graph = make_mesh()
+    assert graph.roots() == ["C"]
+    assert graph.parent("E1") == "R2"
+    assert graph.children("R1") == {"R2", "E2"}
+    assert [graph.depth(uid) for uid in ("C", "R1", "R2", "E1")] == [0, 1, 2, 3]
+    assert graph.subtree_size("C") == 5 and graph.subtree_size("R1") == 4
+    assert graph.stats["MaxDepth"] == 3
+
+def test_update_without_change():
+    graph = make_mesh()
+    assert not graph.update("R2", "0002", "0001")
+    assert graph.update("R2", "0002", "0000")
+
+def test_reparent_moves_the_subtree():
+    graph = make_mesh()
+    graph.update("R2", "0002", "0000")
+    assert graph.parent("R2") == "C"
+    assert graph.depth("E1") == 2
+    assert graph.subtree_size("R1") == 2 and graph.subtree_size("C") == 5
+    assert graph.stats["Reparented"] == 1
+
+def test_child_before_parent_waits_as_orphan():
+    graph = topology.TopologyGraph()
+    graph.update("E1", "0003", "0002")
+    assert graph.is_orphan("E1")
+    assert graph.orphans() == {"E1": "0002"}
+
+    graph.update("R2", "0002", NO)
+    assert graph.parent("E1") == "R2"
+    assert not graph.is_orphan("E1")
+    assert graph.subtree_size("R2") == 2
+
+def test_address_change_detaches_the_children():
+    graph = make_mesh()
+    graph.update("R2", "0009", "0001")
+    assert graph.is_orphan("E1")
+    assert graph.subtree_size("R1") == 3
+
+    # a node taking the old address adopts the children
+    graph.update("R3", "0002", "0001")
+    assert graph.parent("E1") == "R3"
+
+def test_address_reused_by_another_node():
+    graph = make_mesh()
+    graph.update("R9", "0002", "0000")
+    assert graph.parent("E1") == "R9"
+    # the old owner keeps its parent but loses its address and its children
+    assert graph.children("R2") == set()
+    assert graph.parent("R2") == "R1" and graph.subtree_size("R1") == 3
+
+def test_loop_is_rejected():
+    graph = make_mesh()
+    graph.update("R1", "0001", "0003")
+    assert graph.stats["Loops"] == 1
+    assert graph.is_orphan("R1")
+    assert graph.snapshot()["Loops"] == ["R1"]
+
+    # the rejected parent is checked again at the next update
+    graph.update("E1", "0003", "0000")
+    graph.update("R1", "0001", "0003")
+    assert graph.parent("R1") == "E1"
+    assert graph.stats["Loops"] == 0
+
+def test_remove_keeps_the_children_waiting():
+    graph = make_mesh()
+    assert graph.remove("R2")
+    assert not "R2" in graph
+    assert graph.orphans() == {"E1": "0002"}
+    assert graph.subtree_size("R1") == 2
+    assert not graph.remove("R2")
+
+def test_snapshot():
+    snapshot = make_mesh().snapshot()
+    assert snapshot["Nodes"] == 5 and snapshot["Roots"] == ["C"]
+    assert snapshot["Routers"]["R1"] == {"Addr": "0001", "Depth": 1, "Subtree": 4, "Children": ["E2", "R2"]}
+    assert not "E1" in snapshot["Routers"]
+
+def check_against_recomputation(graph):
+    for uid in list(graph._Address):
+        chain = [uid]
+        while not graph.parent(chain[-1]) is None:
+            chain.append(graph.parent(chain[-1]))
+            assert len(chain) <= len(graph)
+        assert graph.depth(uid) == len(chain) - 1
+
+        size = 1
+        stack = list(graph.children(uid))
+        while len(stack) > 0:
+            size += 1
+            stack.extend(graph.children(stack.pop()))
+        assert graph.subtree_size(uid) == size
+
+def test_random_updates_match_a_recomputation():
+    rnd = random.Random(7)
+    graph = topology.TopologyGraph()
+    uids = ["N%d" % i for i in range(30)]
+    for _ in range(2000):
+        uid = rnd.choice(uids)
+        if rnd.random() < 0.05:
+            graph.remove(uid)
+            continue
+        address = "%04X" % rnd.randint(0, 40)
+        parent = NO if rnd.random() < 0.1 else "%04X" % rnd.randint(0, 40)
+        graph.update(uid, address, parent)
+    check_against_recomputation(graph)
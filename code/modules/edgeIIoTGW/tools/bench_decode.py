@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+#
+# File:    bench_decode.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Microbenchmark of the packet decoder (lines/sec)
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+# Usage: python3 tools/bench_decode.py [serial capture files (serial_<tag>.log or serial_<tag>.cap)]
+# Without capture files a synthetic coordinator traffic is used.
+#
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# application modules
+import capture
+import decoder
+
+#
+# Read the lines of the serial captures.
+# @param filenames
+#
+def read_capture_lines(filenames):
+    lines = []
+    for filename in filenames:
+        lines += capture.lines(capture.read(filename))
+    return lines
+
+#
+# Generate a synthetic coordinator traffic.
+# @param nodes
+# @param count
+#
+def synthetic_lines(nodes, count):
+    lines = []
+    for i in range(count):
+        uid = "%08X" % (0x10000000 + i % nodes)
+        if i % 10 == 9:
+            devices = [{"UID": "%08X" % (0x10000000 + n), "ZbAddr": "%04X" % (n + 1), "ZbPrntAddr": "0000",
+                        "ZbTyp": 2, "ZbSts": 1, "RSSI": -60 - n % 20} for n in range(nodes)]
+            packet = {"Epoch": i, "ZbNet": {"Devices": devices}}
+        else:
+            packet = {"Epoch": i, "DevSts": {"UID": uid, "ZbAddr": "%04X" % (i % nodes + 1), "Temperature": str(200 + i % 50),
+                                             "CbM": str(i % 3), "Battery": {"Voltage": 3300, "Level": 90, "State": 1}}}
+        lines.append(json.dumps(packet).encode("utf-8"))
+    return lines
+
+async def handler(payload, epoch):
+    pass
+
+#
+# Decoder before the dispatch table: str line, eager log and fixed chain of checks.
+#
+class LegacyDecoder():
+
+    _Logger = logging.getLogger("bench_legacy")
+
+    def __init__(self):
+        # the records are created as on the gateway but not printed
+        self._Logger.setLevel(logging.DEBUG)
+        self._Logger.addHandler(logging.NullHandler())
+        self._Logger.propagate = False
+
+    async def decode(self, json_line):
+        json_line = json_line.decode("utf-8")
+        self._Logger.info("Decode line '" + (json_line) + "'")
+        try:
+            json_obj = json.loads(json_line)
+            epoch = 0
+            try:
+                if "Epoch" in json_obj:
+                    epoch = int(json_obj["Epoch"])
+            except:
+                epoch = -1
+            if "DevSts" in json_obj:
+                await handler(json_obj["DevSts"], epoch)
+            if "ZbNet" in json_obj:
+                await handler(json_obj["ZbNet"], epoch)
+            if "DevFw" in json_obj:
+                await handler(json_obj["DevFw"], epoch)
+            if "DevRtc" in json_obj:
+                await handler(json_obj["DevRtc"], epoch)
+        except json.JSONDecodeError:
+            pass
+
+async def run(decode, lines, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            await decode(line)
+    return len(lines) * repeat / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Packet decoder microbenchmark")
+    parser.add_argument("captures", nargs="*", help="serial capture files")
+    parser.add_argument("--nodes", type=int, default=50, help="synthetic nodes")
+    parser.add_argument("--lines", type=int, default=2000, help="synthetic lines")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # only the errors are shown, as on the gateway
+    logging.basicConfig(level=logging.WARNING)
+
+    lines = read_capture_lines(args.captures) if len(args.captures) > 0 else synthetic_lines(args.nodes, args.lines)
+
+    packet_decoder = decoder.PacketDecoder()
+    for key in ["DevSts", "ZbNet", "DevFw", "DevRtc"]:
+        packet_decoder.register(key, handler)
+
+    loop = asyncio.get_event_loop()
+    legacy = loop.run_until_complete(run(LegacyDecoder().decode, lines, args.repeat))
+    current = loop.run_until_complete(run(packet_decoder.decode, lines, args.repeat))
+
+    print("lines: %d (%s)" % (len(lines), "capture" if len(args.captures) > 0 else "synthetic"))
+    print("legacy           : %10.0f lines/s" % legacy)
+    print("decoder (%-7s): %10.0f lines/s (x%.2f)" % (decoder.JSON_BACKEND, current, current / legacy))
+
+    if decoder.JSON_BACKEND != "json":
+        fast_loads = decoder.json_loads
+        decoder.json_loads = json.loads
+        current = loop.run_until_complete(run(packet_decoder.decode, lines, args.repeat))
+        decoder.json_loads = fast_loads
+        print("decoder (json   ): %10.0f lines/s (x%.2f)" % (current, current / legacy))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+#
+# File:    bench_egress.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Microbenchmark of the messages sent through Inference.node_send_message (messages/sec)
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+# Usage: python3 tools/bench_egress.py [--nodes N] [--messages N]
+#
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# application modules
+import inference
+
+# azure modules
+from azure.iot.device import Message
+
+#
+# Module client accepting the messages without sending them.
+#
+class StubClient():
+
+    def __init__(self):
+        self.sent = 0
+        self.bytes = 0
+
+    async def send_message_to_output(self, message, output_name):
+        self.sent += 1
+        self.bytes += len(message.data)
+
+#
+# Send path before the egress serializer: python repr payload, new properties and uuid4 for each message.
+#
+class LegacyInference(inference.Inference):
+
+    def _create_message(self, device_physical_id, message):
+        new_message = Message(message)
+        new_message.id = uuid.uuid4()
+        new_message.content_encoding = "utf-8"
+        new_message.content_type = "application/json"
+        new_message.custom_properties["device_physical_id"] = device_physical_id
+        return new_message
+
+    async def node_send_message(self, node_uuid, message, output_channel):
+        _msg = self._create_message(node_uuid, str(message))
+        await self._module_client.send_message_to_output(_msg, output_channel)
+        return _msg
+
+#
+# Generate the node updates.
+# @param nodes
+# @param count
+#
+def synthetic_updates(nodes, count):
+    updates = []
+    for i in range(count):
+        updates.append(("dev-%04d" % (i % nodes), {"UID": "%08X" % (0x10000000 + i % nodes), "Epoch": i, "Address": "%04X" % (i % nodes + 1),
+                                                  "Parent": "0000", "Temperature": 20.0 + (i % 50) / 10, "CbM": i % 3,
+                                                  "Battery": {"Voltage": 3300, "Level": 90, "State": 1}}))
+    return updates
+
+async def run(sender, updates, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for device_physical_id, update in updates:
+            await sender.node_send_message(device_physical_id, update, "identitytranslation_output")
+    return len(updates) * repeat / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Egress microbenchmark")
+    parser.add_argument("--nodes", type=int, default=50, help="synthetic nodes")
+    parser.add_argument("--messages", type=int, default=2000, help="synthetic messages")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    updates = synthetic_updates(args.nodes, args.messages)
+    loop = asyncio.get_event_loop()
+
+    legacy_client = StubClient()
+    legacy = loop.run_until_complete(run(LegacyInference(legacy_client), updates, args.repeat))
+    client = StubClient()
+    current = loop.run_until_complete(run(inference.Inference(client), updates, args.repeat))
+
+    # the legacy payload is not json
+    try:
+        json.loads(str(updates[0][1]))
+        legacy_json = "yes"
+    except ValueError:
+        legacy_json = "no"
+
+    print("messages: %d, nodes: %d" % (len(updates), args.nodes))
+    print("legacy (repr)    : %10.0f msg/s, %6.1f bytes/msg, valid json: %s" % (legacy, legacy_client.bytes / legacy_client.sent, legacy_json))
+    print("inference (%-6s): %10.0f msg/s, %6.1f bytes/msg, valid json: yes (x%.2f)" % ("orjson" if not inference._fast_dumps is None else "json",
+                                                                                   current, client.bytes / client.sent, current / legacy))
+
+    if not inference._fast_dumps is None:
+        fast_dumps = inference._fast_dumps
+        inference._fast_dumps = None
+        current = loop.run_until_complete(run(inference.Inference(StubClient()), updates, args.repeat))
+        inference._fast_dumps = fast_dumps
+        print("inference (json  ): %10.0f msg/s (x%.2f)" % (current, current / legacy))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/python3
+#
+# File:    bench_gw.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Throughput benchmark of the gateway application with a synthetic mesh (offline)
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+# Usage: python3 tools/bench_gw.py [--nodes 10,100,1000] [--duration 60] [--send-latency 0.0] [--batching Array]
+# Each mesh size is measured in a new process, the traffic is sent as fast as possible to
+# GWApp.receive_message_handler and the cloud is replaced by a stub client.
+#
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+TOOLS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+MODULE_FOLDER = os.path.join(TOOLS_FOLDER, "..")
+sys.path.insert(0, MODULE_FOLDER)
+sys.path.insert(0, TOOLS_FOLDER)
+
+#
+# Resident memory of the process in bytes.
+#
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+#
+# Percentile of a sorted list.
+# @param values
+# @param p 0-100
+#
+def percentile(values, p):
+    if len(values) == 0:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+#
+# Prepare the configuration folder of a run: app configuration from the template with the
+# paths in the temporary folder, network configuration with a provisioning entry for each node.
+# @param folder
+# @param coordinator
+# @param args
+#
+def prepare_config(folder, coordinator, args):
+    config_folder = os.path.join(folder, "config") + "/"
+    log_folder = os.path.join(folder, "log") + "/"
+    os.makedirs(config_folder)
+    os.makedirs(log_folder)
+
+    with open(os.path.join(MODULE_FOLDER, "template_config", "config_app.json")) as f:
+        config_app = json.load(f)
+    config_app["DataLogger"]["Enable"] = not args.no_log
+    config_app["DataLogger"]["Config"]["Path"] = log_folder
+    config_app["NodeRegistry"]["Path"] = config_folder
+    config_app["Spool"]["Path"] = config_folder + "spool/"
+    # the ZbNet packet of a large mesh is longer than the default max line
+    config_app["SerialStream"] = {"MaxLineLength": 1 << 22}
+    # the traffic is sent faster than the real time, with Block all the lines are processed
+    config_app["Ingress"] = {"Enable": not args.no_ingress, "MaxDepth": args.ingress_depth, "Policy": args.ingress_policy}
+    config_app["Batching"]["Enable"] = args.batching != "Off"
+    if args.batching != "Off":
+        config_app["Batching"]["Mode"] = args.batching
+    with open(config_folder + "config_app.json", "w") as f:
+        json.dump(config_app, f, indent=2)
+
+    nodes = {}
+    for node in coordinator.nodes:
+        n = int(node["UID"], 16) - 0x10000000
+        nodes[node["UID"]] = {"Name": "Node%d" % n, "Provisioning": {"device_id": "Node%d" % n, "primary_key": "-", "id_scope": "-",
+                                                                      "device_physical_id": "DP%04d" % n, "device_template_id": "STIIoTNodeDevice"}}
+    nodes["00000000"] = {"Name": "Coordinator", "Provisioning": {}}
+    with open(config_folder + "config_net.json", "w") as f:
+        json.dump({"EdgeGateway": {}, "Nodes": nodes}, f)
+
+    return config_folder
+
+#
+# Measure a mesh size, the result is a dictionary.
+# @param args
+#
+async def run(args):
+    # application modules
+    import gw
+    import loadgen
+    import stubs
+
+    coordinator = loadgen.SyntheticCoordinator(args.nodes, args.devsts_interval, args.network_interval, args.chunk_min, args.chunk_max)
+    lines = coordinator.lines(args.duration)
+    chunks = coordinator.chunks(lines)
+
+    # device id of the edge runtime used by the provisioning
+    os.environ.setdefault("IOTEDGE_DEVICEID", "bench-gw")
+
+    folder = tempfile.mkdtemp(prefix="bench_gw_")
+    try:
+        gw.CONFIG_FOLDER = prepare_config(folder, coordinator, args)
+
+        sent = []
+        client = stubs.StubModuleClient(args.send_latency, args.method_latency,
+                                        lambda message, output_name, t: sent.append((t, message.data)))
+        app = gw.GWApp(client)
+        app.start()
+
+        # warm-up: first ZbNet packet and provisioning of all the nodes
+        chunk_index = 0
+        while chunk_index < len(chunks) and len(chunks[chunk_index][2]) == 0:
+            await app.receive_message_handler(stubs.StubMessage(chunks[chunk_index][1]))
+            chunk_index += 1
+        await app.receive_message_handler(stubs.StubMessage(chunks[chunk_index][1]))
+        chunk_index += 1
+        await app.drain()
+        while app._Provisioning.stats["InFlight"] > 0:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+
+        # measure
+        del sent[:]
+        ingest = {}
+        rss_start = rss_bytes()
+        cpu_start = time.process_time()
+        start = time.monotonic()
+        measured_lines = 0
+        for t, chunk, epochs in chunks[chunk_index:]:
+            received = time.monotonic()
+            await app.receive_message_handler(stubs.StubMessage(chunk))
+            for epoch in epochs:
+                ingest[epoch] = received
+            measured_lines += len(epochs)
+        # the lines queued by the ingress are processed by the workers
+        await app.drain()
+        elapsed = time.monotonic() - start
+        cpu = time.process_time() - cpu_start
+        rss = rss_bytes()
+
+        await app.shutdown()
+
+        # ingest to send latency of the messages with the epoch of a packet
+        latencies = []
+        for t, data in sent:
+            # a batch in Array mode is a list of messages
+            messages = json.loads(data)
+            if not isinstance(messages, list):
+                messages = [messages]
+            for message in messages:
+                epoch = message.get("Epoch")
+                if epoch in ingest:
+                    latencies.append(t - ingest[epoch])
+        latencies.sort()
+
+        return {
+            "Nodes": args.nodes,
+            "Lines": measured_lines,
+            "Chunks": len(chunks) - chunk_index,
+            "Seconds": round(elapsed, 3),
+            "LinesPerSec": round(measured_lines / elapsed, 1),
+            "SimulatedLinesPerSec": round(measured_lines / args.duration, 1),
+            "Messages": len(sent),
+            "P50ms": round(percentile(latencies, 50) * 1000, 3),
+            "P99ms": round(percentile(latencies, 99) * 1000, 3),
+            "CpuSeconds": round(cpu, 3),
+            "CpuPerLineUs": round(cpu / measured_lines * 1e6, 1) if measured_lines > 0 else 0.0,
+            "RssMB": round(rss / 1048576, 1),
+            "RssDeltaMB": round((rss - rss_start) / 1048576, 1)
+        }
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Gateway throughput benchmark")
+    parser.add_argument("--nodes", default="10,100,1000", help="comma separated mesh sizes")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of simulated traffic")
+    parser.add_argument("--devsts-interval", type=float, default=10.0)
+    parser.add_argument("--network-interval", type=float, default=60.0)
+    parser.add_argument("--chunk-min", type=int, default=16)
+    parser.add_argument("--chunk-max", type=int, default=64)
+    parser.add_argument("--send-latency", type=float, default=0.0, help="seconds of each message sent by the stub client")
+    parser.add_argument("--method-latency", type=float, default=0.0, help="seconds of each provisioning of the stub client")
+    parser.add_argument("--no-log", action="store_true", help="disable the data logger")
+    parser.add_argument("--no-ingress", action="store_true", help="decode the lines in the message handler")
+    parser.add_argument("--ingress-depth", type=int, default=256)
+    parser.add_argument("--ingress-policy", default="Block", choices=["DropOldest", "Conflate", "Block"])
+    parser.add_argument("--batching", default="Off", choices=["Off", "Array", "Merge"], help="batching of the messages sent")
+    parser.add_argument("--json", action="store_true", help="print the results in json")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        # the records are created as on the gateway, only the errors are printed
+        logging.basicConfig(level=logging.WARNING)
+        logging.getLogger().handlers[0].setLevel(logging.WARNING)
+        args.nodes = int(args.nodes)
+        result = asyncio.get_event_loop().run_until_complete(run(args))
+        print(json.dumps(result))
+        return
+
+    results = []
+    for nodes in args.nodes.split(","):
+        command = [sys.executable, os.path.abspath(__file__), "--single", "--nodes", nodes.strip()]
+        for option in ["duration", "devsts_interval", "network_interval", "chunk_min", "chunk_max", "send_latency", "method_latency",
+                       "ingress_depth", "ingress_policy", "batching"]:
+            command += ["--" + option.replace("_", "-"), str(getattr(args, option))]
+        if args.no_log:
+            command.append("--no-log")
+        if args.no_ingress:
+            command.append("--no-ingress")
+        output = subprocess.run(command, stdout=subprocess.PIPE, check=True).stdout.decode("utf-8")
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("%6s %8s %10s %10s %9s %9s %9s %10s %8s" % ("nodes", "lines", "lines/s", "messages", "p50 ms", "p99 ms", "cpu s", "cpu us/ln", "rss MB"))
+    for r in results:
+        print("%6d %8d %10.0f %10d %9.3f %9.3f %9.2f %10.1f %8.1f" % (r["Nodes"], r["Lines"], r["LinesPerSec"], r["Messages"],
+                                                                     r["P50ms"], r["P99ms"], r["CpuSeconds"], r["CpuPerLineUs"], r["RssMB"]))
+
+if __name__ == "__main__":
+    main()
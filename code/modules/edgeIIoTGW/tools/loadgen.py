@@ -0,0 +1,200 @@
+#!/usr/bin/python3
+#
+# File:    loadgen.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Synthetic coordinator generating the serial traffic of a ZigBee mesh
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+# Usage: python3 tools/loadgen.py --nodes 100 --duration 60 [--format Binary] serial_ttyS0.log
+# The output is a serial capture (text framing of the serial log or binary with the chunk times)
+# and can be used by the other tools.
+#
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# application modules
+import capture
+
+COORDINATOR_UID = "00000000"
+COORDINATOR_ADDRESS = "0000"
+
+class SyntheticCoordinator():
+
+    DEVSTS_INTERVAL_DEF  = 10.0                 # seconds between two DevSts packets of a node
+    NETWORK_INTERVAL_DEF = 60.0                 # seconds between two ZbNet packets
+    CHUNK_MIN_DEF        = 16                   # min bytes of a serial chunk
+    CHUNK_MAX_DEF        = 64                   # max bytes of a serial chunk
+
+    #
+    # Constructor.
+    # @param nodes number of nodes of the mesh
+    # @param devsts_interval (optional) seconds between two DevSts packets of a node
+    # @param network_interval (optional) seconds between two ZbNet packets
+    # @param chunk_min (optional) min bytes of a serial chunk
+    # @param chunk_max (optional) max bytes of a serial chunk, 0 to send each line in a chunk
+    # @param seed (optional) random seed, the same seed generates the same traffic
+    #
+    def __init__(self, nodes, devsts_interval = DEVSTS_INTERVAL_DEF, network_interval = NETWORK_INTERVAL_DEF,
+                 chunk_min = CHUNK_MIN_DEF, chunk_max = CHUNK_MAX_DEF, seed = 0):
+        self._Random = random.Random(seed)
+        self._DevStsInterval = devsts_interval
+        self._NetworkInterval = network_interval
+        self._ChunkMin = chunk_min
+        self._ChunkMax = chunk_max
+        self._Epoch = 0
+
+        # static mesh: the first nodes are routers connected to the coordinator, the others are connected to a router
+        self.nodes = []
+        routers = max(1, nodes // 10)
+        for n in range(nodes):
+            parent = COORDINATOR_ADDRESS if n < routers else self.address(n % routers)
+            self.nodes.append({"UID": self.uid(n), "ZbAddr": self.address(n), "ZbPrntAddr": parent,
+                               "ZbTyp": 1 if n < routers else 2, "Temperature": 200 + self._Random.randint(0, 100)})
+
+    #
+    # UID of a node.
+    # @param n
+    #
+    @staticmethod
+    def uid(n):
+        return "%08X" % (0x10000000 + n)
+
+    #
+    # ZigBee address of a node.
+    # @param n
+    #
+    @staticmethod
+    def address(n):
+        return "%04X" % (n + 1)
+
+    #
+    # Next epoch, every packet has a different epoch.
+    #
+    def _next_epoch(self):
+        self._Epoch += 1
+        return self._Epoch
+
+    #
+    # DevSts packet of a node, the temperature changes with a random walk.
+    # @param node
+    #
+    def devsts_packet(self, node):
+        node["Temperature"] += self._Random.choice((-1, 0, 0, 0, 1))
+        epoch = self._next_epoch()
+        packet = {"Epoch": epoch, "DevSts": {"UID": node["UID"], "ZbAddr": node["ZbAddr"], "Temperature": str(node["Temperature"]),
+                                             "CbM": str(self._Random.randint(0, 2)),
+                                             "Battery": {"Voltage": 3300, "Level": 90, "State": 1}}}
+        return epoch, packet
+
+    #
+    # ZbNet packet of the mesh.
+    #
+    def network_packet(self):
+        devices = [{"UID": COORDINATOR_UID, "ZbAddr": COORDINATOR_ADDRESS, "ZbTyp": 0, "ZbSts": 1, "RSSI": 0}]
+        for node in self.nodes:
+            devices.append({"UID": node["UID"], "ZbAddr": node["ZbAddr"], "ZbPrntAddr": node["ZbPrntAddr"], "ZbTyp": node["ZbTyp"],
+                            "ZbSts": 1, "RSSI": -40 - self._Random.randint(0, 40)})
+        epoch = self._next_epoch()
+        return epoch, {"Epoch": epoch, "ZbNet": {"Devices": devices}}
+
+    #
+    # Lines of the traffic of a time interval sorted by time, list of (time offset, epoch, line bytes).
+    # The first line is a ZbNet packet.
+    # @param duration seconds
+    #
+    def lines(self, duration):
+        events = []
+        epoch, packet = self.network_packet()
+        events.append((0.0, epoch, packet))
+
+        # the nodes start at a random phase of their interval
+        next_times = [self._Random.uniform(0, self._DevStsInterval) for _ in self.nodes]
+        next_network = self._NetworkInterval
+        for n, node in enumerate(self.nodes):
+            t = next_times[n]
+            while t < duration:
+                events.append((t, 0, n))
+                t += self._DevStsInterval
+        while next_network < duration:
+            events.append((next_network, 0, None))
+            next_network += self._NetworkInterval
+        events[1:] = sorted(events[1:], key=lambda event: event[0])
+
+        # the packets are generated in time order to keep the epochs increasing
+        lines = []
+        for t, epoch, item in events:
+            if isinstance(item, dict):
+                packet = item
+            elif item is None:
+                epoch, packet = self.network_packet()
+            else:
+                epoch, packet = self.devsts_packet(self.nodes[item])
+            lines.append((t, epoch, json.dumps(packet, separators=(",", ":")).encode("utf-8") + b"\r\n"))
+        return lines
+
+    #
+    # Split the lines in serial chunks, list of (time offset, chunk bytes, epochs of the lines completed by the chunk).
+    # @param lines list of (time offset, epoch, line bytes)
+    #
+    def chunks(self, lines):
+        chunks = []
+        for t, epoch, line in lines:
+            if self._ChunkMax <= 0:
+                chunks.append((t, line, [epoch]))
+                continue
+
+            start = 0
+            while start < len(line):
+                size = self._Random.randint(self._ChunkMin, self._ChunkMax)
+                end = min(start + size, len(line))
+                chunks.append((t, line[start:end], [epoch] if end == len(line) else []))
+                start = end
+        return chunks
+
+#
+# Write a synthetic serial log.
+#
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic coordinator traffic")
+    parser.add_argument("output", help="output serial capture (serial_<tag>.log or serial_<tag>.cap)")
+    parser.add_argument("--format", default=capture.FORMAT_TEXT, choices=[capture.FORMAT_TEXT, capture.FORMAT_BINARY])
+    parser.add_argument("--nodes", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of traffic")
+    parser.add_argument("--devsts-interval", type=float, default=SyntheticCoordinator.DEVSTS_INTERVAL_DEF)
+    parser.add_argument("--network-interval", type=float, default=SyntheticCoordinator.NETWORK_INTERVAL_DEF)
+    parser.add_argument("--chunk-min", type=int, default=SyntheticCoordinator.CHUNK_MIN_DEF)
+    parser.add_argument("--chunk-max", type=int, default=SyntheticCoordinator.CHUNK_MAX_DEF)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    coordinator = SyntheticCoordinator(args.nodes, args.devsts_interval, args.network_interval, args.chunk_min, args.chunk_max, args.seed)
+    lines = coordinator.lines(args.duration)
+    chunks = coordinator.chunks(lines)
+    start = time.time()
+    with open(args.output, "wb") as f:
+        if args.format == capture.FORMAT_BINARY:
+            f.write(capture.MAGIC)
+        for t, chunk, epochs in chunks:
+            if args.format == capture.FORMAT_BINARY:
+                f.write(capture.binary_record(chunk, start + t))
+            else:
+                f.write(capture.text_record(chunk.decode("utf-8")).encode("utf-8"))
+    print("%d lines, %d chunks written on %s" % (len(lines), len(chunks), args.output))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/python3
+#
+# File:    replay.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Replay of the serial captures through the gateway application (offline)
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+# Usage: python3 tools/replay.py [--config folder] [--speed 0|1|N] capture [capture ...]
+# The captures are the serial logs (serial_<tag>.log) or the binary captures (serial_<tag>.cap),
+# the tag of the file name is the serial port. The chunks are sent to GWApp.receive_message_handler
+# with their original boundaries, the cloud is replaced by a stub client.
+#   --speed 1   original timing (binary captures)
+#   --speed N   timing accelerated N times
+#   --speed 0   as fast as possible (default)
+#
+
+import argparse
+import asyncio
+import cProfile
+import json
+import logging
+import os
+import pstats
+import shutil
+import sys
+import tempfile
+import time
+
+TOOLS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+MODULE_FOLDER = os.path.join(TOOLS_FOLDER, "..")
+sys.path.insert(0, MODULE_FOLDER)
+sys.path.insert(0, TOOLS_FOLDER)
+
+# application modules
+import capture
+
+SERIAL_PORT_DEF = "ttyS0"
+
+#
+# Serial port of a capture from its file name (i.e. iiotgw_serial_ttyS0.log -> ttyS0).
+# @param filename
+#
+def serial_port(filename):
+    name = os.path.splitext(os.path.basename(filename))[0]
+    index = name.rfind("serial_")
+    if index == -1:
+        return SERIAL_PORT_DEF
+    return name[index + len("serial_"):]
+
+#
+# Load the captures, list of (unix time or None, serial port, chunk) sorted by time when available.
+# @param filenames
+#
+def load_chunks(filenames):
+    chunks = []
+    timed = True
+    for filename in filenames:
+        port = serial_port(filename)
+        for timestamp, chunk in capture.read(filename):
+            chunks.append((timestamp, port, chunk))
+            timed = timed and not timestamp is None
+
+    # the text captures have no time, the files are sent one after the other
+    if timed:
+        chunks.sort(key=lambda chunk: chunk[0])
+    return chunks, timed
+
+#
+# Prepare the configuration folder of the replay in a temporary folder.
+# @param folder temporary folder
+# @param config_folder folder with config_app.json and config_net.json
+# @param log_folder folder of the data logger
+#
+def prepare_config(folder, config_folder, log_folder):
+    replay_config_folder = os.path.join(folder, "config") + "/"
+    os.makedirs(replay_config_folder)
+    shutil.copy(os.path.join(config_folder, "config_net.json"), replay_config_folder)
+
+    with open(os.path.join(config_folder, "config_app.json")) as f:
+        config_app = json.load(f)
+    config_app["DataLogger"]["Config"]["Path"] = log_folder
+    if "NodeRegistry" in config_app:
+        config_app["NodeRegistry"]["Path"] = replay_config_folder
+    if "Spool" in config_app:
+        config_app["Spool"]["Path"] = replay_config_folder + "spool/"
+    with open(replay_config_folder + "config_app.json", "w") as f:
+        json.dump(config_app, f, indent=2)
+
+    return replay_config_folder
+
+#
+# Send the chunks to the gateway.
+# @param app
+# @param chunks
+# @param speed 0 as fast as possible, 1 original timing, N accelerated
+#
+async def replay(app, chunks, speed):
+    import stubs
+
+    start = time.monotonic()
+    first = None
+    for timestamp, port, chunk in chunks:
+        if speed > 0 and not timestamp is None:
+            if first is None:
+                first = timestamp
+            delay = start + (timestamp - first) / speed - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await app.receive_message_handler(stubs.StubMessage(chunk, port))
+    await app.drain()
+    return time.monotonic() - start
+
+async def run(args, chunks):
+    import gw
+    import stubs
+
+    # device id of the edge runtime used by the provisioning
+    os.environ.setdefault("IOTEDGE_DEVICEID", "replay-gw")
+
+    folder = tempfile.mkdtemp(prefix="replay_gw_")
+    try:
+        log_folder = args.log_folder if not args.log_folder is None else os.path.join(folder, "log")
+        os.makedirs(log_folder, exist_ok=True)
+        gw.CONFIG_FOLDER = prepare_config(folder, args.config, os.path.join(log_folder, ""))
+
+        client = stubs.StubModuleClient(args.send_latency, args.method_latency)
+        app = gw.GWApp(client)
+        app.start()
+
+        profiler = cProfile.Profile() if not args.profile is None else None
+        if not profiler is None: profiler.enable()
+        elapsed = await replay(app, chunks, args.speed)
+        if not profiler is None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+
+        await app.shutdown()
+        return elapsed, client, app.stats
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay of serial captures")
+    parser.add_argument("captures", nargs="+", help="serial captures (serial_<tag>.log or serial_<tag>.cap)")
+    parser.add_argument("--config", default=os.path.join(MODULE_FOLDER, "template_config"),
+                        help="folder with config_app.json and config_net.json (copied, not modified)")
+    parser.add_argument("--speed", type=float, default=0.0, help="0 as fast as possible, 1 original timing, N accelerated")
+    parser.add_argument("--log-folder", default=None, help="data logger output (temporary folder if not given)")
+    parser.add_argument("--send-latency", type=float, default=0.0, help="seconds of each message sent by the stub client")
+    parser.add_argument("--method-latency", type=float, default=0.0, help="seconds of each provisioning of the stub client")
+    parser.add_argument("--profile", default=None, help="write the cProfile statistics of the replay on this file")
+    parser.add_argument("--stats", action="store_true", help="print the gateway statistics")
+    args = parser.parse_args()
+
+    # only the errors are printed
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().handlers[0].setLevel(logging.WARNING)
+
+    chunks, timed = load_chunks(args.captures)
+    if args.speed > 0 and not timed:
+        print("text captures have no time, replay as fast as possible")
+
+    elapsed, client, stats = asyncio.get_event_loop().run_until_complete(run(args, chunks))
+
+    lines = stats["Decoder"]["Lines"]
+    print("chunks: %d, lines: %d, messages: %d, elapsed: %.3f s, %.0f lines/s" % (len(chunks), lines, client.sent, elapsed,
+                                                                                lines / elapsed if elapsed > 0 else 0.0))
+    if args.stats:
+        print(json.dumps(stats, indent=2))
+    if not args.profile is None:
+        pstats.Stats(args.profile).sort_stats("cumulative").print_stats(20)
+
+if __name__ == "__main__":
+    main()
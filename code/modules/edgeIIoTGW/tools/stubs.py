@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+#
+# File:    stubs.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Offline stand-ins of the IoT Hub module client and of the identity translation module
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+
+import asyncio
+import time
+
+#
+# Message received from the serial module (edgeSerial).
+#
+class StubMessage():
+
+    #
+    # Constructor.
+    # @param data bytes received from the serial port
+    # @param serial_port (optional)
+    #
+    def __init__(self, data, serial_port = "ttyS0"):
+        self.data = data
+        self.custom_properties = {"serial_port": serial_port}
+
+#
+# Module client: the messages are accepted after the send latency, the direct methods
+# of the identity translation module are answered after the method latency.
+#
+class StubModuleClient():
+
+    #
+    # Constructor.
+    # @param send_latency (optional) seconds of every send_message_to_output
+    # @param method_latency (optional) seconds of every invoke_method (i.e. provisioning)
+    # @param on_send (optional) callback(message, output_name, monotonic time) of every message accepted
+    #
+    def __init__(self, send_latency = 0.0, method_latency = 0.0, on_send = None):
+        self.send_latency = send_latency
+        self.method_latency = method_latency
+        self.on_send = on_send
+        self.failing = False                    # all the calls fail while True
+        self._FailCount = 0                     # number of the next calls failing
+
+        self.sent = 0
+        self.sent_bytes = 0
+        self.failed = 0
+        self.methods = 0
+
+    #
+    # Make the next calls fail.
+    # @param count (optional) number of calls, None to fail until set_failing(False)
+    #
+    def fail(self, count = None):
+        if count is None:
+            self.failing = True
+        else:
+            self._FailCount += count
+
+    #
+    # Enable or disable the failure of all the calls.
+    # @param failing
+    #
+    def set_failing(self, failing):
+        self.failing = failing
+        if not failing:
+            self._FailCount = 0
+
+    def _check_failure(self):
+        if self.failing:
+            self.failed += 1
+            raise ConnectionError("stub client offline")
+        if self._FailCount > 0:
+            self._FailCount -= 1
+            self.failed += 1
+            raise ConnectionError("stub client failure on demand")
+
+    async def send_message_to_output(self, message, output_name):
+        if self.send_latency > 0:
+            await asyncio.sleep(self.send_latency)
+        self._check_failure()
+
+        self.sent += 1
+        self.sent_bytes += len(message.data)
+        if not self.on_send is None:
+            self.on_send(message, output_name, time.monotonic())
+
+    async def invoke_method(self, method_params, device_id = None, module_id = None):
+        if self.method_latency > 0:
+            await asyncio.sleep(self.method_latency)
+        self._check_failure()
+
+        self.methods += 1
+        return {"status": 200, "payload": {}}
+
+    async def send_method_response(self, method_response):
+        pass
@@ -0,0 +1,299 @@
+#!/usr/bin/python3
+#
+# File:    topology.py
+# Author:  STMicroelectronics.
+# Version: 1.0.0
+# Date:    16-December-2024
+# Brief:   Incremental graph of the ZigBee topology (parent and children of the nodes)
+#
+# Copyright (c) 2024 STMicroelectronics. All rights reserved.
+#
+# This software component is licensed by ST under ODE SOFTWARE LICENSE AGREEMENT
+# SLA0094, the "License"; You may not use this file except in compliance with
+# the License. You may obtain a copy of the License at:
+# http://www.st.com/SLA0094
+#
+# The nodes are keyed by UID, the parent reported by a node is a ZigBee address resolved with the
+# address index of the graph. A parent address not yet known keeps the node pending (orphan) until
+# a node takes that address. The hop depth and the subtree size are updated at every change, a
+# parent that would close a loop is rejected and the node stays detached until its next update.
+#
+
+NO_ADDRESS = "-"
+
+class TopologyGraph():
+
+    #
+    # Constructor.
+    #
+    def __init__(self):
+        self._Address = {}                      # uid -> address
+        self._ByAddress = {}                    # address -> uid
+        self._ParentAddress = {}                # uid -> parent address reported by the node
+        self._Parent = {}                       # uid -> parent uid (resolved parents only)
+        self._Children = {}                     # uid -> set of the children uid
+        self._Pending = {}                      # parent address -> set of the uid waiting for it
+        self._Depth = {}                        # uid -> hops to the top of its chain
+        self._Size = {}                         # uid -> nodes of its subtree, itself included
+        self._Loops = set()                     # uid whose parent was rejected (loop)
+
+        # metrics
+        self._Stats = {
+            "Updates": 0,
+            "Reparented": 0,
+            "LoopsRejected": 0
+        }
+
+    @property
+    def stats(self):
+        stats = dict(self._Stats)
+        stats["Nodes"] = len(self._Address)
+        stats["Roots"] = len(self.roots())
+        stats["Orphans"] = sum(len(self._Pending[address]) for address in self._Pending)
+        stats["Loops"] = len(self._Loops)
+        stats["MaxDepth"] = max(self._Depth.values()) if len(self._Depth) > 0 else 0
+        return stats
+
+    def __contains__(self, uid):
+        return uid in self._Address
+
+    def __len__(self):
+        return len(self._Address)
+
+    #
+    # Parent uid of a node, None for a root or an orphan.
+    # @param uid
+    #
+    def parent(self, uid):
+        return self._Parent.get(uid)
+
+    #
+    # Children uid of a node (the set owned by the graph, not to be modified).
+    # @param uid
+    #
+    def children(self, uid):
+        return self._Children.get(uid, frozenset())
+
+    #
+    # Hops from the top of the chain of a node (0 for a root).
+    # @param uid
+    #
+    def depth(self, uid):
+        return self._Depth.get(uid, 0)
+
+    #
+    # Number of nodes behind a node, itself included.
+    # @param uid
+    #
+    def subtree_size(self, uid):
+        return self._Size.get(uid, 0)
+
+    #
+    # Check if a node is waiting for its parent address or has been rejected for a loop.
+    # @param uid
+    #
+    def is_orphan(self, uid):
+        if uid in self._Loops:
+            return True
+        parent_address = self._ParentAddress.get(uid, NO_ADDRESS)
+        return parent_address != NO_ADDRESS and not uid in self._Parent
+
+    #
+    # Nodes without a reported parent (i.e. the coordinator).
+    #
+    def roots(self):
+        return [uid for uid in self._Address if self._ParentAddress[uid] == NO_ADDRESS]
+
+    #
+    # Orphan nodes, uid -> parent address not resolved.
+    #
+    def orphans(self):
+        orphans = {}
+        for address in self._Pending:
+            for uid in self._Pending[address]:
+                orphans[uid] = address
+        for uid in self._Loops:
+            orphans[uid] = self._ParentAddress[uid]
+        return orphans
+
+    #
+    # Update the address and the parent address of a node, the node is added at its first update.
+    # Return true if the topology is changed.
+    # @param uid
+    # @param address normalized address
+    # @param parent_address normalized parent address
+    #
+    def update(self, uid, address, parent_address):
+        self._Stats["Updates"] += 1
+        if not uid in self._Address:
+            self._Address[uid] = NO_ADDRESS
+            self._ParentAddress[uid] = NO_ADDRESS
+            self._Children[uid] = set()
+            self._Depth[uid] = 0
+            self._Size[uid] = 1
+            changed = True
+        else:
+            changed = False
+
+        if self._Address[uid] != address:
+            self._set_address(uid, address)
+            changed = True
+
+        # a rejected parent is checked again, the loop could be gone
+        if self._ParentAddress[uid] != parent_address or uid in self._Loops:
+            self._set_parent_address(uid, parent_address)
+            changed = True
+        return changed
+
+    #
+    # Remove a node, its children wait for a new node with its address.
+    # @param uid
+    #
+    def remove(self, uid):
+        if not uid in self._Address:
+            return False
+
+        self._set_parent_address(uid, NO_ADDRESS)
+        self._set_address(uid, NO_ADDRESS)
+        del self._Address[uid]
+        del self._ParentAddress[uid]
+        del self._Children[uid]
+        del self._Depth[uid]
+        del self._Size[uid]
+        return True
+
+    #
+    # Compact snapshot: the routers with their children, the roots, the orphans and the nodes in a loop.
+    #
+    def snapshot(self):
+        routers = {}
+        for uid in self._Children:
+            children = self._Children[uid]
+            if len(children) > 0:
+                routers[uid] = {
+                    "Addr": self._Address[uid],
+                    "Depth": self._Depth[uid],
+                    "Subtree": self._Size[uid],
+                    "Children": sorted(children)
+                }
+        return {
+            "Nodes": len(self._Address),
+            "MaxDepth": max(self._Depth.values()) if len(self._Depth) > 0 else 0,
+            "Roots": sorted(self.roots()),
+            "Routers": routers,
+            "Orphans": self.orphans(),
+            "Loops": sorted(self._Loops)
+        }
+
+    #
+    # Change the address of a node: its children wait for a node with the old address, the nodes
+    # waiting for the new address are attached to it. An address used by another node is taken away.
+    # @param uid
+    # @param address
+    #
+    def _set_address(self, uid, address):
+        old_address = self._Address[uid]
+        if old_address != NO_ADDRESS:
+            if self._ByAddress.get(old_address) == uid:
+                del self._ByAddress[old_address]
+            for child in list(self._Children[uid]):
+                self._detach(child)
+                self._Pending.setdefault(old_address, set()).add(child)
+
+        self._Address[uid] = address
+        if address == NO_ADDRESS:
+            return
+
+        owner = self._ByAddress.get(address)
+        if not owner is None and owner != uid:
+            self._set_address(owner, NO_ADDRESS)
+        self._ByAddress[address] = uid
+
+        for child in self._Pending.pop(address, ()):
+            self._attach(child, uid)
+
+    #
+    # Change the parent address of a node.
+    # @param uid
+    # @param parent_address
+    #
+    def _set_parent_address(self, uid, parent_address):
+        old_parent_address = self._ParentAddress[uid]
+        pending = self._Pending.get(old_parent_address)
+        if not pending is None:
+            pending.discard(uid)
+            if len(pending) == 0:
+                del self._Pending[old_parent_address]
+
+        if uid in self._Parent:
+            self._detach(uid)
+            self._Stats["Reparented"] += 1
+        self._Loops.discard(uid)
+
+        self._ParentAddress[uid] = parent_address
+        if parent_address == NO_ADDRESS:
+            return
+
+        parent = self._ByAddress.get(parent_address)
+        if parent is None:
+            self._Pending.setdefault(parent_address, set()).add(uid)
+        else:
+            self._attach(uid, parent)
+
+    #
+    # Attach a node to its parent, the parent is rejected if it is in the subtree of the node.
+    # @param uid
+    # @param parent
+    #
+    def _attach(self, uid, parent):
+        ancestor = parent
+        while not ancestor is None:
+            if ancestor == uid:
+                self._Loops.add(uid)
+                self._Stats["LoopsRejected"] += 1
+                return False
+            ancestor = self._Parent.get(ancestor)
+
+        self._Parent[uid] = parent
+        self._Children[parent].add(uid)
+
+        size = self._Size[uid]
+        ancestor = parent
+        while not ancestor is None:
+            self._Size[ancestor] += size
+            ancestor = self._Parent.get(ancestor)
+
+        self._shift_depth(uid, self._Depth[parent] + 1 - self._Depth[uid])
+        return True
+
+    #
+    # Detach a node from its parent, the node becomes the top of its chain.
+    # @param uid
+    #
+    def _detach(self, uid):
+        parent = self._Parent.pop(uid, None)
+        if parent is None:
+            return
+
+        self._Children[parent].discard(uid)
+        size = self._Size[uid]
+        ancestor = parent
+        while not ancestor is None:
+            self._Size[ancestor] -= size
+            ancestor = self._Parent.get(ancestor)
+
+        self._shift_depth(uid, -self._Depth[uid])
+
+    #
+    # Add a delta to the depth of a subtree.
+    # @param uid top of the subtree
+    # @param delta
+    #
+    def _shift_depth(self, uid, delta):
+        if delta == 0:
+            return
+        stack = [uid]
+        while len(stack) > 0:
+            node = stack.pop()
+            self._Depth[node] += delta
+            stack.extend(self._Children[node])